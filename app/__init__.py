@@ -48,6 +48,22 @@ def create_app(config_name='default'):
     # Configurar logging
     setup_logging(app)
 
+    # Server-Timing y desglose de tiempos por petición (opt-in con SERVER_TIMING_ENABLED)
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    # Métricas Prometheus en /metrics (opt-in con METRICS_ENABLED)
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    # Log de consultas lentas con EXPLAIN (opt-in con SLOW_QUERY_MS)
+    from app.slow_query import init_slow_query_log
+    init_slow_query_log(app)
+
+    # Perfilado bajo demanda de peticiones (opt-in con PROFILING_ENABLED)
+    from app.profiling import init_profiling
+    init_profiling(app)
+
     # En modo frozen, suprimir logs de werkzeug a nivel de Flask
     if is_frozen():
         import logging
@@ -93,6 +109,10 @@ def create_app(config_name='default'):
     # Registrar el blueprint principal
     app.register_blueprint(main_module.main_bp)
 
+    # Unidad de trabajo por petición (opt-in con DB_REQUEST_SCOPED)
+    from app.database import init_unit_of_work
+    init_unit_of_work(app)
+
     # Middleware para redirigir a /setup si no existe .env
     if config_name != 'testing':
         @app.before_request
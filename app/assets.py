@@ -0,0 +1,37 @@
+"""
+Recursos estáticos servidos con huella (fingerprint) en la URL.
+
+plotly.js se sirve una sola vez por página desde la copia que trae el paquete
+``plotly`` instalado (``plotly/package_data/plotly.min.js``):
+- No depende de la red (CDN) y funciona igual en el ejecutable.
+- Siempre coincide con la versión de Python que genera las figuras.
+- La URL incluye un hash del contenido, así que puede cachearse "para siempre"
+  (``Cache-Control: immutable``); al actualizar plotly cambia la URL.
+"""
+import hashlib
+import os
+from functools import lru_cache
+from typing import Tuple
+
+# Un año: la URL cambia con el contenido, así que nunca queda obsoleta
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+
+@lru_cache(maxsize=1)
+def plotly_js() -> Tuple[str, str]:
+    """
+    Localiza plotly.min.js y calcula su huella.
+
+    Returns:
+        (ruta del fichero, huella): la huella son los 12 primeros caracteres
+        del SHA-256 del contenido.
+    """
+    import plotly
+
+    path = os.path.join(os.path.dirname(plotly.__file__),
+                        'package_data', 'plotly.min.js')
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return path, digest.hexdigest()[:12]
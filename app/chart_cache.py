@@ -0,0 +1,236 @@
+"""
+Caché de gráficos ya generados (HTML / JSON de Plotly).
+
+Los gastos, presupuestos y categorías solo cambian cuando alguien escribe,
+así que repetir /report no necesita volver a consultar MySQL ni construir
+las figuras. Cada entrada se guarda con:
+
+- una clave: (gráfico, argumentos, mes en curso). El mes en curso separa las
+  ventanas "últimos 12 meses" de meses distintos.
+- la versión de los datos en el momento de generarla.
+
+Las rutas de escritura de los servicios llaman a ``invalidate()``, que sube la
+versión tras el commit: las entradas antiguas dejan de coincidir y salen por LRU.
+
+Con varios procesos (workers de gunicorn) la versión local de cada proceso no
+ve las escrituras de los demás, así que la versión incluye además un contador
+compartido: ``invalidate()`` añade un byte a un fichero (``CHART_CACHE_STAMP_FILE``,
+por defecto ``logs/chart-cache.stamp``) y el contador es su tamaño. Las
+escrituras en modo append no se pisan entre procesos y cada invalidación
+cambia el tamaño, aunque dos caigan en el mismo tic del reloj del sistema de
+ficheros. ``restore_backup.py`` usa el mismo fichero. ``CHART_CACHE_TTL``
+acota además la vida de cada entrada (escrituras externas por SQL directo).
+"""
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from .database import after_commit
+from .logging_config import get_logs_dir
+
+STAMP_FILENAME = 'chart-cache.stamp'
+
+_MISS = object()
+
+
+class ChartCache:
+    """
+    Caché LRU acotada y thread-safe.
+
+    Args:
+        max_entries: Número máximo de entradas (se expulsa la menos usada).
+        ttl: Segundos de vida de una entrada (0 = sin caducidad).
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Any:
+        """Devuelve el valor guardado, o ``_MISS`` si no está, caducó o es de otra versión."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, stored_at, value = entry
+                fresh = not self.ttl or time.monotonic() - stored_at < self.ttl
+                if entry_version == version and fresh:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return _MISS
+
+    def set(self, key: Hashable, version: Hashable, value: Any) -> None:
+        """Guarda un valor para la versión dada, expulsando la entrada más antigua si hace falta."""
+        with self._lock:
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vacía la caché."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve ``size``, ``max_entries``, ``hits`` y ``misses``."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache: Optional[ChartCache] = None
+_cache_lock = threading.Lock()
+_version = 0
+_version_lock = threading.Lock()
+_default_stamp: Optional[str] = None
+
+
+def _setting(name: str, default: Any) -> Any:
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _enabled() -> bool:
+    # Solo dentro de la app: el código fuera de contexto (scripts, tests de
+    # servicios con mocks) siempre genera los gráficos de nuevo
+    return has_app_context() and bool(current_app.config.get('CHART_CACHE_ENABLED', False))
+
+
+def get_chart_cache() -> ChartCache:
+    """Devuelve la caché del proceso, creándola con la configuración actual."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ChartCache(
+                    max_entries=_setting('CHART_CACHE_MAX_ENTRIES', 256),
+                    ttl=_setting('CHART_CACHE_TTL', 0))
+    return _cache
+
+
+def default_stamp_file() -> str:
+    """Fichero compartido por defecto: ``logs/chart-cache.stamp``."""
+    global _default_stamp
+    if _default_stamp is None:
+        _default_stamp = str(get_logs_dir() / STAMP_FILENAME)
+    return _default_stamp
+
+
+def _stamp_file() -> str:
+    return _setting('CHART_CACHE_STAMP_FILE', '') or default_stamp_file()
+
+
+def read_stamp(path: str) -> int:
+    """Contador compartido: número de invalidaciones registradas en ``path``."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0  # Sin fichero todavía: ninguna escritura compartida
+
+
+def bump_stamp(path: str) -> None:
+    """Suma uno al contador compartido de ``path`` (añade un byte)."""
+    try:
+        with open(path, 'ab') as f:
+            f.write(b'.')
+    except OSError:
+        pass  # La caché local ya quedó invalidada; el TTL acota el resto
+
+
+def data_version() -> Tuple[int, int]:
+    """Versión actual de los datos: (contador del proceso, contador compartido)."""
+    return _version, read_stamp(_stamp_file())
+
+
+def _bump_version() -> None:
+    global _version
+    with _version_lock:
+        _version += 1
+    bump_stamp(_stamp_file())
+
+
+def invalidate() -> None:
+    """
+    Invalida todos los gráficos cacheados tras una escritura.
+
+    Se ejecuta después del commit (ver ``database.after_commit``) para que
+    ninguna petición concurrente guarde datos anteriores con la versión nueva.
+    """
+    after_commit(_bump_version)
+
+
+class _Uncacheable:
+    """Envoltorio de un resultado que debe devolverse pero no guardarse."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def uncacheable(value: Any) -> Any:
+    """
+    Marca un resultado para que ``cached_chart`` lo devuelva sin cachearlo.
+
+    Útil para resultados degradados (p.ej. un gráfico sustituido por un aviso
+    tras un timeout). Fuera de ``cached_chart`` se usa ``unwrap`` para leerlo.
+    """
+    return _Uncacheable(value)
+
+
+def unwrap(value: Any) -> Any:
+    """Devuelve el valor real de un resultado marcado con ``uncacheable``."""
+    return value.value if isinstance(value, _Uncacheable) else value
+
+
+def cached_chart(name: str) -> Callable:
+    """
+    Decorador: cachea el resultado de un generador de gráficos.
+
+    La clave es (name, argumentos, mes en curso); las listas se convierten a
+    tuplas. Con la caché deshabilitada llama a la función sin más.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled():
+                return unwrap(func(*args, **kwargs))
+
+            def freeze(value):
+                return tuple(value) if isinstance(value, list) else value
+
+            key = (name,
+                   tuple(freeze(a) for a in args),
+                   tuple(sorted((k, freeze(v)) for k, v in kwargs.items())),
+                   datetime.now().strftime('%Y%m'))
+            # Versión leída ANTES de generar: si hay una escritura mientras
+            # tanto, la entrada queda con la versión vieja y nunca se sirve
+            version = data_version()
+            cache = get_chart_cache()
+            value = cache.get(key, version)
+            if value is _MISS:
+                value = func(*args, **kwargs)
+                if isinstance(value, _Uncacheable):
+                    return value.value
+                cache.set(key, version, value)
+            return value
+        return wrapper
+    return decorator
@@ -37,8 +37,60 @@ class BaseConfig:
     DB_NAME = os.getenv('DB_NAME', 'economia_db')
     DB_PORT = int(os.getenv('DB_PORT', '3306'))
 
+    # Pool de conexiones (ver app/pool.py)
+    DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))  # segundos
+    DB_POOL_IDLE_TIMEOUT = int(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))  # segundos
+    DB_POOL_MAX_LIFETIME = int(os.getenv('DB_POOL_MAX_LIFETIME', '3600'))  # segundos
+    DB_POOL_PING = os.getenv('DB_POOL_PING', 'true').lower() in ('1', 'true', 'yes')
+
+    # Unidad de trabajo por petición: una conexión y una transacción por request
+    DB_REQUEST_SCOPED = os.getenv('DB_REQUEST_SCOPED', 'false').lower() in ('1', 'true', 'yes')
+
+    # /report: dibujar los gráficos en el navegador al entrar en pantalla
+    # (False = generarlos todos en el servidor e incrustarlos en el HTML)
+    REPORT_LAZY_CHARTS = os.getenv('REPORT_LAZY_CHARTS', 'true').lower() in ('1', 'true', 'yes')
+    # Sin lazy: construir las figuras en paralelo en un pool de hilos
+    REPORT_PARALLEL_CHARTS = os.getenv('REPORT_PARALLEL_CHARTS', 'false').lower() in ('1', 'true', 'yes')
+    REPORT_CHART_WORKERS = int(os.getenv('REPORT_CHART_WORKERS', '4'))
+    REPORT_CHART_TIMEOUT = float(os.getenv('REPORT_CHART_TIMEOUT', '10'))  # segundos por gráfico, desde que empieza
+
+    # Caché de gráficos generados (ver app/chart_cache.py)
+    CHART_CACHE_ENABLED = os.getenv('CHART_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    CHART_CACHE_MAX_ENTRIES = int(os.getenv('CHART_CACHE_MAX_ENTRIES', '256'))
+    CHART_CACHE_TTL = int(os.getenv('CHART_CACHE_TTL', '3600'))  # segundos (0 = sin caducidad)
+    # Fichero compartido entre workers para propagar invalidaciones ('' = logs/chart-cache.stamp)
+    CHART_CACHE_STAMP_FILE = os.getenv('CHART_CACHE_STAMP_FILE', '')
+
+    # Instrumentación: cabecera Server-Timing y log de tiempos por petición
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    # Métricas Prometheus en /metrics (ver app/metrics.py)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    # Directorio compartido por los workers de gunicorn ('' = un solo proceso)
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+    # Log de consultas lentas (ver app/slow_query.py); 0 = desactivado
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '0'))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() in ('1', 'true', 'yes')
+    # Perfilado bajo demanda (ver app/profiling.py); los perfiles van a logs/
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    # Valor de la cabecera X-Profile que activa el perfil ('' = no se puede pedir)
+    PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+    # Fracción de peticiones perfiladas al azar (0.0 = ninguna)
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+    # 'cprofile' (determinista) o 'sampling' (muestreo de la pila)
+    PROFILING_MODE = os.getenv('PROFILING_MODE', 'cprofile').lower()
+    PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', '5'))
+
     # Configuración de logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # 'text' (por defecto) o 'json' (una línea JSON por registro)
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+    # Escribir los logs desde un hilo en segundo plano (ver app/logging_config.py)
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+    # Registros en espera como máximo; con la cola llena se descartan (y se cuentan)
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
 
 
 class DevelopmentConfig(BaseConfig):
@@ -70,3 +122,4 @@ class TestingConfig(BaseConfig):
     TESTING = True
     WTF_CSRF_ENABLED = False  # Deshabilitar CSRF en tests
     DB_NAME = 'test_economia_db'  # Base de datos separada para tests
+    CHART_CACHE_ENABLED = False  # Cada test genera sus gráficos con sus propios mocks
@@ -13,6 +13,10 @@ MESES: List[str] = [
 SQL_MONTH_FIELD = f"""FIELD(mes, '{("', '").join(MESES)}')"""
 SQL_MONTH_FIELD_DESC = f"""FIELD(mes, '{("', '").join(reversed(MESES))}')"""
 
+# Expresión de la columna generada `periodo` (AAAAMM) en gastos y presupuesto.
+# Permite filtrar y ordenar por rangos de meses usando índices (sargable).
+SQL_PERIODO_EXPR = f"anio * 100 + {SQL_MONTH_FIELD}"
+
 # Fragmento SQL para SELECT de presupuesto más reciente
 SQL_LATEST_BUDGET = f"""
     SELECT monto 
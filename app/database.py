@@ -2,13 +2,22 @@
 Módulo para manejar conexiones a la base de datos.
 Provee helpers y context managers para obtener conexiones y cursores.
 """
+import atexit
 from contextlib import contextmanager
 import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
 import pymysql
-from flask import current_app, has_app_context
+from flask import current_app, g, has_app_context, has_request_context
 
 from .config import DefaultConfig
 from .exceptions import DatabaseError
+from .instrumentation import instrument_cursor
+from .pool import ConnectionPool, PooledConnection
+
+# Un pool por combinación de parámetros de conexión (BD normal / BD de tests)
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
 
 
 def _get_db_params():
@@ -33,27 +42,242 @@ def _get_db_params():
     }
 
 
-def get_connection():
-    """Obtiene una nueva conexión a la base de datos."""
-    params = _get_db_params()
+def _get_pool_settings() -> Dict[str, Any]:
+    """Obtiene la configuración del pool, priorizando la configuración de Flask."""
+    config = current_app.config if has_app_context() else {}
+
+    def setting(name):
+        return config.get(name, getattr(DefaultConfig, name))
+
+    return {
+        'enabled': setting('DB_POOL_ENABLED'),
+        'min_size': setting('DB_POOL_MIN_SIZE'),
+        'max_size': setting('DB_POOL_MAX_SIZE'),
+        'timeout': setting('DB_POOL_TIMEOUT'),
+        'idle_timeout': setting('DB_POOL_IDLE_TIMEOUT'),
+        'max_lifetime': setting('DB_POOL_MAX_LIFETIME'),
+        'ping': setting('DB_POOL_PING'),
+    }
+
+
+def _connect(params: Dict[str, Any]):
+    """Abre una conexión física nueva (sin pool)."""
     return pymysql.connect(
         **params,
         cursorclass=pymysql.cursors.DictCursor
     )
 
 
+def get_pool(params: Optional[Dict[str, Any]] = None) -> Optional[ConnectionPool]:
+    """
+    Devuelve el pool asociado a los parámetros de conexión actuales.
+
+    Args:
+        params: Parámetros de conexión (por defecto, los de ``_get_db_params()``).
+
+    Returns:
+        ConnectionPool, o None si el pool está deshabilitado por configuración.
+    """
+    settings = _get_pool_settings()
+    if not settings.pop('enabled'):
+        return None
+
+    params = params or _get_db_params()
+    key = tuple(sorted(params.items()))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(lambda: _connect(params), **settings)
+                _pools[key] = pool
+    return pool
+
+
+def close_pools():
+    """Cierra las conexiones ociosas de todos los pools (apagado de la app)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def _reset_pools_after_fork():
+    """En el proceso hijo (worker de gunicorn), olvidar las conexiones heredadas."""
+    for pool in list(_pools.values()):
+        pool.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+atexit.register(close_pools)
+
+
+def get_connection():
+    """
+    Obtiene una conexión a la base de datos.
+
+    Si el pool está habilitado (``DB_POOL_ENABLED``) la conexión sale del pool
+    y ``close()`` la devuelve a él; en caso contrario se abre una conexión nueva.
+    """
+    params = _get_db_params()
+    pool = get_pool(params)
+    if pool is None:
+        return _connect(params)
+    return pool.acquire()
+
+
+class _RequestUnitOfWork:
+    """
+    Unidad de trabajo ligada a una petición HTTP (vive en ``flask.g``).
+
+    La conexión se abre de forma perezosa en el primer ``cursor_context()`` y
+    arranca una transacción con snapshot consistente, de modo que todas las
+    lecturas de la petición ven el mismo estado de la BD. Se confirma o se
+    revierte una sola vez al terminar la petición.
+    """
+
+    def __init__(self):
+        self.conn = None
+        self.rollback_only = False
+        self.after_commit: List[Callable[[], None]] = []
+
+    def connection(self):
+        """Devuelve la conexión de la petición, abriéndola si aún no existe."""
+        if self.conn is None:
+            conn = get_connection()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            except pymysql.Error:
+                conn.close()
+                raise
+            self.conn = conn
+        return self.conn
+
+    def finish(self, commit: bool):
+        """Confirma (o revierte) la transacción y devuelve la conexión al pool."""
+        conn, self.conn = self.conn, None
+        callbacks, self.after_commit = self.after_commit, []
+        if conn is None:
+            return
+        committed = False
+        try:
+            if commit and not self.rollback_only:
+                conn.commit()
+                committed = True
+            else:
+                conn.rollback()
+        finally:
+            try:
+                conn.close()
+            except pymysql.Error:
+                pass  # Ignorar errores al cerrar
+        if committed:
+            for callback in callbacks:
+                callback()
+
+
+class _DeferredCommitConnection:
+    """
+    Vista de la conexión de la petición que entregan los context managers.
+
+    ``commit()`` y ``close()`` no hacen nada: el commit real se hace una vez
+    al final de la petición. El resto de atributos se delegan.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        """Commit diferido al final de la petición."""
+
+    def close(self):
+        """La conexión pertenece a la petición; se libera en el teardown."""
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _current_unit_of_work() -> Optional[_RequestUnitOfWork]:
+    """Devuelve la unidad de trabajo de la petición en curso, si existe."""
+    if has_request_context():
+        return g.get('_db_unit_of_work')
+    return None
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """
+    Ejecuta ``callback`` cuando los cambios ya son visibles para otras conexiones.
+
+    Con unidad de trabajo activa se difiere hasta el commit real al final de
+    la petición (y se descarta si la petición se revierte); sin ella, el
+    llamador ya hizo ``conn.commit()`` y se ejecuta de inmediato.
+    """
+    uow = _current_unit_of_work()
+    if uow is not None and uow.conn is not None:
+        uow.after_commit.append(callback)
+    else:
+        callback()
+
+
+def init_unit_of_work(app):
+    """
+    Registra los hooks de la unidad de trabajo por petición.
+
+    Solo tiene efecto si ``DB_REQUEST_SCOPED`` está activo en la configuración:
+    entonces todos los ``cursor_context()``/``connection_context()`` de una
+    petición comparten una conexión y una transacción, que se confirma al
+    terminar (respuestas < 500) o se revierte (excepción o error 5xx).
+    """
+    @app.before_request
+    def _begin_unit_of_work():
+        if current_app.config.get('DB_REQUEST_SCOPED'):
+            g._db_unit_of_work = _RequestUnitOfWork()
+
+    @app.after_request
+    def _commit_unit_of_work(response):
+        uow = g.pop('_db_unit_of_work', None)
+        if uow is not None:
+            try:
+                uow.finish(commit=response.status_code < 500)
+            except pymysql.Error as e:
+                raise DatabaseError(
+                    f"Error al confirmar la transacción de la petición: {e}") from e
+        return response
+
+    @app.teardown_request
+    def _rollback_unit_of_work(exc):
+        # Solo queda pendiente si hubo una excepción antes de after_request
+        uow = g.pop('_db_unit_of_work', None)
+        if uow is not None:
+            try:
+                uow.finish(commit=False)
+            except pymysql.Error:
+                pass  # La conexión se descarta igualmente
+
+
 @contextmanager
 def connection_context():
     """Context manager que entrega una conexión y se asegura de cerrar.
 
+    Dentro de una petición con unidad de trabajo activa, entrega la conexión
+    compartida de la petición (el commit se difiere al final de la petición).
+
     Raises:
         DatabaseError: Si no se puede establecer o cerrar la conexión.
     """
+    uow = _current_unit_of_work()
     conn = None
     try:
+        if uow is not None:
+            yield _DeferredCommitConnection(uow.connection())
+            return
         conn = get_connection()
         yield conn
     except pymysql.Error as e:
+        if uow is not None:
+            uow.rollback_only = True
         raise DatabaseError(f"Error en conexión a base de datos: {e}") from e
     finally:
         if conn:
@@ -71,16 +295,32 @@ def cursor_context():
         with cursor_context() as (conn, cur):
             cur.execute(...)
 
+    Dentro de una petición con unidad de trabajo activa (``DB_REQUEST_SCOPED``)
+    reutiliza la conexión de la petición: ``conn.commit()`` se difiere al
+    final de la petición y solo se cierra el cursor.
+
+    Con la instrumentación activa (``app.instrumentation``) el cursor se
+    entrega envuelto para cronometrar cada consulta.
+
     Raises:
         DatabaseError: Si no se puede establecer la conexión o crear el cursor.
     """
+    uow = _current_unit_of_work()
     conn = None
     cur = None
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        yield conn, cur
+        if uow is not None:
+            shared = uow.connection()
+            cur = instrument_cursor(shared.cursor())
+            yield _DeferredCommitConnection(shared), cur
+        else:
+            conn = get_connection()
+            cur = instrument_cursor(conn.cursor())
+            yield conn, cur
     except pymysql.Error as e:
+        if uow is not None:
+            # Un error invalida la petición completa: revertir al final
+            uow.rollback_only = True
         raise DatabaseError(f"Error en cursor de base de datos: {e}") from e
     finally:
         if cur:
@@ -95,6 +335,145 @@ def cursor_context():
                 pass  # Ignorar errores al cerrar
 
 
+@contextmanager
+def streaming_cursor_context():
+    """Context manager que entrega (conn, cursor) con un cursor sin buffer.
+
+    El cursor es ``SSDictCursor``: las filas se leen del socket a medida que
+    se piden (``fetchmany``) en lugar de cargarse todas en memoria, útil para
+    exportaciones grandes.
+
+    Siempre usa una conexión propia, también con unidad de trabajo activa:
+    mientras un cursor sin buffer no se ha consumido, la conexión no admite
+    otras consultas. Si el bloque termina antes de leer todas las filas, la
+    conexión se descarta en lugar de drenar el resto del resultado.
+
+    Raises:
+        DatabaseError: Si no se puede establecer la conexión o crear el cursor.
+    """
+    conn = None
+    cur = None
+    completed = False
+    try:
+        conn = get_connection()
+        cur = instrument_cursor(conn.cursor(pymysql.cursors.SSDictCursor))
+        yield conn, cur
+        completed = True
+    except pymysql.Error as e:
+        raise DatabaseError(f"Error en cursor de base de datos: {e}") from e
+    finally:
+        if conn is not None and not completed:
+            # Resultado a medio leer: cerrar el socket sin drenarlo
+            try:
+                if isinstance(conn, PooledConnection):
+                    conn.discard()
+                else:
+                    conn.close()
+            except pymysql.Error:
+                pass  # Ignorar errores al cerrar
+        elif conn is not None:
+            if cur:
+                try:
+                    cur.close()
+                except pymysql.Error:
+                    pass  # Ignorar errores al cerrar
+            try:
+                conn.close()
+            except pymysql.Error:
+                pass  # Ignorar errores al cerrar
+
+
+# Versión del esquema que espera el código: número de la última migración
+# de scripts/migrations/ (al añadir una, subir la versión y sus columnas abajo)
+SCHEMA_VERSION = 4
+
+# Columnas que añaden las migraciones; si están todas, el esquema está al día
+SCHEMA_REQUIRED_COLUMNS = {
+    'categorias': ('mostrar_en_graficas', 'incluir_en_resumen'),  # 002, 003
+    'gastos': ('periodo',),  # 004
+    'presupuesto': ('periodo',),  # 004
+}
+
+_SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        id TINYINT PRIMARY KEY,
+        version INT NOT NULL,
+        verified_at DATETIME NOT NULL
+    )
+"""
+
+# Códigos de error de MySQL
+_ER_BAD_DB_ERROR = 1049
+_ER_NO_SUCH_TABLE = 1146
+
+# BDs (host, puerto, nombre) ya verificadas en este proceso; con preload_app
+# de gunicorn la verificación hecha en el master la heredan los workers
+_verified_schemas = set()
+
+
+def read_schema_version(cursor) -> Optional[int]:
+    """
+    Lee la versión de esquema registrada (lectura por clave primaria).
+
+    Returns:
+        La versión, o None si la tabla ``schema_version`` no existe o está vacía.
+    """
+    try:
+        cursor.execute("SELECT version FROM schema_version WHERE id = 1")
+    except pymysql.err.ProgrammingError as e:
+        if e.args and e.args[0] == _ER_NO_SUCH_TABLE:
+            return None
+        raise
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return row['version'] if isinstance(row, dict) else row[0]
+
+
+def write_schema_version(cursor, version: int = SCHEMA_VERSION) -> None:
+    """Registra ``version`` como la versión verificada del esquema."""
+    cursor.execute(_SCHEMA_VERSION_TABLE)
+    cursor.execute(
+        "INSERT INTO schema_version (id, version, verified_at) VALUES (1, %s, NOW()) "
+        "ON DUPLICATE KEY UPDATE version = VALUES(version), verified_at = VALUES(verified_at)",
+        (version,))
+
+
+def missing_schema_columns(cursor, db_name: str) -> List[str]:
+    """Columnas de ``SCHEMA_REQUIRED_COLUMNS`` que faltan en la BD (``tabla.columna``)."""
+    cursor.execute(
+        "SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = %s", (db_name,))
+    existentes = {
+        tuple(v.lower() for v in (row.values() if isinstance(row, dict) else row))
+        for row in cursor.fetchall()
+    }
+    return [f"{tabla}.{columna}"
+            for tabla, columnas in SCHEMA_REQUIRED_COLUMNS.items()
+            for columna in columnas
+            if (tabla, columna) not in existentes]
+
+
+def _schema_is_current(params: Dict[str, Any]) -> bool:
+    """
+    Camino rápido del arranque: una conexión y una lectura por clave primaria.
+
+    Returns:
+        True si la BD existe y tiene registrada la versión ``SCHEMA_VERSION``.
+    """
+    try:
+        conn = pymysql.connect(**params)
+    except pymysql.err.OperationalError as e:
+        if e.args and e.args[0] == _ER_BAD_DB_ERROR:
+            return False  # La BD no existe: la crea la verificación completa
+        raise
+    try:
+        with conn.cursor() as cursor:
+            return read_schema_version(cursor) == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
 def ensure_database_exists():
     """
     Verifica que la base de datos existe y la crea si es necesaria.
@@ -103,17 +482,30 @@ def ensure_database_exists():
     Esta función se ejecuta automáticamente al arrancar la aplicación
     para facilitar la experiencia de usuarios no técnicos.
 
+    Si la tabla ``schema_version`` ya registra ``SCHEMA_VERSION`` basta con
+    esa lectura (una conexión, una consulta por PK). Solo si falta o difiere
+    se hace la verificación completa, que al terminar comprueba las columnas
+    de las migraciones y registra la versión. Una vez verificada, la BD no se
+    vuelve a comprobar en el mismo proceso.
+
     Raises:
         DatabaseError: Si no se puede crear la BD o hay problemas de permisos.
     """
     params = _get_db_params()
     db_name = params['database']
+    schema_key = (params['host'], params['port'], db_name)
+    if schema_key in _verified_schemas:
+        return
 
     # Conectar sin especificar base de datos
     conn_params = params.copy()
     del conn_params['database']
 
     try:
+        if _schema_is_current(params):
+            _verified_schemas.add(schema_key)
+            return
+
         # Conexión al servidor MySQL (sin BD específica)
         conn = pymysql.connect(**conn_params)
         cursor = conn.cursor()
@@ -146,6 +538,16 @@ def ensure_database_exists():
             _apply_schema(conn, cursor)
             print("✅ Estructura de base de datos creada correctamente")
 
+        # Registrar la versión solo si el esquema tiene todas las migraciones
+        faltan = missing_schema_columns(cursor, db_name)
+        if faltan:
+            print(f"⚠️  Faltan columnas de migraciones ({', '.join(faltan)}): "
+                  "ejecuta python scripts/migrate.py")
+        else:
+            write_schema_version(cursor)
+            conn.commit()
+            _verified_schemas.add(schema_key)
+
         cursor.close()
         conn.close()
 
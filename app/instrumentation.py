@@ -0,0 +1,298 @@
+"""
+Instrumentación de peticiones: tiempos de BD, gráficos y plantillas.
+
+Con ``SERVER_TIMING_ENABLED`` cada respuesta lleva una cabecera estándar
+``Server-Timing`` (visible en la pestaña de red del navegador) y se escribe
+una línea de log estructurada por petición con el desglose:
+
+- ``db``: consultas ejecutadas por ``cursor_context()`` (número y tiempo).
+- ``charts``: construcción de figuras en ``charts_service`` (pandas/Plotly).
+- ``plotly``: serialización de figuras a HTML/JSON.
+- ``render``: plantillas Jinja (``render_template``).
+- ``total``: la petición completa.
+
+Los tiempos son exclusivos: el tiempo de ``charts`` no incluye las consultas
+ni la serialización que se hacen dentro, así que las partes suman (como
+mucho) el total.
+
+Las consultas se identifican por el helper de ``app.queries`` que generó el
+SQL (``NamedSQL``). Otros módulos pueden suscribirse a cada consulta con
+``add_query_listener`` y a cada función decorada con ``@timed`` con
+``add_span_listener`` (p.ej. ``app.metrics``).
+
+Desactivada (y sin listeners) no se envuelve el cursor ni se registra ningún
+hook: el coste es una comprobación de un booleano.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import g, has_request_context, request, template_rendered, before_render_template
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Firma: listener(nombre, sql, params, duración en segundos, excepción o None)
+QueryListener = Callable[[str, str, Any, float, Optional[BaseException]], None]
+
+# Firma: listener(métrica, nombre de la función, duración en segundos)
+SpanListener = Callable[[str, str, float], None]
+
+_query_listeners: List[QueryListener] = []
+_span_listeners: List[SpanListener] = []
+_listeners_lock = threading.Lock()
+_timing_enabled = False
+
+# Orden de las métricas en la cabecera y en el log
+METRICS = ("db", "charts", "plotly", "render")
+
+
+class RequestTimings:
+    """
+    Acumulador de tiempos de una petición (vive en ``flask.g``).
+
+    Los tramos se anidan con una pila: al cerrar un tramo se suma a su métrica
+    el tiempo transcurrido menos el de los tramos hijos.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = dict.fromkeys(METRICS, 0.0)
+        self.db_queries = 0
+        self._stack: List[list] = []  # [métrica, inicio, tiempo de hijos]
+
+    def push(self, metric: str) -> None:
+        """Abre un tramo de ``metric``."""
+        self._stack.append([metric, time.perf_counter(), 0.0])
+
+    def pop(self) -> float:
+        """Cierra el último tramo y devuelve su duración total."""
+        metric, started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.durations[metric] = self.durations.get(metric, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        return elapsed
+
+    def total(self) -> float:
+        """Segundos desde el inicio de la petición."""
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """Valor de la cabecera ``Server-Timing`` (duraciones en ms)."""
+        parts = [f'db;dur={self.durations["db"] * 1000:.1f};desc="{self.db_queries} queries"']
+        parts += [f"{metric};dur={self.durations[metric] * 1000:.1f}"
+                  for metric in METRICS[1:]]
+        parts.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Desglose en ms, para el log estructurado."""
+        data = {f"{metric}_ms": round(self.durations[metric] * 1000, 1) for metric in METRICS}
+        data["db_queries"] = self.db_queries
+        data["total_ms"] = round(self.total() * 1000, 1)
+        return data
+
+
+def _current_timings() -> Optional[RequestTimings]:
+    if has_request_context():
+        return g.get("_request_timings")
+    return None
+
+
+def is_active() -> bool:
+    """True si algo necesita cronometrar las consultas (timing o listeners)."""
+    return _timing_enabled or bool(_query_listeners)
+
+
+def add_query_listener(listener: QueryListener) -> None:
+    """Registra una función que recibe cada consulta ejecutada y su duración."""
+    with _listeners_lock:
+        if listener not in _query_listeners:
+            _query_listeners.append(listener)
+
+
+def remove_query_listener(listener: QueryListener) -> None:
+    """Elimina un listener registrado con ``add_query_listener``."""
+    with _listeners_lock:
+        if listener in _query_listeners:
+            _query_listeners.remove(listener)
+
+
+def add_span_listener(listener: SpanListener) -> None:
+    """Registra una función que recibe la duración de cada llamada a una función ``@timed``."""
+    with _listeners_lock:
+        if listener not in _span_listeners:
+            _span_listeners.append(listener)
+
+
+def remove_span_listener(listener: SpanListener) -> None:
+    """Elimina un listener registrado con ``add_span_listener``."""
+    with _listeners_lock:
+        if listener in _span_listeners:
+            _span_listeners.remove(listener)
+
+
+def query_name(sql: Any) -> str:
+    """Nombre del helper ``q_*`` que generó el SQL, o ``raw_<verbo>`` si es SQL suelto."""
+    name = getattr(sql, "query_name", None)
+    if name:
+        return name
+    verb = str(sql).split(None, 1)[0].lower() if str(sql).strip() else "sql"
+    return f"raw_{verb}"
+
+
+@contextmanager
+def span(metric: str):
+    """Cronometra un bloque en la métrica ``metric`` de la petición en curso."""
+    timings = _current_timings() if _timing_enabled else None
+    if timings is None:
+        yield
+        return
+    timings.push(metric)
+    try:
+        yield
+    finally:
+        timings.pop()
+
+
+def timed(metric: str) -> Callable:
+    """
+    Decorador equivalente a ``span(metric)`` sobre toda la función.
+
+    Además notifica la duración (inclusiva) de cada llamada a los listeners
+    de ``add_span_listener``.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _timing_enabled and not _span_listeners:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                with span(metric):
+                    return func(*args, **kwargs)
+            finally:
+                if _span_listeners:
+                    _notify_span(metric, name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _notify_span(metric: str, name: str, duration: float) -> None:
+    for listener in list(_span_listeners):
+        try:
+            listener(metric, name, duration)
+        except Exception as e:  # Un listener roto no debe tumbar la llamada
+            logger.error(f"Error en listener de tramos {listener!r}: {e}")
+
+
+def _record_query(sql: Any, params: Any, duration: float,
+                  error: Optional[BaseException]) -> None:
+    name = query_name(sql)
+    for listener in list(_query_listeners):
+        try:
+            listener(name, sql, params, duration, error)
+        except Exception as e:  # Un listener roto no debe tumbar la consulta
+            logger.error(f"Error en listener de consultas {listener!r}: {e}")
+
+
+class InstrumentedCursor:
+    """
+    Envoltorio de un cursor de pymysql que cronometra ``execute``/``executemany``.
+
+    El resto de atributos (``fetchall``, ``rowcount``, ``lastrowid``...) se delegan.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed_call(self, method: str, sql, params):
+        timings = _current_timings()
+        if timings is not None:
+            timings.push("db")
+        started = time.perf_counter()
+        error = None
+        try:
+            return getattr(self._cursor, method)(sql, params)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            if timings is not None:
+                timings.pop()
+                timings.db_queries += 1
+            if _query_listeners:
+                _record_query(sql, params, duration, error)
+
+    def execute(self, query, args=None):
+        return self._timed_call("execute", query, args)
+
+    def executemany(self, query, args):
+        return self._timed_call("executemany", query, args)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def instrument_cursor(cursor):
+    """Devuelve el cursor envuelto si la instrumentación está activa; si no, tal cual."""
+    if is_active():
+        return InstrumentedCursor(cursor)
+    return cursor
+
+
+def _on_before_render(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None:
+        timings.push("render")
+
+
+def _on_template_rendered(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None and timings._stack and timings._stack[-1][0] == "render":
+        timings.pop()
+
+
+def init_instrumentation(app) -> None:
+    """
+    Registra los hooks de instrumentación si ``SERVER_TIMING_ENABLED`` está activo.
+
+    Añade la cabecera ``Server-Timing`` a cada respuesta y escribe una línea de
+    log ``request_timing`` con el desglose (también en ``extra['timing']``).
+    """
+    global _timing_enabled
+    if not app.config.get("SERVER_TIMING_ENABLED"):
+        return
+    _timing_enabled = True
+
+    before_render_template.connect(_on_before_render, app)
+    template_rendered.connect(_on_template_rendered, app)
+
+    @app.before_request
+    def _start_request_timings():
+        g._request_timings = RequestTimings()
+
+    @app.after_request
+    def _emit_request_timings(response):
+        timings = g.pop("_request_timings", None)
+        if timings is None:
+            return response
+        response.headers["Server-Timing"] = timings.header()
+        data = timings.as_dict()
+        fields = " ".join(f"{key}={value}" for key, value in data.items())
+        logger.info(
+            f"request_timing method={request.method} path={request.path} "
+            f"endpoint={request.endpoint} status={response.status_code} {fields}",
+            extra={"timing": dict(data, method=request.method, path=request.path,
+                                  endpoint=request.endpoint, status=response.status_code)})
+        return response
@@ -0,0 +1,52 @@
+"""
+Importación diferida de dependencias pesadas (pandas, Plotly, numpy).
+
+Importar pandas + Plotly cuesta del orden de medio segundo. Solo se
+necesitan para generar gráficos, así que los módulos que los usan los
+declaran con ``lazy_import`` y el coste se paga en el primer uso, no al
+importar ``app`` (``create_app()``, scripts de CLI, arranque del ejecutable):
+
+    pd = lazy_import("pandas")
+    ...
+    df = pd.DataFrame(rows)  # Aquí se importa pandas (solo la primera vez)
+
+Los módulos que lo usan llevan ``from __future__ import annotations`` para
+que anotaciones como ``-> pd.DataFrame`` no se evalúen al importar.
+"""
+import importlib
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """Sustituto de un módulo que lo importa en el primer acceso a un atributo."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        # import_module es thread-safe; en una carrera ambos hilos reciben el mismo módulo
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self) -> bool:
+        """True si el módulo ya se ha importado a través de este sustituto."""
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        estado = "cargado" if self._module is not None else "sin cargar"
+        return f"<LazyModule {self._name!r} ({estado})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Devuelve un ``LazyModule`` para ``name`` (p.ej. ``"plotly.graph_objects"``)."""
+    return LazyModule(name)
@@ -1,12 +1,174 @@
 """
 Configuración del sistema de logging para la aplicación.
+
+Fuera de testing, con ``LOG_ASYNC`` (por defecto), los handlers de fichero y
+consola no se ejecutan en el hilo de la petición: ``app.logger`` solo tiene
+un ``QueueHandler`` que encola cada registro y un ``QueueListener`` en
+segundo plano lo escribe. Así la latencia de disco y las pausas de rotación
+no afectan a las peticiones.
+
+- La cola está acotada (``LOG_QUEUE_SIZE``): si se llena, el registro se
+  descarta, se cuenta y el hilo escritor avisa de cuántos se perdieron.
+- ``LOG_FORMAT=json`` escribe una línea JSON por registro, incluidos los
+  campos de ``extra`` (p.ej. ``timing`` o ``slow_query``).
+- Al salir del proceso (``atexit``) se vacía la cola antes de terminar.
 """
+import atexit
+import copy
+import json
 import logging
 import logging.handlers
+import queue
+import threading
+from datetime import datetime
 from pathlib import Path
 import os
+from typing import Optional
 from app.frozen_utils import is_frozen
 
+# Atributos estándar de LogRecord (el resto viene de ``extra``)
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+
+_listener: Optional['_DropReportingListener'] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON (con los campos de ``extra``)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = record.stack_info
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    ``QueueHandler`` que nunca bloquea: con la cola llena descarta el registro
+    y lo cuenta en ``dropped``.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolver mensaje y traza aquí (los argumentos pueden cambiar después),
+        # pero sin aplicar formato: lo hacen los handlers del hilo escritor
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _DropReportingListener(logging.handlers.QueueListener):
+    """``QueueListener`` que avisa de los registros descartados desde el último aviso."""
+
+    def __init__(self, queue_handler: DroppingQueueHandler, *handlers):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self._reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        self.report_dropped()
+        super().handle(record)
+
+    def report_dropped(self) -> None:
+        """Escribe un aviso si se han descartado registros desde el último."""
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported:
+            aviso = logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Cola de logs llena: {dropped - self._reported} registros descartados "
+                       f"({dropped} en total)",
+                'logs_dropped': dropped - self._reported,
+            })
+            self._reported = dropped
+            super().handle(aviso)
+
+    def stop(self) -> None:
+        """Vacía la cola, para el hilo escritor y cierra los handlers."""
+        if self._thread is None:
+            return
+        super().stop()
+        self.report_dropped()
+        for handler in self.handlers:
+            handler.flush()
+
+    def restart_after_fork(self) -> None:
+        """En el hijo de un fork el hilo escritor no existe: relanzarlo con cola nueva."""
+        if self._thread is None:
+            return
+        self._thread = None
+        self.queue_handler._dropped_lock = threading.Lock()
+        self.queue = self.queue_handler.queue = queue.Queue(self.queue.maxsize)
+        self.start()
+
+
+def _restart_listener_after_fork():
+    if _listener is not None:
+        _listener.restart_after_fork()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def get_dropped_count() -> int:
+    """Registros de log descartados por cola llena desde el arranque."""
+    return _listener.queue_handler.dropped if _listener is not None else 0
+
+
+def shutdown_logging() -> None:
+    """Vacía y para el escritor de logs en segundo plano (se llama también al salir)."""
+    global _listener
+    _stop_listener()
+    _listener = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(_stop_listener)
+
+
+def get_logs_dir() -> Path:
+    """
+    Directorio de logs (se crea si no existe).
+
+    En modo frozen, junto al ejecutable; si no, ``logs/`` en el directorio actual.
+    """
+    if is_frozen():
+        logs_dir = Path(os.path.dirname(
+            os.path.abspath(__file__))).parent / 'logs'
+    else:
+        logs_dir = Path('logs')
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    return logs_dir
+
 
 def setup_logging(app):
     """
@@ -23,10 +185,13 @@ def setup_logging(app):
     log_level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO'))
 
     # Configurar formato de logs
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if app.config.get('LOG_FORMAT', 'text') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
 
     # En modo testing, solo usar StreamHandler
     if app.config.get('TESTING', False):
@@ -36,14 +201,7 @@ def setup_logging(app):
         app.logger.setLevel(log_level)
         app.logger.addHandler(console_handler)
     else:
-        # Crear directorio de logs si no existe
-        # En modo frozen, usar el directorio del ejecutable
-        if is_frozen():
-            logs_dir = Path(os.path.dirname(
-                os.path.abspath(__file__))).parent / 'logs'
-        else:
-            logs_dir = Path('logs')
-        logs_dir.mkdir(parents=True, exist_ok=True)
+        logs_dir = get_logs_dir()
 
         # Handler para archivo (con rotación)
         file_handler = logging.handlers.RotatingFileHandler(
@@ -66,8 +224,11 @@ def setup_logging(app):
 
         # Configurar logger de la aplicación
         app.logger.setLevel(log_level)
-        app.logger.addHandler(file_handler)
-        app.logger.addHandler(console_handler)
+        if app.config.get('LOG_ASYNC', True):
+            _start_queue_listener(app, file_handler, console_handler)
+        else:
+            app.logger.addHandler(file_handler)
+            app.logger.addHandler(console_handler)
 
     # Suprimir logs excesivos de werkzeug
     if is_frozen():
@@ -86,6 +247,16 @@ def setup_logging(app):
         f"Sistema de logging inicializado - Nivel: {logging.getLevelName(log_level)}")
 
 
+def _start_queue_listener(app, *handlers: logging.Handler) -> None:
+    """Conecta ``handlers`` a ``app.logger`` a través de una cola y un hilo escritor."""
+    global _listener
+    shutdown_logging()  # Una sola cola por proceso
+    queue_handler = DroppingQueueHandler(queue.Queue(app.config.get('LOG_QUEUE_SIZE', 10000)))
+    _listener = _DropReportingListener(queue_handler, *handlers)
+    _listener.start()
+    app.logger.addHandler(queue_handler)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Obtiene un logger configurado para un módulo específico.
@@ -0,0 +1,201 @@
+"""
+Métricas en formato Prometheus para ``/metrics``.
+
+Se activa con ``METRICS_ENABLED`` y usa ``prometheus_client`` (sin servicios
+externos: Prometheus, o cualquier herramienta compatible, hace scrape de
+``/metrics``). Series:
+
+- ``gastosapp_http_request_duration_seconds{endpoint,method}`` (histograma)
+- ``gastosapp_http_requests_total{endpoint,method,status}``
+- ``gastosapp_http_response_bytes_total{endpoint}``
+- ``gastosapp_db_query_duration_seconds{query}`` (histograma; ``query`` es
+  el helper de ``app.queries``)
+- ``gastosapp_db_query_errors_total{query}``
+- ``gastosapp_chart_duration_seconds{stage,chart}`` (histograma; ``stage`` es
+  ``charts`` o ``plotly``, ver ``app.instrumentation``)
+- ``gastosapp_db_pool_connections{state}`` (``idle`` / ``in_use`` / ``max``)
+
+Varios workers de gunicorn: con ``METRICS_MULTIPROC_DIR`` (o la variable
+``PROMETHEUS_MULTIPROC_DIR``) cada proceso escribe sus valores en ficheros
+de ese directorio y ``/metrics`` los agrega, sirva el worker que sirva la
+petición. El directorio debe vaciarse al arrancar el master y cada worker
+muerto debe marcarse con ``mark_process_dead`` (ver ``gunicorn.conf.py``).
+"""
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+from flask import g, request
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MULTIPROC_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+# Buckets pensados para una app pequeña: consultas de ms, páginas de decenas de ms
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+class _Metrics:
+    """Colectores del proceso (se crean una vez, tras fijar el modo multiproceso)."""
+
+    def __init__(self, prometheus_client):
+        Counter = prometheus_client.Counter
+        Gauge = prometheus_client.Gauge
+        Histogram = prometheus_client.Histogram
+
+        self.request_duration = Histogram(
+            'gastosapp_http_request_duration_seconds',
+            'Duración de las peticiones HTTP por endpoint',
+            ['endpoint', 'method'], buckets=REQUEST_BUCKETS)
+        self.requests = Counter(
+            'gastosapp_http_requests_total',
+            'Peticiones HTTP por endpoint y código de estado',
+            ['endpoint', 'method', 'status'])
+        self.response_bytes = Counter(
+            'gastosapp_http_response_bytes_total',
+            'Bytes de respuesta enviados por endpoint (sin respuestas en streaming)',
+            ['endpoint'])
+        self.query_duration = Histogram(
+            'gastosapp_db_query_duration_seconds',
+            'Duración de las consultas SQL por helper de app.queries',
+            ['query'], buckets=QUERY_BUCKETS)
+        self.query_errors = Counter(
+            'gastosapp_db_query_errors_total',
+            'Consultas SQL que terminaron con error',
+            ['query'])
+        self.chart_duration = Histogram(
+            'gastosapp_chart_duration_seconds',
+            'Tiempo de generación de gráficos (figura o serialización)',
+            ['stage', 'chart'], buckets=REQUEST_BUCKETS)
+        self.pool_connections = Gauge(
+            'gastosapp_db_pool_connections',
+            'Conexiones del pool de MySQL por estado',
+            ['state'], multiprocess_mode='livesum')
+
+    def on_query(self, name, sql, params, duration, error):
+        self.query_duration.labels(query=name).observe(duration)
+        if error is not None:
+            self.query_errors.labels(query=name).inc()
+
+    def on_span(self, metric, name, duration):
+        self.chart_duration.labels(stage=metric, chart=name).observe(duration)
+
+    def update_pool(self):
+        from app.database import get_pool
+
+        try:
+            pool = get_pool()
+        except Exception:
+            return  # Sin configuración de BD todavía (p.ej. /setup)
+        if pool is None:
+            return
+        stats = pool.stats()
+        self.pool_connections.labels(state='idle').set(stats['idle'])
+        self.pool_connections.labels(state='in_use').set(stats['in_use'])
+        self.pool_connections.labels(state='max').set(stats['max_size'])
+
+
+def _import_prometheus(multiproc_dir: str):
+    """Importa prometheus_client después de fijar el directorio multiproceso."""
+    if multiproc_dir and not os.environ.get(MULTIPROC_ENV):
+        os.makedirs(multiproc_dir, exist_ok=True)
+        os.environ[MULTIPROC_ENV] = multiproc_dir
+    try:
+        import prometheus_client
+    except ImportError:
+        return None
+    return prometheus_client
+
+
+def get_metrics() -> Optional[_Metrics]:
+    """Devuelve los colectores del proceso, o None si las métricas no están activas."""
+    return _metrics
+
+
+def init_metrics(app) -> None:
+    """
+    Activa las métricas si ``METRICS_ENABLED`` está activo.
+
+    Registra los hooks de petición y los listeners de consultas/gráficos.
+    Si ``prometheus_client`` no está instalado, avisa y sigue sin métricas.
+    """
+    global _metrics
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                prometheus_client = _import_prometheus(app.config.get('METRICS_MULTIPROC_DIR', ''))
+                if prometheus_client is None:
+                    app.logger.warning(
+                        "METRICS_ENABLED activo pero prometheus_client no está instalado; "
+                        "/metrics deshabilitado")
+                    return
+                _metrics = _Metrics(prometheus_client)
+
+                from app.instrumentation import add_query_listener, add_span_listener
+                add_query_listener(_metrics.on_query)
+                add_span_listener(_metrics.on_span)
+
+    metrics = _metrics
+
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        if started is None or request.endpoint == 'main.metrics':
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        metrics.request_duration.labels(endpoint=endpoint, method=request.method).observe(
+            time.perf_counter() - started)
+        metrics.requests.labels(endpoint=endpoint, method=request.method,
+                                status=str(response.status_code)).inc()
+        if not response.is_streamed:
+            metrics.response_bytes.labels(endpoint=endpoint).inc(
+                response.calculate_content_length() or 0)
+        metrics.update_pool()
+        return response
+
+
+def render_latest() -> Optional[Tuple[bytes, str]]:
+    """
+    Genera la exposición de texto de las métricas.
+
+    Returns:
+        (cuerpo, content-type), o None si las métricas no están activas.
+    """
+    if _metrics is None:
+        return None
+    import prometheus_client
+
+    if os.environ.get(MULTIPROC_ENV):
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        _metrics.update_pool()
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Limpia los ficheros de un worker muerto (hook ``child_exit`` de gunicorn)."""
+    if not os.environ.get(MULTIPROC_ENV):
+        return
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(pid)
@@ -0,0 +1,270 @@
+"""
+Runner de migraciones en proceso con registro en ``schema_migrations``.
+
+Cada fichero ``scripts/migrations/NNN_descripcion.py`` define ``up(cursor)``.
+El runner (``scripts/migrate.py``):
+
+- Abre una sola conexión y la comparte entre todas las migraciones.
+- Lee la tabla ``schema_migrations`` (versión, nombre, checksum SHA-256 del
+  fichero, fecha y duración) y salta las ya aplicadas sin importarlas.
+- Aplica las pendientes en orden y registra cada una al terminar.
+- Avisa si una migración aplicada ha cambiado después (checksum distinto).
+- Al terminar, si el esquema tiene todas las columnas esperadas, actualiza
+  ``schema_version`` para que el arranque use el camino rápido.
+
+Las migraciones deben seguir siendo idempotentes (comprobar antes de
+cambiar): en una BD migrada con el runner antiguo la primera ejecución las
+vuelve a recorrer y solo las registra.
+
+Para no bloquear la app en tablas grandes, los índices se crean con
+``add_index_online`` (``ALGORITHM=INPLACE, LOCK=NONE``: lecturas y escrituras
+siguen durante la construcción) y las columnas con ``add_column_online``
+(``ALGORITHM=INSTANT`` si se puede). La sesión del runner usa un
+``lock_wait_timeout`` corto para no dejar a la app esperando tras un
+bloqueo de metadatos.
+"""
+import hashlib
+import importlib.util
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pymysql
+
+from app.database import missing_schema_columns, write_schema_version
+
+LEDGER_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at DATETIME NOT NULL,
+        duration_ms INT NOT NULL
+    )
+"""
+
+# Errores de MySQL cuando el ALTER no admite el algoritmo o el bloqueo pedido
+_ER_ALTER_OPERATION_NOT_SUPPORTED = 1845
+_ER_ALTER_OPERATION_NOT_SUPPORTED_REASON = 1846
+_ONLINE_NOT_SUPPORTED = (_ER_ALTER_OPERATION_NOT_SUPPORTED, _ER_ALTER_OPERATION_NOT_SUPPORTED_REASON)
+
+
+@dataclass
+class Migration:
+    """Fichero de migración descubierto en disco."""
+    version: int
+    name: str
+    path: Path
+    checksum: str
+
+    def load_up(self) -> Callable:
+        """Importa el fichero y devuelve su función ``up(cursor)``."""
+        spec = importlib.util.spec_from_file_location(f"migration_{self.path.stem}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        up = getattr(module, "up", None)
+        if not callable(up):
+            raise ValueError(f"{self.path.name} no define up(cursor)")
+        return up
+
+
+def file_checksum(path: Path) -> str:
+    """SHA-256 del contenido del fichero."""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def discover_migrations(migrations_dir: Path) -> List[Migration]:
+    """Ficheros ``NNN_*.py`` ordenados por número."""
+    if not migrations_dir.exists():
+        return []
+    migraciones = []
+    for path in migrations_dir.glob("*.py"):
+        numero, _, resto = path.stem.partition("_")
+        if numero.isdigit() and resto:
+            migraciones.append(Migration(int(numero), path.stem, path, file_checksum(path)))
+    return sorted(migraciones, key=lambda m: m.version)
+
+
+def applied_migrations(cursor) -> Dict[int, Dict]:
+    """Filas de ``schema_migrations`` por versión (vacío si la tabla no existe)."""
+    cursor.execute(
+        "SELECT COUNT(*) AS n FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'schema_migrations'")
+    if not cursor.fetchone()["n"]:
+        return {}
+    cursor.execute("SELECT version, name, checksum, applied_at, duration_ms FROM schema_migrations")
+    return {row["version"]: row for row in cursor.fetchall()}
+
+
+def plan(cursor, migrations: List[Migration]) -> Tuple[List[Migration], List[Migration]]:
+    """
+    Returns:
+        (pendientes, aplicadas cuyo fichero ha cambiado desde entonces).
+    """
+    aplicadas = applied_migrations(cursor)
+    pendientes = [m for m in migrations if m.version not in aplicadas]
+    cambiadas = [m for m in migrations
+                 if m.version in aplicadas and aplicadas[m.version]["checksum"] != m.checksum]
+    return pendientes, cambiadas
+
+
+def apply_migration(conn, migration: Migration) -> float:
+    """
+    Ejecuta ``up(cursor)`` y registra la migración en ``schema_migrations``.
+
+    Returns:
+        Duración en segundos.
+    """
+    up = migration.load_up()
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        try:
+            up(cursor)
+        except Exception:
+            conn.rollback()
+            raise
+        duration = time.perf_counter() - started
+        cursor.execute(LEDGER_TABLE)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum, applied_at, duration_ms) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            (migration.version, migration.name, migration.checksum,
+             datetime.now().replace(microsecond=0), int(duration * 1000)))
+    conn.commit()
+    return duration
+
+
+def run_migrations(conn, migrations: List[Migration], dry_run: bool = False,
+                   lock_wait_timeout: Optional[int] = 30,
+                   log: Callable[[str], None] = print) -> Dict[str, List[str]]:
+    """
+    Aplica las migraciones pendientes sobre ``conn`` (DictCursor).
+
+    Args:
+        conn: Conexión compartida por todas las migraciones.
+        migrations: Resultado de ``discover_migrations``.
+        dry_run: Solo informar de lo que se aplicaría.
+        lock_wait_timeout: Segundos máximos esperando un bloqueo de metadatos
+            (None = valor del servidor).
+        log: Función de salida.
+
+    Returns:
+        ``applied``, ``skipped`` y ``changed`` (nombres de migración).
+    """
+    with conn.cursor() as cursor:
+        if lock_wait_timeout:
+            cursor.execute("SET SESSION lock_wait_timeout = %s", (lock_wait_timeout,))
+        pendientes, cambiadas = plan(cursor, migrations)
+
+    for migration in cambiadas:
+        log(f"⚠️  {migration.name} ha cambiado desde que se aplicó (checksum distinto); "
+            "no se vuelve a ejecutar")
+    pendientes_ids = {m.version for m in pendientes}
+    saltadas = [m.name for m in migrations if m.version not in pendientes_ids]
+    for nombre in saltadas:
+        log(f"  [OK] {nombre} (ya aplicada)")
+
+    aplicadas = []
+    for migration in pendientes:
+        if dry_run:
+            log(f"  [DRY-RUN] Se aplicaría {migration.name}")
+            continue
+        log(f"  ▶ {migration.name}")
+        duration = apply_migration(conn, migration)
+        aplicadas.append(migration.name)
+        log(f"  [APPLIED] {migration.name} ({duration * 1000:.0f} ms)")
+
+    if not dry_run:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT DATABASE() AS db")
+            faltan = missing_schema_columns(cursor, cursor.fetchone()["db"])
+            if faltan:
+                log(f"⚠️  Faltan columnas tras migrar: {', '.join(faltan)}")
+            else:
+                write_schema_version(cursor)
+        conn.commit()
+    return {"applied": aplicadas, "skipped": saltadas, "changed": [m.name for m in cambiadas]}
+
+
+# ---------------------------------------------------------------------------
+# Helpers para las migraciones (operan sobre la BD de la conexión)
+# ---------------------------------------------------------------------------
+
+def column_exists(cursor, table: str, column: str) -> bool:
+    """True si ``table.column`` existe en la BD actual."""
+    cursor.execute(
+        "SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s LIMIT 1",
+        (table, column))
+    return cursor.fetchone() is not None
+
+
+def index_exists(cursor, table: str, index_name: str) -> bool:
+    """True si el índice ``index_name`` existe en ``table``."""
+    cursor.execute(
+        "SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+        (table, index_name))
+    return cursor.fetchone() is not None
+
+
+def _alter_online(cursor, alter_sql: str, algorithms: Tuple[str, ...]) -> str:
+    """
+    Ejecuta ``alter_sql`` probando cada cláusula de ``algorithms`` en orden.
+
+    Si el servidor no admite ninguna, lo ejecuta sin cláusula (puede bloquear
+    escrituras) y avisa.
+
+    Returns:
+        La cláusula usada ('' si ninguna).
+    """
+    for clausula in algorithms:
+        try:
+            cursor.execute(f"{alter_sql}, {clausula}")
+            return clausula
+        except pymysql.err.MySQLError as e:
+            if not (e.args and e.args[0] in _ONLINE_NOT_SUPPORTED):
+                raise
+    print(f"[WARN] El servidor no admite DDL online para: {alter_sql.strip()}; "
+          "se ejecuta con bloqueo")
+    cursor.execute(alter_sql)
+    return ""
+
+
+def add_index_online(cursor, table: str, index_name: str, columns: str) -> bool:
+    """
+    Crea un índice sin bloquear la tabla (``ALGORITHM=INPLACE, LOCK=NONE``).
+
+    Args:
+        columns: Columnas del índice, p.ej. ``"categoria, periodo"``.
+
+    Returns:
+        True si se creó; False si ya existía.
+    """
+    if index_exists(cursor, table, index_name):
+        print(f"[OK] Indice ya existe: {index_name}")
+        return False
+    _alter_online(cursor, f"ALTER TABLE {table} ADD INDEX {index_name} ({columns})",
+                  ("ALGORITHM=INPLACE, LOCK=NONE",))
+    print(f"[CREATED] Indice creado: {index_name}")
+    return True
+
+
+def add_column_online(cursor, table: str, column: str, definition: str) -> bool:
+    """
+    Añade una columna con el DDL menos bloqueante que admita el servidor
+    (``INSTANT``, luego ``INPLACE, LOCK=NONE``). Las columnas generadas
+    STORED reescriben la tabla y acaban sin cláusula.
+
+    Returns:
+        True si se añadió; False si ya existía.
+    """
+    if column_exists(cursor, table, column):
+        print(f"[OK] Columna ya existe: {table}.{column}")
+        return False
+    _alter_online(cursor, f"ALTER TABLE {table} ADD COLUMN {column} {definition}",
+                  ("ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE"))
+    print(f"[CREATED] Columna creada: {table}.{column}")
+    return True
@@ -0,0 +1,270 @@
+"""
+Pool de conexiones a MySQL acotado y thread-safe.
+
+Evita el handshake TCP + autenticación de ``pymysql.connect`` en cada
+``cursor_context()`` reutilizando conexiones ya abiertas.
+
+Características:
+- Tamaño mínimo/máximo configurable (las peticiones esperan hasta ``timeout``
+  si el pool está lleno).
+- Ping en el checkout: las conexiones caídas se descartan y se reemplazan.
+- Expulsión de conexiones ociosas (``idle_timeout``) respetando ``min_size``.
+- Vida máxima por conexión (``max_lifetime``) para reciclar sockets antiguos.
+- Seguro frente a ``fork()`` (workers de gunicorn): el proceso hijo abandona
+  las conexiones heredadas sin cerrarlas y abre las suyas propias.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .exceptions import DatabaseError
+
+
+class _PoolEntry:
+    """Conexión física gestionada por el pool junto con sus marcas de tiempo."""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Envoltorio de una conexión del pool.
+
+    Delega todos los atributos en la conexión pymysql subyacente salvo
+    ``close()``, que devuelve la conexión al pool en lugar de cerrarla.
+    Así ``connection_context()`` y ``cursor_context()`` mantienen su contrato.
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry: Optional[_PoolEntry] = entry
+
+    @property
+    def raw(self) -> Any:
+        """Conexión pymysql real (None si ya se devolvió al pool)."""
+        return self._entry.conn if self._entry else None
+
+    def close(self) -> None:
+        """Devuelve la conexión al pool. Llamadas repetidas no tienen efecto."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def discard(self) -> None:
+        """Cierra la conexión física y la saca del pool (p.ej. si quedó corrupta)."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry, discard=True)
+
+    def __getattr__(self, name: str) -> Any:
+        entry = self.__dict__.get("_entry")
+        if entry is None:
+            raise DatabaseError("La conexión ya fue devuelta al pool")
+        return getattr(entry.conn, name)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones.
+
+    Args:
+        connect: Función sin argumentos que abre una conexión nueva.
+        min_size: Conexiones ociosas que nunca se expulsan por inactividad.
+        max_size: Máximo de conexiones abiertas (ociosas + en uso).
+        timeout: Segundos de espera máxima cuando el pool está lleno.
+        idle_timeout: Segundos tras los que una conexión ociosa se cierra.
+        max_lifetime: Segundos de vida máxima de una conexión física.
+        ping: Si True, hace ``ping`` en cada checkout antes de entregarla.
+    """
+
+    def __init__(self,
+                 connect: Callable[[], Any],
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 timeout: float = 5.0,
+                 idle_timeout: float = 300.0,
+                 max_lifetime: float = 3600.0,
+                 ping: bool = True):
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size debe estar entre 0 y max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping = ping
+
+        self._cond = threading.Condition()
+        self._idle: Deque[_PoolEntry] = deque()
+        self._in_use = 0
+        self._pid = os.getpid()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def acquire(self) -> PooledConnection:
+        """
+        Obtiene una conexión del pool, abriendo una nueva si hace falta.
+
+        Raises:
+            DatabaseError: Si el pool está agotado durante más de ``timeout``.
+            pymysql.Error: Si falla la apertura de una conexión nueva.
+        """
+        self._check_fork()
+        deadline = time.monotonic() + self.timeout
+        expired: List[_PoolEntry] = []
+        entry: Optional[_PoolEntry] = None
+
+        with self._cond:
+            while True:
+                expired.extend(self._evict_locked(time.monotonic()))
+                if self._idle:
+                    # LIFO: la conexión usada más recientemente está "caliente"
+                    entry = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use + len(self._idle) < self.max_size:
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DatabaseError(
+                        f"Pool de conexiones agotado ({self.max_size} en uso) "
+                        f"tras esperar {self.timeout}s")
+                self._cond.wait(remaining)
+
+        for old in expired:
+            self._close_quietly(old)
+
+        try:
+            if entry is not None and not self._is_usable(entry):
+                self._close_quietly(entry)
+                entry = None
+            if entry is None:
+                entry = _PoolEntry(self._connect())
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, entry)
+
+    def release(self, entry: _PoolEntry, discard: bool = False) -> None:
+        """Devuelve una conexión al pool (o la cierra si ``discard``)."""
+        if os.getpid() != self._pid:
+            # Conexión heredada de otro proceso: no tocar el socket compartido
+            return
+
+        if not discard:
+            try:
+                # Resetear estado: cerrar cualquier transacción/snapshot abierto
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        if not discard and now - entry.created_at >= self.max_lifetime:
+            discard = True
+
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            if not discard:
+                entry.last_used = now
+                self._idle.append(entry)
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(entry)
+
+    def close_all(self) -> None:
+        """Cierra todas las conexiones ociosas (las prestadas se cierran al devolverse)."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._close_quietly(entry)
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve el estado actual del pool: ``size``, ``idle``, ``in_use`` y ``max_size``."""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": idle + self._in_use,
+                "idle": idle,
+                "in_use": self._in_use,
+                "max_size": self.max_size,
+            }
+
+    def reset_after_fork(self) -> None:
+        """
+        Olvida las conexiones heredadas del proceso padre.
+
+        No se cierran: el socket es compartido con el padre y cerrarlo
+        enviaría COM_QUIT sobre la conexión que él sigue usando.
+        """
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._in_use = 0
+        self._pid = os.getpid()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _check_fork(self) -> None:
+        if os.getpid() != self._pid:
+            self.reset_after_fork()
+
+    def _evict_locked(self, now: float) -> List[_PoolEntry]:
+        """Saca del pool las conexiones ociosas caducadas. Requiere el lock."""
+        evicted: List[_PoolEntry] = []
+        kept: Deque[_PoolEntry] = deque()
+        total = len(self._idle) + self._in_use
+        # Las más antiguas están a la izquierda
+        for entry in self._idle:
+            too_old = now - entry.created_at >= self.max_lifetime
+            too_idle = now - entry.last_used >= self.idle_timeout
+            if too_old or (too_idle and total > self.min_size):
+                evicted.append(entry)
+                total -= 1
+            else:
+                kept.append(entry)
+        self._idle = kept
+        return evicted
+
+    def _is_usable(self, entry: _PoolEntry) -> bool:
+        if time.monotonic() - entry.created_at >= self.max_lifetime:
+            return False
+        if not self.ping:
+            return True
+        try:
+            entry.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(entry: _PoolEntry) -> None:
+        try:
+            entry.conn.close()
+        except Exception:
+            pass  # Ignorar errores al cerrar
@@ -0,0 +1,256 @@
+"""
+Perfilado bajo demanda de peticiones lentas.
+
+Con ``PROFILING_ENABLED`` una petición se perfila si:
+
+- trae la cabecera ``X-Profile`` con el valor de ``PROFILING_TOKEN`` (sin token
+  configurado, nadie puede pedirlo). Solo en cabecera: en la URL el token
+  acabaría en los logs de acceso, de proxies y en el historial del navegador; o
+- sale elegida al azar según ``PROFILING_SAMPLE_RATE`` (0.0 - 1.0).
+
+Dos perfiladores (``PROFILING_MODE``, o ``X-Profile-Mode`` por petición):
+
+- ``cprofile``: determinista. Guarda las estadísticas con el grafo de
+  llamadas (``.prof``, para ``pstats``/snakeviz/gprof2dot).
+- ``sampling``: un hilo muestrea la pila de la petición cada
+  ``PROFILING_INTERVAL_MS``. Coste casi nulo y sin sesgo en funciones
+  pequeñas.
+
+En ambos casos se escribe además un ``.collapsed`` (una pila por línea,
+``raíz;...;hoja muestras``) listo para ``flamegraph.pl`` o speedscope; en
+``cprofile`` sale de un muestreador que corre a la vez (cProfile solo guarda
+un nivel de llamadores). Los ficheros van a ``logs/``, junto a
+``gastos.log``, y se registra un resumen con las funciones más costosas de
+``charts_service``, ``utils_df``, pandas y Plotly.
+
+Solo se perfila una petición a la vez y solo el hilo de la petición (los
+gráficos en paralelo de ``REPORT_PARALLEL_CHARTS`` quedan fuera). En
+respuestas en streaming se mide hasta que la vista devuelve la respuesta.
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import current_app, g, request
+
+from app.logging_config import get_logger, get_logs_dir
+
+logger = get_logger(__name__)
+
+MODES = ("cprofile", "sampling")
+# Fragmentos de ruta de los módulos que interesan en el resumen
+FOCUS_MODULES = ("charts_service", "utils_df", f"{os.sep}pandas{os.sep}", f"{os.sep}plotly{os.sep}")
+TOP_FUNCTIONS = 10
+
+# Una sola petición perfilada a la vez
+_profile_lock = threading.Lock()
+
+
+def _function_label(filename: str, lineno: int, funcname: str) -> str:
+    """``modulo.py:linea(funcion)`` con la ruta recortada al paquete."""
+    if filename.startswith("<") or filename == "~":
+        return funcname  # Built-ins de cProfile: ('~', 0, '<built-in method ...>')
+    partes = Path(filename).parts
+    for ancla in ("site-packages", "app"):
+        if ancla in partes:
+            partes = partes[partes.index(ancla) + (ancla == "site-packages"):]
+            break
+    else:
+        partes = partes[-2:]
+    return f"{'/'.join(partes)}:{lineno}({funcname})"
+
+
+def _is_focus(filename: str) -> bool:
+    return any(fragmento in filename for fragmento in FOCUS_MODULES)
+
+
+class SamplingProfiler:
+    """
+    Muestrea periódicamente la pila de un hilo con ``sys._current_frames()``.
+
+    Args:
+        thread_id: Hilo a muestrear (por defecto, el que llama a ``start``).
+        interval: Segundos entre muestras.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pila = []
+            while frame is not None:
+                code = frame.f_code
+                pila.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(pila))] += 1
+
+    def collapsed(self) -> List[str]:
+        """Líneas ``raíz;...;hoja muestras``."""
+        return [";".join(_function_label(*funcion) for funcion in pila) + f" {cuenta}"
+                for pila, cuenta in self.stacks.most_common()]
+
+    def hot_functions(self, focus: bool = True, limit: int = TOP_FUNCTIONS) -> List[Dict[str, object]]:
+        """Funciones con más muestras (exclusivas e inclusivas), en ms aproximados."""
+        propias: Counter = Counter()
+        totales: Counter = Counter()
+        for pila, cuenta in self.stacks.items():
+            propias[pila[-1]] += cuenta
+            for funcion in set(pila):  # Recursión: contar una vez por muestra
+                if not focus or _is_focus(funcion[0]):
+                    totales[funcion] += cuenta
+        ms = self.interval * 1000
+        return [{"function": _function_label(*funcion),
+                 "self_ms": round(propias.get(funcion, 0) * ms, 1),
+                 "cumulative_ms": round(cuenta * ms, 1)}
+                for funcion, cuenta in totales.most_common(limit)]
+
+
+def _hot_functions_from_stats(stats: pstats.Stats, focus: bool = True,
+                              limit: int = TOP_FUNCTIONS) -> List[Dict[str, object]]:
+    """Funciones con más tiempo acumulado según cProfile."""
+    filas = [(func, datos) for func, datos in stats.stats.items()
+             if not focus or _is_focus(func[0])]
+    filas.sort(key=lambda fila: fila[1][3], reverse=True)
+    return [{"function": _function_label(*func), "calls": nc,
+             "self_ms": round(tt * 1000, 1), "cumulative_ms": round(ct * 1000, 1)}
+            for func, (_, nc, tt, ct, _) in filas[:limit]]
+
+
+def should_profile() -> Optional[str]:
+    """
+    Decide si perfilar la petición actual.
+
+    Returns:
+        El modo a usar, o None si no se perfila.
+    """
+    config = current_app.config
+    token = config.get("PROFILING_TOKEN", "")
+    pedido = request.headers.get("X-Profile")
+    solicitada = bool(token and pedido and hmac.compare_digest(pedido, token))
+    if not solicitada:
+        rate = config.get("PROFILING_SAMPLE_RATE", 0.0)
+        if not rate or random.random() >= rate:
+            return None
+    modo = request.headers.get("X-Profile-Mode") if solicitada else None
+    modo = modo or config.get("PROFILING_MODE", "cprofile")
+    return modo if modo in MODES else "cprofile"
+
+
+def _output_base() -> Path:
+    endpoint = (request.endpoint or "unknown").replace(".", "_")
+    marca = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return get_logs_dir() / f"profile-{marca}-{endpoint}-{os.getpid()}"
+
+
+def _start_profile(modo: str) -> None:
+    if not _profile_lock.acquire(blocking=False):
+        return  # Ya hay otra petición perfilándose
+    sampler = SamplingProfiler(interval=current_app.config.get("PROFILING_INTERVAL_MS", 5) / 1000)
+    sampler.start()
+    profiler = None
+    try:
+        if modo == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except Exception:
+        sampler.stop()
+        _profile_lock.release()
+        raise
+    g._profile = (modo, sampler, profiler, time.perf_counter())
+
+
+def _finish_profile(response=None) -> None:
+    """Para el perfilador de la petición, guarda los ficheros y registra el resumen."""
+    modo, sampler, profiler, started = g.pop("_profile")
+    try:
+        if profiler is not None:
+            profiler.disable()
+        sampler.stop()
+        duracion_ms = (time.perf_counter() - started) * 1000
+    finally:
+        _profile_lock.release()
+
+    base = _output_base()
+    ficheros = [base.with_suffix(".collapsed")]
+    if profiler is not None:
+        stats = pstats.Stats(profiler)
+        ficheros.insert(0, base.with_suffix(".prof"))
+        stats.dump_stats(str(ficheros[0]))
+        hot = _hot_functions_from_stats(stats) or _hot_functions_from_stats(stats, focus=False)
+    else:
+        hot = sampler.hot_functions() or sampler.hot_functions(focus=False)
+    ficheros[-1].write_text("\n".join(sampler.collapsed()) + "\n", encoding="utf-8")
+
+    logger.info(
+        "Perfil de %s %s (%s, %.0f ms): %s", request.method, request.path, modo, duracion_ms,
+        "; ".join(f"{h['function']} {h['cumulative_ms']} ms" for h in hot[:5]),
+        extra={"profile": {"path": request.path, "mode": modo,
+                           "duration_ms": round(duracion_ms, 1),
+                           "files": [f.name for f in ficheros], "hot_functions": hot}})
+    if response is not None:
+        response.headers["X-Profile-File"] = ", ".join(f.name for f in ficheros)
+
+
+def init_profiling(app) -> None:
+    """
+    Registra el perfilado bajo demanda si ``PROFILING_ENABLED`` está activo.
+
+    Sin activar no se registra ningún hook.
+    """
+    if not app.config.get("PROFILING_ENABLED"):
+        return
+    if not app.config.get("PROFILING_TOKEN") and not app.config.get("PROFILING_SAMPLE_RATE"):
+        app.logger.warning("PROFILING_ENABLED sin PROFILING_TOKEN ni PROFILING_SAMPLE_RATE: "
+                           "ninguna petición se perfilará")
+
+    @app.before_request
+    def _start_request_profile():
+        modo = should_profile()
+        if modo is not None:
+            _start_profile(modo)
+
+    @app.after_request
+    def _finish_request_profile(response):
+        if "_profile" in g:
+            try:
+                _finish_profile(response)
+            except OSError as e:
+                logger.warning("No se pudo guardar el perfil: %s", e)
+        return response
+
+    @app.teardown_request
+    def _abort_request_profile(exc):
+        # Quedó pendiente si la vista lanzó una excepción
+        if "_profile" in g:
+            try:
+                _finish_profile()
+            except OSError as e:
+                logger.warning("No se pudo guardar el perfil: %s", e)
@@ -7,26 +7,68 @@ Módulo centralizado de queries SQL.
 Contrato:
 - Cada helper retorna una tupla: (query: str, params: tuple | list)
 - Nunca formatear valores directamente en el SQL (usar placeholders %s)
-- Para ordenar por meses, usamos los fragmentos de app.constants
+- Para ordenar o filtrar rangos de meses, usamos la columna numérica
+  ``periodo`` (AAAAMM, columna generada e indexada; ver migración 004)
+- El SQL devuelto es un ``NamedSQL``: un ``str`` que recuerda el nombre del
+  helper que lo generó, para la instrumentación (ver ``app.instrumentation``)
 """
-from typing import Optional, Tuple, List
+import functools
+from typing import Callable, Optional, Sequence, Tuple, List
 
-from .constants import MESES, SQL_MONTH_FIELD, SQL_MONTH_FIELD_DESC
+from .constants import MESES, SQL_MONTH_FIELD
 
 
 # ==========================
 # Utilidades de composición
 # ==========================
 
+class NamedSQL(str):
+    """SQL (``str`` normal a todos los efectos) etiquetado con el helper que lo generó."""
+
+    __slots__ = ("query_name",)
+
+    def __new__(cls, sql: str, query_name: str):
+        obj = super().__new__(cls, sql)
+        obj.query_name = query_name
+        return obj
+
+
+def named_query(func: Callable) -> Callable:
+    """Decorador: etiqueta el SQL devuelto por un helper ``q_*`` con su nombre."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if isinstance(result, tuple):
+            return (NamedSQL(result[0], func.__name__),) + result[1:]
+        return NamedSQL(result, func.__name__)
+    return wrapper
+
+
 def _month_field_literal() -> str:
     """Devuelve FIELD(mes, 'Enero', ..., 'Diciembre') con literales."""
     return SQL_MONTH_FIELD
 
 
+def periodo(mes: str, anio: int) -> int:
+    """
+    Convierte mes/año al valor de la columna ``periodo`` (AAAAMM).
+
+    Ejemplo:
+        periodo("Octubre", 2025) -> 202510
+    """
+    return int(anio) * 100 + MESES.index(mes) + 1
+
+
+def _periodo_range(meses: Sequence[Tuple[str, int]]) -> Tuple[int, int]:
+    """Devuelve (periodo_desde, periodo_hasta) de una ventana contigua de meses."""
+    return periodo(*meses[0]), periodo(*meses[-1])
+
+
 # ==========================
 # Gastos
 # ==========================
 
+@named_query
 def q_gasto_by_id(gasto_id: int) -> Tuple[str, Tuple[int]]:
     """
     Obtiene un gasto por su ID con información de categoría.
@@ -51,6 +93,25 @@ def q_gasto_by_id(gasto_id: int) -> Tuple[str, Tuple[int]]:
     return sql, (gasto_id,)
 
 
+def _gastos_where(mes: Optional[str] = None,
+                  anio: Optional[int] = None,
+                  categoria: Optional[str] = None) -> Tuple[str, List]:
+    """Construye el WHERE común de los listados de gastos (alias ``g``)."""
+    sql = " WHERE 1=1"
+    params: List = []
+    if mes:
+        sql += " AND g.mes = %s"
+        params.append(mes)
+    if anio:
+        sql += " AND g.anio = %s"
+        params.append(anio)
+    if categoria:
+        sql += " AND g.categoria = %s"
+        params.append(categoria)
+    return sql, params
+
+
+@named_query
 def q_list_gastos(mes: Optional[str] = None,
                   anio: Optional[int] = None,
                   categoria: Optional[str] = None) -> Tuple[str, List]:
@@ -68,7 +129,8 @@ def q_list_gastos(mes: Optional[str] = None,
     Ejemplo:
         sql, params = q_list_gastos(mes="Octubre", anio=2025)
     """
-    sql = """
+    where, params = _gastos_where(mes=mes, anio=anio, categoria=categoria)
+    sql = f"""
         SELECT g.id,
                c.nombre AS categoria,
                g.descripcion,
@@ -77,23 +139,65 @@ def q_list_gastos(mes: Optional[str] = None,
                g.anio
         FROM gastos g
         LEFT JOIN categorias c ON g.categoria = c.nombre
-        WHERE 1=1
+        {where}
+        ORDER BY g.id DESC;
     """
-    params: List = []
-    if mes:
-        sql += " AND g.mes = %s"
-        params.append(mes)
-    if anio:
-        sql += " AND g.anio = %s"
-        params.append(anio)
-    if categoria:
-        sql += " AND g.categoria = %s"
-        params.append(categoria)
+    return sql, params
+
+
+@named_query
+def q_list_gastos_page(limit: int,
+                       offset: int = 0,
+                       mes: Optional[str] = None,
+                       anio: Optional[int] = None,
+                       categoria: Optional[str] = None) -> Tuple[str, List]:
+    """
+    Lista una página de gastos (mismos filtros y orden que ``q_list_gastos``).
+
+    Args:
+        limit: Número máximo de filas de la página.
+        offset: Filas a saltar (``(page - 1) * per_page``).
+        mes, anio, categoria: Filtros opcionales.
 
-    sql += " ORDER BY g.id DESC;"
+    Returns:
+        (sql, params): Query con LIMIT/OFFSET y parámetros.
+    """
+    where, params = _gastos_where(mes=mes, anio=anio, categoria=categoria)
+    sql = f"""
+        SELECT g.id,
+               c.nombre AS categoria,
+               g.descripcion,
+               g.monto,
+               g.mes,
+               g.anio
+        FROM gastos g
+        LEFT JOIN categorias c ON g.categoria = c.nombre
+        {where}
+        ORDER BY g.id DESC
+        LIMIT %s OFFSET %s;
+    """
+    return sql, params + [int(limit), int(offset)]
+
+
+@named_query
+def q_count_gastos(mes: Optional[str] = None,
+                   anio: Optional[int] = None,
+                   categoria: Optional[str] = None) -> Tuple[str, List]:
+    """
+    Cuenta los gastos que cumplen los filtros (para calcular el nº de páginas).
+
+    Sin JOIN: ``categorias.nombre`` es único, así que no altera el recuento
+    y el COUNT se resuelve sobre los índices de ``gastos``.
+
+    Returns:
+        (sql, params): Query con alias ``total`` y parámetros.
+    """
+    where, params = _gastos_where(mes=mes, anio=anio, categoria=categoria)
+    sql = f"SELECT COUNT(*) AS total FROM gastos g{where};"
     return sql, params
 
 
+@named_query
 def q_categoria_nombre_by_id() -> str:
     """
     Obtiene el nombre de una categoría por su ID.
@@ -104,6 +208,7 @@ def q_categoria_nombre_by_id() -> str:
     return "SELECT nombre FROM categorias WHERE id = %s;"
 
 
+@named_query
 def q_insert_gasto() -> str:
     """
     Inserta un nuevo gasto en la base de datos.
@@ -124,6 +229,7 @@ def q_insert_gasto() -> str:
     )
 
 
+@named_query
 def q_update_gasto() -> str:
     """
     Actualiza un gasto existente.
@@ -143,6 +249,7 @@ def q_update_gasto() -> str:
     )
 
 
+@named_query
 def q_delete_gasto() -> str:
     """
     Elimina un gasto por su ID.
@@ -156,6 +263,7 @@ def q_delete_gasto() -> str:
     return "DELETE FROM gastos WHERE id = %s;"
 
 
+@named_query
 def q_total_gastos(mes: Optional[str] = None, anio: Optional[int] = None) -> Tuple[str, List]:
     """
     Calcula el total de gastos con filtros opcionales.
@@ -182,21 +290,31 @@ def q_total_gastos(mes: Optional[str] = None, anio: Optional[int] = None) -> Tup
 # Presupuesto
 # ==========================
 
-def q_presupuesto_vigente() -> str:
-    """Presupuesto vigente hasta un mes/año concreto.
+@named_query
+def q_presupuesto_vigente(mes: str, anio: int) -> Tuple[str, Tuple[int]]:
+    """
+    Presupuesto vigente hasta un mes/año concreto.
+
+    Rango sobre el índice de ``periodo``: el último cambio con periodo <= AAAAMM.
+
+    Args:
+        mes: Mes de referencia.
+        anio: Año de referencia.
 
-    Nota: mantiene los FIELD con literales para ordenación estable.
+    Returns:
+        (sql, params): Query y periodo límite (incluido).
     """
-    return f"""
+    sql = """
         SELECT monto
         FROM presupuesto
-        WHERE (anio < %s)
-           OR (anio = %s AND {SQL_MONTH_FIELD} <= FIELD(%s, '{("', '").join(MESES)}'))
-        ORDER BY anio DESC, {SQL_MONTH_FIELD_DESC}
+        WHERE periodo <= %s
+        ORDER BY periodo DESC
         LIMIT 1;
     """
+    return sql, (periodo(mes, anio),)
 
 
+@named_query
 def q_historial_presupuestos() -> str:
     """
     Obtiene el historial completo de presupuestos ordenado por año y mes.
@@ -204,13 +322,14 @@ def q_historial_presupuestos() -> str:
     Returns:
         SQL SELECT para historial de presupuestos.
     """
-    return f"""
+    return """
         SELECT mes, anio, monto
         FROM presupuesto
-        ORDER BY anio, {SQL_MONTH_FIELD};
+        ORDER BY periodo;
     """
 
 
+@named_query
 def q_presupuesto_exists() -> str:
     """
     Comprueba si existe un presupuesto para un mes/año concreto.
@@ -225,6 +344,7 @@ def q_presupuesto_exists() -> str:
     return "SELECT id FROM presupuesto WHERE mes = %s AND anio = %s;"
 
 
+@named_query
 def q_update_presupuesto() -> str:
     """
     Actualiza el monto de un presupuesto existente.
@@ -240,6 +360,7 @@ def q_update_presupuesto() -> str:
     return "UPDATE presupuesto SET monto = %s WHERE mes = %s AND anio = %s;"
 
 
+@named_query
 def q_insert_presupuesto() -> str:
     """
     Inserta un nuevo presupuesto en la base de datos.
@@ -255,22 +376,60 @@ def q_insert_presupuesto() -> str:
     return "INSERT INTO presupuesto (mes, anio, monto, fecha_cambio) VALUES (%s, %s, %s, NOW());"
 
 
-def q_sum_gastos_hasta_mes() -> str:
+@named_query
+def q_sum_gastos_hasta_mes(mes: str, anio: int) -> Tuple[str, Tuple[int, int]]:
     """
     Suma total de gastos hasta un mes específico en un año.
 
-    Parámetros esperados:
-        - anio (int): Año de referencia.
-        - mes (str): Mes límite (incluido).
+    Args:
+        mes: Mes límite (incluido).
+        anio: Año de referencia.
 
     Returns:
-        SQL SELECT SUM con ordenación de meses.
+        (sql, params): SELECT SUM con rango de periodos Enero..mes del año.
     """
-    return f"""
+    sql = """
         SELECT SUM(monto) AS total_gastos
         FROM gastos
+        WHERE periodo BETWEEN %s AND %s;
+    """
+    return sql, (periodo(MESES[0], anio), periodo(mes, anio))
+
+
+@named_query
+def q_balance_anual() -> str:
+    """
+    Datos del balance de un año completo en una sola consulta.
+
+    Devuelve filas ``(tipo, anio, mes, total)`` de tres tipos:
+    - ``presupuesto`` del último cambio anterior al año (arrastre inicial)
+    - ``presupuesto`` de cada mes del año con cambio registrado
+    - ``gasto``: suma de gastos de cada mes del año
+
+    Parámetros esperados:
+        - anio (int): Año de referencia (repetido 3 veces).
+
+    Returns:
+        SQL SELECT con UNION ALL para calcular el balance de los 12 meses.
+    """
+    return """
+        SELECT 'presupuesto' AS tipo, previo.anio, previo.mes, previo.monto AS total
+        FROM (
+            SELECT anio, mes, monto
+            FROM presupuesto
+            WHERE periodo < %s * 100
+            ORDER BY periodo DESC
+            LIMIT 1
+        ) AS previo
+        UNION ALL
+        SELECT 'presupuesto' AS tipo, anio, mes, monto AS total
+        FROM presupuesto
+        WHERE anio = %s
+        UNION ALL
+        SELECT 'gasto' AS tipo, anio, mes, SUM(monto) AS total
+        FROM gastos
         WHERE anio = %s
-          AND {SQL_MONTH_FIELD} <= FIELD(%s, '{("', '").join(MESES)}');
+        GROUP BY periodo, anio, mes;
     """
 
 
@@ -278,6 +437,7 @@ def q_sum_gastos_hasta_mes() -> str:
 # Categorías
 # ==========================
 
+@named_query
 def q_list_categorias() -> str:
     """
     Lista todas las categorías ordenadas alfabéticamente.
@@ -288,6 +448,7 @@ def q_list_categorias() -> str:
     return "SELECT * FROM categorias ORDER BY nombre ASC;"
 
 
+@named_query
 def q_insert_categoria() -> str:
     """
     Inserta una nueva categoría.
@@ -303,6 +464,7 @@ def q_insert_categoria() -> str:
     return "INSERT INTO categorias (nombre, mostrar_en_graficas, incluir_en_resumen) VALUES (%s, %s, %s);"
 
 
+@named_query
 def q_update_categoria() -> str:
     """
     Actualiza una categoría existente.
@@ -319,6 +481,7 @@ def q_update_categoria() -> str:
     return "UPDATE categorias SET nombre = %s, mostrar_en_graficas = %s, incluir_en_resumen = %s WHERE id = %s;"
 
 
+@named_query
 def q_delete_categoria() -> str:
     """
     Elimina una categoría por su ID.
@@ -336,6 +499,7 @@ def q_delete_categoria() -> str:
 # Consultas para gráficos
 # ==========================
 
+@named_query
 def q_gastos_por_categoria_mes() -> str:
     """
     Agrupa gastos por categoría para un mes/año específico.
@@ -357,6 +521,7 @@ def q_gastos_por_categoria_mes() -> str:
     )
 
 
+@named_query
 def q_gasolina_por_mes() -> str:
     """
     Obtiene gastos de gasolina agregados por mes en un año.
@@ -367,15 +532,16 @@ def q_gasolina_por_mes() -> str:
     Returns:
         SQL SELECT SUM para categoría 'Gasolina' ordenado por mes.
     """
-    return f"""
+    return """
         SELECT mes, SUM(monto) AS total
         FROM gastos
         WHERE categoria = 'Gasolina' AND anio = %s
-        GROUP BY mes
-        ORDER BY {SQL_MONTH_FIELD};
+        GROUP BY periodo, mes
+        ORDER BY periodo;
     """
 
 
+@named_query
 def q_historico_categoria_grouped() -> str:
     """
     Obtiene histórico de gastos de una categoría agrupado por año/mes/descripción.
@@ -386,15 +552,16 @@ def q_historico_categoria_grouped() -> str:
     Returns:
         SQL SELECT con agrupación para gráficos apilados por descripción.
     """
-    return f"""
+    return """
         SELECT anio, mes, categoria, descripcion, SUM(monto) AS total
         FROM gastos
         WHERE categoria = %s
-        GROUP BY anio, mes, categoria, descripcion
-        ORDER BY anio ASC, {SQL_MONTH_FIELD};
+        GROUP BY periodo, anio, mes, categoria, descripcion
+        ORDER BY periodo ASC;
     """
 
 
+@named_query
 def q_gastos_mensuales_aggregates() -> str:
     """
     Obtiene agregados de gastos mensuales para un año.
@@ -412,18 +579,19 @@ def q_gastos_mensuales_aggregates() -> str:
     Uso:
         Para gráficos de comparación presupuestaria.
     """
-    return f"""
+    return """
         SELECT g.mes,
                SUM(CASE WHEN c.incluir_en_resumen = TRUE THEN g.monto ELSE 0 END) as total_incluido_resumen,
                SUM(g.monto) as total_con_todas
         FROM gastos g
         LEFT JOIN categorias c ON g.categoria = c.nombre
         WHERE g.anio = %s
-        GROUP BY g.mes
-        ORDER BY {SQL_MONTH_FIELD};
+        GROUP BY g.periodo, g.mes
+        ORDER BY g.periodo;
     """
 
 
+@named_query
 def q_presupuestos_mensuales_por_anio() -> str:
     """
     Obtiene presupuestos mensuales históricos para un año.
@@ -434,88 +602,134 @@ def q_presupuestos_mensuales_por_anio() -> str:
     Returns:
         SQL SELECT mes/monto de presupuestos ordenado por mes.
     """
-    return f"""
+    return """
         SELECT mes, monto as presupuesto_mensual
         FROM presupuesto
         WHERE anio = %s
-        ORDER BY {SQL_MONTH_FIELD};
+        ORDER BY periodo;
     """
 
 
-def q_gastos_mensuales_last_n_months() -> str:
+@named_query
+def q_gastos_mensuales_last_n_months(meses: Sequence[Tuple[str, int]]) -> Tuple[str, Tuple[int, int]]:
     """
-    Obtiene agregados de gastos mensuales para múltiples meses/años.
+    Obtiene agregados de gastos mensuales para una ventana de meses.
 
-    Parámetros esperados:
-        - pares (mes, anio) mediante IN clause dinámica
+    Args:
+        meses: Ventana contigua de tuplas (mes, anio) en orden cronológico.
 
     Returns:
-        SQL SELECT con agregados por mes y año.
+        (sql, params): SELECT con agregados por mes y año y el rango de periodos.
     """
-    return f"""
+    sql = """
         SELECT g.mes, g.anio,
                SUM(CASE WHEN c.incluir_en_resumen = TRUE THEN g.monto ELSE 0 END) as total_incluido_resumen,
                SUM(g.monto) as total_con_todas
         FROM gastos g
         LEFT JOIN categorias c ON g.categoria = c.nombre
-        WHERE (g.mes, g.anio) IN (PLACEHOLDER)
-        GROUP BY g.mes, g.anio
-        ORDER BY g.anio ASC, {SQL_MONTH_FIELD};
+        WHERE g.periodo BETWEEN %s AND %s
+        GROUP BY g.periodo, g.mes, g.anio
+        ORDER BY g.periodo ASC;
     """
+    return sql, _periodo_range(meses)
 
 
-def q_presupuestos_last_n_months() -> str:
+@named_query
+def q_presupuestos_last_n_months(meses: Sequence[Tuple[str, int]]) -> Tuple[str, Tuple[int, int]]:
     """
-    Obtiene presupuestos para múltiples meses/años.
+    Obtiene presupuestos para una ventana de meses.
 
-    Parámetros esperados:
-        - pares (mes, anio) mediante IN clause dinámica
+    Args:
+        meses: Ventana contigua de tuplas (mes, anio) en orden cronológico.
 
     Returns:
-        SQL SELECT de presupuestos.
+        (sql, params): SELECT de presupuestos y el rango de periodos.
     """
-    return f"""
+    sql = """
         SELECT mes, anio, monto as presupuesto_mensual
         FROM presupuesto
-        WHERE (mes, anio) IN (PLACEHOLDER)
-        ORDER BY anio ASC, {SQL_MONTH_FIELD};
+        WHERE periodo BETWEEN %s AND %s
+        ORDER BY periodo ASC;
     """
+    return sql, _periodo_range(meses)
 
 
-def q_historico_categoria_last_n_months() -> str:
+@named_query
+def q_historico_categoria_last_n_months(categoria: str,
+                                        meses: Sequence[Tuple[str, int]]) -> Tuple[str, Tuple]:
     """
-    Obtiene histórico de gastos de una categoría para múltiples meses/años.
+    Obtiene histórico de gastos de una categoría para una ventana de meses.
 
-    Parámetros esperados:
-        - categoria (str)
-        - pares (mes, anio) mediante IN clause dinámica
+    Usa el índice (categoria, periodo) como rango.
+
+    Args:
+        categoria: Nombre de la categoría.
+        meses: Ventana contigua de tuplas (mes, anio) en orden cronológico.
 
     Returns:
-        SQL SELECT con agrupación para gráficos apilados.
+        (sql, params): SELECT con agrupación para gráficos apilados.
     """
-    return f"""
+    sql = """
         SELECT anio, mes, categoria, descripcion, SUM(monto) AS total
         FROM gastos
-        WHERE categoria = %s AND (mes, anio) IN (PLACEHOLDER)
-        GROUP BY anio, mes, categoria, descripcion
-        ORDER BY anio ASC, {SQL_MONTH_FIELD};
+        WHERE categoria = %s AND periodo BETWEEN %s AND %s
+        GROUP BY periodo, anio, mes, categoria, descripcion
+        ORDER BY periodo ASC;
     """
+    return sql, (categoria,) + _periodo_range(meses)
 
 
-def q_gasolina_last_n_months() -> str:
+@named_query
+def q_report_window(meses: Sequence[Tuple[str, int]]) -> Tuple[str, Tuple[int, int, int, int]]:
     """
-    Obtiene gastos de gasolina para múltiples meses/años.
+    Obtiene en una sola consulta todos los datos de la ventana del reporte.
 
-    Parámetros esperados:
-        - pares (mes, anio) mediante IN clause dinámica
+    Filas ``tipo = 'gasto'``: totales por mes × categoría × descripción, con el
+    flag ``incluir_en_resumen`` de la categoría. De ellas salen la torta del
+    mes, las gráficas de cada categoría (incluida gasolina) y los agregados de
+    la comparación. Filas ``tipo = 'presupuesto'``: los cambios de presupuesto
+    de la ventana (``total`` es el monto). Un solo viaje a MySQL en lugar de
+    dos.
+
+    Args:
+        meses: Ventana contigua de tuplas (mes, anio) en orden cronológico.
 
     Returns:
-        SQL SELECT SUM para categoría 'Gasolina'.
+        (sql, params): SELECT ... UNION ALL ... y el rango de periodos (dos veces).
     """
-    return f"""
+    sql = """
+        SELECT 'gasto' AS tipo, g.periodo, g.anio, g.mes, g.categoria, g.descripcion,
+               COALESCE(MAX(c.incluir_en_resumen), FALSE) AS incluir_en_resumen,
+               SUM(g.monto) AS total
+        FROM gastos g
+        LEFT JOIN categorias c ON g.categoria = c.nombre
+        WHERE g.periodo BETWEEN %s AND %s
+        GROUP BY g.periodo, g.anio, g.mes, g.categoria, g.descripcion
+        UNION ALL
+        SELECT 'presupuesto', periodo, anio, mes, NULL, NULL, NULL, monto
+        FROM presupuesto
+        WHERE periodo BETWEEN %s AND %s
+        ORDER BY tipo, periodo ASC;
+    """
+    return sql, _periodo_range(meses) * 2
+
+
+@named_query
+def q_gasolina_last_n_months(meses: Sequence[Tuple[str, int]]) -> Tuple[str, Tuple[int, int]]:
+    """
+    Obtiene gastos de gasolina para una ventana de meses.
+
+    Args:
+        meses: Ventana contigua de tuplas (mes, anio) en orden cronológico.
+
+    Returns:
+        (sql, params): SELECT SUM para categoría 'Gasolina' y el rango de periodos.
+    """
+    sql = """
         SELECT mes, anio, SUM(monto) AS total
         FROM gastos
-        WHERE categoria = 'Gasolina' AND (mes, anio) IN (PLACEHOLDER)
-        GROUP BY mes, anio
-        ORDER BY anio ASC, {SQL_MONTH_FIELD};
+        WHERE categoria = 'Gasolina' AND periodo BETWEEN %s AND %s
+        GROUP BY periodo, mes, anio
+        ORDER BY periodo ASC;
     """
+    return sql, _periodo_range(meses)
@@ -10,10 +10,13 @@ Todas las rutas están registradas en el blueprint 'main' y se mantiene
 compatibilidad con endpoints legacy mediante LEGACY_ROUTES.
 """
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, jsonify
+from flask import (Blueprint, render_template, request, redirect, url_for, flash,
+                   jsonify, Response, stream_with_context, send_file, abort, current_app)
 import csv
 from io import StringIO
 
+from app.assets import ASSET_MAX_AGE, plotly_js
+from app.metrics import render_latest
 from app.services import gastos_service, presupuesto_service, categorias_service, charts_service
 from app.logging_config import get_logger, print_operation
 from app.exceptions import DatabaseError, ValidationError
@@ -35,6 +38,50 @@ LEGACY_ROUTES = [
 ]
 
 
+@main_bp.app_context_processor
+def inject_asset_urls():
+    """Expone a las plantillas la URL con huella de plotly.js."""
+    def plotly_js_url():
+        return url_for('main.plotly_js_asset', fingerprint=plotly_js()[1])
+    return {'plotly_js_url': plotly_js_url}
+
+
+@main_bp.route('/assets/plotly-<fingerprint>.min.js', methods=['GET'])
+def plotly_js_asset(fingerprint):
+    """
+    Sirve plotly.js (una vez por navegador gracias a la caché de larga duración).
+
+    Args:
+        fingerprint: Huella del contenido incluida en la URL
+
+    Returns:
+        El fichero JavaScript, o 404 si la huella no es la actual
+    """
+    path, current = plotly_js()
+    if fingerprint != current:
+        abort(404)
+    response = send_file(path, mimetype='application/javascript',
+                         max_age=ASSET_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@main_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Métricas en formato de exposición de texto de Prometheus.
+
+    Returns:
+        Las métricas de todos los workers, o 404 si ``METRICS_ENABLED`` está apagado
+    """
+    latest = render_latest()
+    if latest is None:
+        abort(404)
+    body, content_type = latest
+    return Response(body, content_type=content_type)
+
+
 @main_bp.route('/', methods=['GET', 'POST'])
 def index():
     """
@@ -60,9 +107,7 @@ def index():
     mes_actual = request.args.get("mes", meses[datetime.now().month - 1])
     anio_actual = request.args.get("anio", datetime.now().year, type=int)
 
-    # Obtener presupuesto vigente y categorías
-    presupuesto_mensual = presupuesto_service.get_presupuesto_mensual(
-        mes_actual, anio_actual)
+    # Obtener categorías
     categorias = categorias_service.list_categorias()
 
     if request.method == "POST":
@@ -98,9 +143,15 @@ def index():
 
     # Obtener datos del mes actual
     gastos = gastos_service.list_gastos(mes=mes_actual, anio=anio_actual)
-    total_gastos = gastos_service.get_total_gastos(mes_actual, anio_actual)
+    # El total sale de las filas ya leídas: sin una consulta SUM aparte
+    total_gastos = float(sum(gasto['monto'] for gasto in gastos))
+
+    # Presupuesto vigente y acumulado salen del mismo balance anual (1 consulta)
+    balance = presupuesto_service.get_balance_anual(anio_actual)
+    presupuesto_mensual = float(
+        balance['presupuesto_mensual'][meses.index(mes_actual)])
     acumulado_presupuesto = presupuesto_service.calcular_acumulado(
-        mes_actual, anio_actual)
+        mes_actual, anio_actual, balance=balance)
     return render_template(
         "index.html",
         categorias=categorias,
@@ -255,28 +306,19 @@ def ver_gastos():
     if categoria and categoria.strip():
         filtros["categoria"] = categoria
 
-    # Obtener gastos filtrados
-    gastos_completos = gastos_service.list_gastos(**filtros)
-
-    # Paginación
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    total_gastos = len(gastos_completos)
-    # Redondeo hacia arriba
-    total_pages = (total_gastos + per_page - 1) // per_page
-
-    # Calcular índices de slice
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    gastos_pagina = gastos_completos[start_idx:end_idx]
+    # Obtener solo la página pedida (LIMIT/OFFSET + COUNT en MySQL)
+    resultado = gastos_service.list_gastos_page(
+        page=request.args.get('page', 1, type=int),
+        per_page=20,
+        **filtros)
 
     return render_template('gastos.html',
-                           gastos=gastos_pagina,
+                           gastos=resultado['gastos'],
                            categorias=categorias_nombres,
                            filtros=filtros,
-                           page=page,
-                           total_pages=total_pages,
-                           total_gastos=total_gastos)
+                           page=resultado['page'],
+                           total_pages=resultado['total_pages'],
+                           total_gastos=resultado['total'])
 
 
 @main_bp.route('/gastos/descargar', methods=['GET'])
@@ -308,32 +350,39 @@ def descargar_gastos():
     if categoria and categoria.strip():
         filtros["categoria"] = categoria
 
-    # Obtener gastos filtrados
-    gastos = gastos_service.list_gastos(**filtros)
-
-    # Crear CSV en memoria
-    si = StringIO()
-    writer = csv.writer(si)
-
-    # Escribir encabezados
-    writer.writerow(['ID', 'Categoría', 'Descripción',
-                    'Monto (€)', 'Mes', 'Año'])
-
-    # Escribir datos
-    for gasto in gastos:
-        writer.writerow([
-            gasto.get('id', ''),
-            gasto.get('categoria', ''),
-            gasto.get('descripcion', ''),
-            gasto.get('monto', ''),
-            gasto.get('mes', ''),
-            gasto.get('anio', '')
-        ])
-
-    # Crear respuesta
-    output = make_response(si.getvalue())
+    def generar_csv():
+        # Cada bloque de filas se serializa y se envía antes de leer el siguiente
+        si = StringIO()
+        writer = csv.writer(si)
+
+        # Escribir encabezados
+        writer.writerow(['ID', 'Categoría', 'Descripción',
+                        'Monto (€)', 'Mes', 'Año'])
+
+        try:
+            for bloque in gastos_service.iter_gastos(**filtros):
+                for gasto in bloque:
+                    writer.writerow([
+                        gasto.get('id', ''),
+                        gasto.get('categoria', ''),
+                        gasto.get('descripcion', ''),
+                        gasto.get('monto', ''),
+                        gasto.get('mes', ''),
+                        gasto.get('anio', '')
+                    ])
+                yield si.getvalue()
+                si.seek(0)
+                si.truncate(0)
+        except DatabaseError as e:
+            # Las cabeceras ya se enviaron: solo queda registrar y cortar
+            logger.error(f"Error exportando gastos a CSV: {e}")
+            return
+        yield si.getvalue()
+
+    # Respuesta en streaming (sin Content-Length: transferencia chunked)
+    output = Response(stream_with_context(generar_csv()),
+                      content_type="text/csv; charset=utf-8")
     output.headers["Content-Disposition"] = "attachment; filename=gastos.csv"
-    output.headers["Content-type"] = "text/csv; charset=utf-8"
 
     return output
 
@@ -381,35 +430,48 @@ def report():
     gastos_mes = gastos_service.list_gastos(mes=mes_actual, anio=anio_actual)
     total_gastos = float(sum(gasto['monto'] for gasto in gastos_mes))
 
-    # Generar gráficos
-    fig_pie = charts_service.generate_pie_chart(mes_actual, anio_actual)
-
     # Obtener categorías dinámicamente desde la BD
     categorias = categorias_service.list_categorias()
 
     # Generar gráficas solo para categorías con mostrar_en_graficas = TRUE
+    # (default True por si el campo no existe)
+    categorias_graficas = [categoria['nombre'] for categoria in categorias
+                           if categoria.get('mostrar_en_graficas', True)]
+
     # Modo: si se seleccionó fecha, mostrar año completo; si no, últimos 12 meses
-    charts_por_categoria = {}
-    for categoria in categorias:
-        # Default True por si el campo no existe
-        if categoria.get('mostrar_en_graficas', True):
-            nombre_categoria = categoria['nombre']
-            if fecha_seleccionada:
-                # Modo histórico: mostrar año completo
-                charts_por_categoria[nombre_categoria] = charts_service.generate_category_chart(
-                    nombre_categoria, anio_actual, mes_actual)
-            else:
-                # Modo deslizante: últimos 12 meses
-                charts_por_categoria[nombre_categoria] = charts_service.generate_category_chart(
-                    nombre_categoria)
+    periodo_graficas = {'anio': anio_actual,
+                        'mes': mes_actual} if fecha_seleccionada else {}
 
-    # Comparison chart con el mismo criterio
-    if fecha_seleccionada:
-        comparison_data = charts_service.generate_comparison_chart(
-            anio_actual, mes_actual)
+    lazy_charts = current_app.config.get('REPORT_LAZY_CHARTS', True)
+    fig_pie = None
+    charts_por_categoria = {}
+    fig_sin_alquiler = None
+    chart_urls = {}
+
+    if lazy_charts:
+        # Carga diferida: la página solo lleva las URLs de los datos de cada
+        # gráfico; el navegador los pide al hacerse visibles
+        chart_urls = {
+            'pie': url_for('main.chart_data', chart='pie',
+                           mes=mes_actual, anio=anio_actual),
+            'categorias': {
+                nombre: url_for('main.chart_data', chart='categoria',
+                                categoria=nombre, **periodo_graficas)
+                for nombre in categorias_graficas
+            },
+            'comparacion': url_for('main.chart_data', chart='comparacion',
+                                   **periodo_graficas),
+        }
     else:
-        comparison_data = charts_service.generate_comparison_chart()
-    fig_sin_alquiler = comparison_data['chart']
+        # Generar gráficos en el servidor e incrustarlos en el HTML
+        # (una sola carga de datos para todos los gráficos)
+        charts = charts_service.generate_report_charts(
+            mes_actual, anio_actual, categorias_graficas,
+            anio_graficas=periodo_graficas.get('anio'),
+            mes_graficas=periodo_graficas.get('mes'))
+        fig_pie = charts['pie']
+        charts_por_categoria = charts['categorias']
+        fig_sin_alquiler = charts['comparacion']['chart']
 
     # Título dinámico para encabezado de gráficas externas al HTML de Plotly
     titulo_evolucion = "Evolución de Gastos por Categoría (Últimos 12 meses)"
@@ -426,9 +488,49 @@ def report():
                            fig_pie=fig_pie,
                            charts_por_categoria=charts_por_categoria,
                            fig_sin_alquiler=fig_sin_alquiler,
+                           lazy_charts=lazy_charts,
+                           chart_urls=chart_urls,
                            titulo_evolucion=titulo_evolucion)
 
 
+@main_bp.route('/api/charts/<any(pie, categoria, comparacion):chart>', methods=['GET'])
+def chart_data(chart):
+    """
+    Datos de un gráfico del reporte como figura JSON de Plotly.
+
+    Lo usa report.html para dibujar cada gráfico en el navegador cuando
+    entra en pantalla, en lugar de generarlos todos antes de responder.
+
+    Args:
+        chart: 'pie', 'categoria' o 'comparacion'
+
+    Query params:
+        mes (str): Mes (obligatorio para 'pie')
+        anio (int): Año (obligatorio para 'pie'). En el resto, mes + anio
+            muestran el año completo; sin ellos, los últimos 12 meses
+        categoria (str): Categoría (obligatorio para 'categoria')
+
+    Returns:
+        JSON con ``data`` y ``layout``; 204 si no hay datos; 400 si faltan parámetros
+    """
+    mes = request.args.get('mes') or None
+    anio = request.args.get('anio', type=int)
+    categoria = request.args.get('categoria') or None
+
+    if mes is not None and mes not in charts_service.get_months():
+        return jsonify({'error': f'Mes no válido: {mes}'}), 400
+    if (chart == 'pie' or mes or anio) and not (mes and anio):
+        return jsonify({'error': 'Faltan los parámetros mes y anio'}), 400
+    if chart == 'categoria' and not categoria:
+        return jsonify({'error': 'Falta el parámetro categoria'}), 400
+
+    figura = charts_service.get_chart_json(
+        chart, categoria=categoria, anio=anio, mes=mes)
+    if figura is None:
+        return '', 204
+    return Response(figura, mimetype='application/json')
+
+
 @main_bp.route('/config', methods=['GET', 'POST'])
 def config():
     """
@@ -3,6 +3,7 @@ Servicio que maneja la lógica de negocio relacionada con las categorías.
 """
 from typing import List, Dict, Any
 import pymysql
+from app.chart_cache import invalidate as invalidate_charts
 from app.database import cursor_context
 from app.exceptions import DatabaseError, ValidationError
 from app.queries import (
@@ -49,6 +50,7 @@ def add_categoria(nombre: str, mostrar_en_graficas: bool = True, incluir_en_resu
             cursor.execute(q_insert_categoria(),
                            (nombre.strip(), mostrar_en_graficas, incluir_en_resumen))
             conn.commit()
+            invalidate_charts()
             return True
     except DatabaseError:
         raise
@@ -100,6 +102,7 @@ def update_categoria(categoria_id: int, nombre: str, mostrar_en_graficas: bool =
             cursor.execute(q_update_categoria(), (nuevo_nombre,
                            mostrar_en_graficas, incluir_en_resumen, categoria_id))
             conn.commit()
+            invalidate_charts()
             return True
     except DatabaseError:
         raise
@@ -143,6 +146,7 @@ def delete_categoria(categoria_id: int) -> bool:
             # Si no hay gastos asociados, proceder con la eliminación
             cursor.execute(q_delete_categoria(), (categoria_id,))
             conn.commit()
+            invalidate_charts()
             return cursor.rowcount > 0
     except DatabaseError:
         raise
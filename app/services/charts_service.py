@@ -1,18 +1,30 @@
-"""Servicio para generar gráficos y visualizaciones de datos."""
-
-import pandas as pd
-import plotly.graph_objects as go
-from typing import List, Dict, Optional, Any, Tuple
+"""Servicio para generar gráficos y visualizaciones de datos.
+
+pandas, numpy y Plotly se importan en el primer gráfico (``app.lazy_imports``),
+no al importar el módulo.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Dict, Optional, Any, Tuple
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from flask import current_app, has_app_context
 
 from ..database import cursor_context
+from app.chart_cache import cached_chart, uncacheable
+from app.instrumentation import timed
+from app.lazy_imports import lazy_import
+from app.logging_config import get_logger
 from app.constants import MESES
 from app.utils_df import (
     set_month_order,
     ensure_all_months,
     df_from_rows,
     to_plot_html,
+    to_plot_json,
     ffill_by_month_inplace,
 )
 from app.queries import (
@@ -25,9 +37,26 @@ from app.queries import (
     q_presupuestos_last_n_months,
     q_historico_categoria_last_n_months,
     q_gasolina_last_n_months,
+    q_report_window,
 )
 
 
+logger = get_logger(__name__)
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+go = lazy_import("plotly.graph_objects")
+
+# Aviso que sustituye a un gráfico que falló o no terminó a tiempo
+CHART_PLACEHOLDER_HTML = (
+    '<p class="chart-empty" style="text-align: center; color: #666; font-style: italic;">'
+    'No se pudo generar el gráfico.</p>'
+)
+
+_chart_executor: Optional[ThreadPoolExecutor] = None
+_chart_executor_lock = threading.Lock()
+
+
 def get_months() -> List[str]:
     """Devuelve la lista de meses en español (delegado a constants)."""
     return MESES
@@ -54,14 +83,10 @@ def get_last_12_months(mes: str = None, anio: int = None) -> List[Tuple[str, int
 
     # Comportamiento por defecto: últimos 12 meses desde hoy
     today = datetime.now()
-    months_list = []
+    actual = today.year * 12 + today.month - 1  # Meses desde el año 0
 
-    for i in range(11, -1, -1):  # De 11 meses atrás hasta hoy
-        date = today - relativedelta(months=i)
-        mes_nombre = MESES[date.month - 1]  # MESES es 0-indexed
-        months_list.append((mes_nombre, date.year))
-
-    return months_list
+    # De 11 meses atrás hasta hoy
+    return [(MESES[n % 12], n // 12) for n in range(actual - 11, actual + 1)]
 
 
 def format_month_year(mes: str, anio: int) -> str:
@@ -69,29 +94,66 @@ def format_month_year(mes: str, anio: int) -> str:
     return f"{mes} '{str(anio)[-2:]}"
 
 
-def generate_pie_chart(mes: str, anio: int) -> Optional[str]:
-    """Generar gráfico de torta para gastos por categoría."""
+def _window_labels(last_12_months: List[Tuple[str, int]]) -> List[str]:
+    """Etiquetas del eje X de la ventana ('Enero \'25', ...), una por mes."""
+    return [format_month_year(mes, anio) for mes, anio in last_12_months]
+
+
+def _window_index(last_12_months: List[Tuple[str, int]]) -> pd.MultiIndex:
+    """Índice (mes, anio) de la ventana para alinear datos con ``reindex``."""
+    return pd.MultiIndex.from_tuples(last_12_months, names=["mes", "anio"])
+
+
+def _sum_by_month(df: pd.DataFrame, columns: List[str],
+                  last_12_months: List[Tuple[str, int]]) -> pd.DataFrame:
+    """
+    Suma ``columns`` por (mes, anio) y alinea el resultado con la ventana.
+
+    Los meses sin datos quedan a 0 y los que caen fuera de la ventana se
+    descartan. Devuelve un DataFrame de 12 filas en orden cronológico.
+    """
+    if df.empty:
+        return pd.DataFrame(0.0, index=_window_index(last_12_months), columns=columns)
+    sumas = df.astype({c: float for c in columns}).groupby(["mes", "anio"])[columns].sum()
+    return sumas.reindex(_window_index(last_12_months), fill_value=0.0)
+
+
+def build_pie_figure(mes: str, anio: int) -> Optional[go.Figure]:
+    """Construir la figura de torta de gastos por categoría (None si no hay gastos)."""
     with cursor_context() as (_, cursor):
         cursor.execute(q_gastos_por_categoria_mes(), (mes, anio))
         gastos_por_categoria = cursor.fetchall()
 
-        if not gastos_por_categoria:
-            return None
+    return _pie_figure(gastos_por_categoria, mes)
 
-        categorias = [gasto['categoria'] for gasto in gastos_por_categoria]
-        montos = [gasto['total'] for gasto in gastos_por_categoria]
-        fig = go.Figure(
-            data=[go.Pie(labels=categorias, values=montos, sort=False)])
 
-        # Añadir título con el mes actual
-        fig.update_layout(title=f'Distribución de gastos {mes}')
+def _pie_figure(gastos_por_categoria: List[Dict[str, Any]], mes: str) -> Optional[go.Figure]:
+    """Figura de torta a partir de filas {categoria, total}."""
+    if not gastos_por_categoria:
+        return None
 
-    return to_plot_html(fig)
+    categorias = [gasto['categoria'] for gasto in gastos_por_categoria]
+    montos = [gasto['total'] for gasto in gastos_por_categoria]
+    fig = go.Figure(
+        data=[go.Pie(labels=categorias, values=montos, sort=False)])
 
+    # Añadir título con el mes actual
+    fig.update_layout(title=f'Distribución de gastos {mes}')
 
-def generate_gas_chart(anio: int = None, mes: str = None) -> str:
+    return fig
+
+
+@cached_chart('pie')
+@timed('charts')
+def generate_pie_chart(mes: str, anio: int) -> Optional[str]:
+    """Generar gráfico de torta para gastos por categoría."""
+    fig = build_pie_figure(mes, anio)
+    return to_plot_html(fig) if fig is not None else None
+
+
+def build_gas_figure(anio: int = None, mes: str = None) -> go.Figure:
     """
-    Generar gráfico de barras simple para gastos de gasolina.
+    Construir la figura de barras simple para gastos de gasolina.
 
     Args:
         anio: Año a visualizar. Si se proporciona, muestra 12 meses de ese año.
@@ -100,12 +162,8 @@ def generate_gas_chart(anio: int = None, mes: str = None) -> str:
     """
     last_12_months = get_last_12_months(mes, anio)
 
-    # Crear placeholders para la cláusula IN
-    placeholders = ','.join(['(%s, %s)'] * len(last_12_months))
-    query = q_gasolina_last_n_months().replace('PLACEHOLDER', placeholders)
-
-    # Aplanar la lista de tuplas para los parámetros
-    params = [item for month_year in last_12_months for item in month_year]
+    # Rango de periodos de la ventana (usa el índice de periodo)
+    query, params = q_gasolina_last_n_months(last_12_months)
 
     with cursor_context() as (_, cursor):
         cursor.execute(query, params)
@@ -113,23 +171,20 @@ def generate_gas_chart(anio: int = None, mes: str = None) -> str:
 
     # Crear DataFrame con los datos
     df = pd.DataFrame(datos_gasolina, columns=["mes", "anio", "total"])
-    if not df.empty:
-        df["total"] = df["total"].astype(float)
+    return _gas_figure(df, last_12_months, anio)
 
-    # Crear DataFrame completo con todos los meses (rellena 0 si faltan)
-    df_completo = pd.DataFrame(last_12_months, columns=["mes", "anio"])
-    df = df_completo.merge(df, on=["mes", "anio"], how="left")
-    df = df.infer_objects(copy=False)
-    df = df.fillna(0)
 
-    # Formato de mes con año
-    df["mes_formateado"] = df.apply(
-        lambda row: format_month_year(row["mes"], row["anio"]), axis=1)
+def _gas_figure(df: pd.DataFrame, last_12_months: List[Tuple[str, int]],
+                anio: int = None) -> go.Figure:
+    """Figura de gasolina a partir de un DataFrame (mes, anio, total)."""
+    # Totales alineados con los 12 meses (0 si faltan)
+    totales = _sum_by_month(df, ["total"], last_12_months)["total"].to_numpy()
+    etiquetas = _window_labels(last_12_months)
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=df["mes_formateado"],
-        y=df["total"],
+        x=etiquetas,
+        y=totales,
         name="Gasolina",
         marker_color="#3498db",
         hovertemplate="%{y:.2f}€<extra></extra>"
@@ -148,12 +203,26 @@ def generate_gas_chart(anio: int = None, mes: str = None) -> str:
         showlegend=False
     )
 
-    return to_plot_html(fig)
+    return fig
 
 
-def generate_category_chart(categoria: str, anio: int = None, mes: str = None) -> str:
+@cached_chart('gasolina')
+@timed('charts')
+def generate_gas_chart(anio: int = None, mes: str = None) -> str:
     """
-    Generar gráfico de barras apiladas para una categoría específica.
+    Generar gráfico de barras simple para gastos de gasolina.
+
+    Args:
+        anio: Año a visualizar. Si se proporciona, muestra 12 meses de ese año.
+        mes: Mes de referencia (usado junto con anio).
+             Si no se proporcionan, muestra últimos 12 meses desde hoy.
+    """
+    return to_plot_html(build_gas_figure(anio, mes))
+
+
+def build_category_figure(categoria: str, anio: int = None, mes: str = None) -> go.Figure:
+    """
+    Construir la figura de barras apiladas para una categoría específica.
 
     Args:
         categoria: Nombre de la categoría.
@@ -162,17 +231,13 @@ def generate_category_chart(categoria: str, anio: int = None, mes: str = None) -
              Si no se proporcionan, muestra últimos 12 meses desde hoy.
     """
     if categoria == 'Gasolina':
-        return generate_gas_chart(anio, mes)
+        return build_gas_figure(anio, mes)
 
     last_12_months = get_last_12_months(mes, anio)
 
-    # Crear placeholders para la cláusula IN
-    placeholders = ','.join(['(%s, %s)'] * len(last_12_months))
-    query = q_historico_categoria_last_n_months().replace('PLACEHOLDER', placeholders)
-
-    # Parámetros: categoría + tuplas (mes, anio)
-    params = [categoria] + \
-        [item for month_year in last_12_months for item in month_year]
+    # Parámetros: categoría + rango de periodos de la ventana
+    query, params = q_historico_categoria_last_n_months(
+        categoria, last_12_months)
 
     with cursor_context() as (_, cursor):
         cursor.execute(query, params)
@@ -180,32 +245,19 @@ def generate_category_chart(categoria: str, anio: int = None, mes: str = None) -
 
     df = pd.DataFrame(datos_historico, columns=[
         "anio", "mes", "categoria", "descripcion", "total"])
+    return _category_figure(categoria, df, last_12_months, anio)
 
-    if not df.empty:
-        df["total"] = df["total"].astype(float)
-
-    # Crear un identificador único para cada mes ordenado cronológicamente
-    mes_order_map = {(mes, anio): idx for idx, (mes, anio)
-                     in enumerate(last_12_months)}
-
-    # Si hay datos, agregar el orden
-    if not df.empty:
-        df["orden"] = df.apply(lambda row: mes_order_map.get(
-            (row['mes'], row['anio']), 999), axis=1)
-        df = df.sort_values("orden")
 
-    # Formato coherente: "Enero '25"
-    if not df.empty:
-        df["orden_fecha"] = df.apply(
-            lambda row: format_month_year(row['mes'], row['anio']), axis=1)
+def _category_figure(categoria: str, df: pd.DataFrame,
+                     last_12_months: List[Tuple[str, int]],
+                     anio: int = None) -> go.Figure:
+    """Figura apilada a partir de un DataFrame (anio, mes, categoria, descripcion, total)."""
+    # Formato coherente: "Enero '25", uno por mes de la ventana
+    meses_completos = _window_labels(last_12_months)
 
-    # Crear lista de todos los meses formateados en orden
-    meses_completos = [format_month_year(mes, anio)
-                       for mes, anio in last_12_months]
-
-    # Obtener descripciones únicas que tengan datos
+    # Descripciones con algún importe positivo, en orden alfabético
     orden_descripciones = sorted(
-        df[df['total'] > 0]['descripcion'].unique()) if not df.empty else []
+        df.loc[df['total'].astype(float) > 0, 'descripcion'].unique()) if not df.empty else []
 
     fig = go.Figure()
 
@@ -220,19 +272,19 @@ def generate_category_chart(categoria: str, anio: int = None, mes: str = None) -
             hoverinfo='skip'
         ))
     else:
-        for descripcion in orden_descripciones:
-            df_desc = df[df['descripcion'] == descripcion].copy()
-
-            # Crear DataFrame con todos los meses
-            df_meses_vacios = pd.DataFrame({"orden_fecha": meses_completos})
-            df_desc = pd.merge(df_meses_vacios, df_desc,
-                               on="orden_fecha", how="left")
-            df_desc = df_desc.infer_objects(copy=False)
-            df_desc = df_desc.fillna({"total": 0})
-
+        # Una sola tabla descripción × mes alineada con la ventana (0 si faltan)
+        tabla = (df.astype({'total': float})
+                 .groupby(['descripcion', 'mes', 'anio'])['total'].sum()
+                 .unstack(['mes', 'anio'])
+                 .reindex(index=orden_descripciones,
+                          columns=_window_index(last_12_months))
+                 .fillna(0.0))
+        valores = tabla.to_numpy()
+
+        for descripcion, totales in zip(orden_descripciones, valores):
             fig.add_trace(go.Bar(
-                x=df_desc['orden_fecha'],
-                y=df_desc['total'],
+                x=meses_completos,
+                y=totales,
                 name=descripcion,
                 visible=True,
                 hovertemplate=f"{descripcion}: %{{y:.2f}}€<extra></extra>"
@@ -251,12 +303,27 @@ def generate_category_chart(categoria: str, anio: int = None, mes: str = None) -
         xaxis=dict(type='category', tickangle=-30),
     )
 
-    return to_plot_html(fig)
+    return fig
 
 
-def generate_comparison_chart(anio: int = None, mes: str = None) -> Dict[str, Any]:
+@cached_chart('categoria')
+@timed('charts')
+def generate_category_chart(categoria: str, anio: int = None, mes: str = None) -> str:
+    """
+    Generar gráfico de barras apiladas para una categoría específica.
+
+    Args:
+        categoria: Nombre de la categoría.
+        anio: Año a visualizar. Si se proporciona, muestra 12 meses de ese año.
+        mes: Mes de referencia (usado junto con anio).
+             Si no se proporcionan, muestra últimos 12 meses desde hoy.
     """
-    Generar gráfico de comparación de presupuesto mostrando gastos mensuales vs presupuesto.
+    return to_plot_html(build_category_figure(categoria, anio, mes))
+
+
+def build_comparison_figure(anio: int = None, mes: str = None) -> Tuple[go.Figure, pd.DataFrame]:
+    """
+    Construir la figura de comparación de presupuesto mostrando gastos mensuales vs presupuesto.
 
     Muestra gastos mensuales (solo categorías con incluir_en_resumen=TRUE) con barras codificadas por color
     (rojo si excede presupuesto, verde si está por debajo) y una línea mostrando el saldo presupuestario acumulado.
@@ -271,20 +338,11 @@ def generate_comparison_chart(anio: int = None, mes: str = None) -> Dict[str, An
     """
     last_12_months = get_last_12_months(mes, anio)
 
-    # Crear placeholders para la cláusula IN
-    placeholders = ','.join(['(%s, %s)'] * len(last_12_months))
-
-    # Query para gastos
-    query_gastos = q_gastos_mensuales_last_n_months().replace(
-        'PLACEHOLDER', placeholders)
-    params_gastos = [
-        item for month_year in last_12_months for item in month_year]
-
-    # Query para presupuestos
-    query_presupuestos = q_presupuestos_last_n_months().replace(
-        'PLACEHOLDER', placeholders)
-    params_presupuestos = [
-        item for month_year in last_12_months for item in month_year]
+    # Queries por rango de periodos de la ventana
+    query_gastos, params_gastos = q_gastos_mensuales_last_n_months(
+        last_12_months)
+    query_presupuestos, params_presupuestos = q_presupuestos_last_n_months(
+        last_12_months)
 
     with cursor_context() as (_, cursor):
         # Obtener gastos mensuales (con y sin alquiler)
@@ -295,57 +353,66 @@ def generate_comparison_chart(anio: int = None, mes: str = None) -> Dict[str, An
         cursor.execute(query_presupuestos, params_presupuestos)
         datos_presupuesto = cursor.fetchall()
 
-    # Preparar DataFrame base con todos los meses
-    df_fechas = pd.DataFrame(last_12_months, columns=["mes", "anio"])
-
-    # Preparar datos de gastos
     df_gastos = pd.DataFrame(datos_gastos, columns=[
                              "mes", "anio", "total_incluido_resumen", "total_con_todas"])
-    if not df_gastos.empty:
-        df_gastos["total_incluido_resumen"] = df_gastos["total_incluido_resumen"].astype(
-            float)
-        df_gastos["total_con_todas"] = df_gastos["total_con_todas"].astype(
-            float)
-
-    df = df_fechas.merge(df_gastos, on=["mes", "anio"], how="left")
-    df = df.infer_objects(copy=False)
-    df = df.fillna(0)
-
-    # Añadir presupuestos mensuales
     df_presupuesto = pd.DataFrame(datos_presupuesto, columns=[
                                   "mes", "anio", "presupuesto_mensual"])
-    if not df_presupuesto.empty:
-        df_presupuesto["presupuesto_mensual"] = df_presupuesto["presupuesto_mensual"].astype(
-            float)
-
-    df = df.merge(df_presupuesto, on=["mes", "anio"], how="left")
-
-    # Forward-fill presupuestos (propagar el último presupuesto conocido)
-    df["presupuesto_mensual"] = df["presupuesto_mensual"].infer_objects(
-        copy=False)
-    df["presupuesto_mensual"] = df["presupuesto_mensual"].ffill()
-    df["presupuesto_mensual"] = df["presupuesto_mensual"].fillna(0)
-
-    # Calcular métricas
-    df["excede_presupuesto"] = df["total_con_todas"] > df["presupuesto_mensual"]
-    df["saldo_mensual"] = df["presupuesto_mensual"] - df["total_con_todas"]
-    df["saldo_acumulado"] = df["saldo_mensual"].cumsum()
-
-    # Marcar meses con gastos
-    df["tiene_gastos"] = df["total_con_todas"] > 0
-
-    # Calcular gasto medio acumulado (solo gastos incluidos en resumen, sin alquiler)
-    df["gasto_acumulado_resumen"] = df["total_incluido_resumen"].cumsum()
-    df["num_meses_con_gastos"] = df["tiene_gastos"].cumsum()
-    df["gasto_medio_acumulado"] = df.apply(
-        lambda row: row["gasto_acumulado_resumen"] /
-        row["num_meses_con_gastos"] if row["num_meses_con_gastos"] > 0 else 0,
-        axis=1
-    )
+    return _comparison_figure(df_gastos, df_presupuesto, last_12_months, anio)
+
 
-    # Formato de mes con año
-    df["mes_formateado"] = df.apply(
-        lambda row: format_month_year(row["mes"], row["anio"]), axis=1)
+def _comparison_figure(df_gastos: pd.DataFrame, df_presupuesto: pd.DataFrame,
+                       last_12_months: List[Tuple[str, int]],
+                       anio: int = None) -> Tuple[go.Figure, pd.DataFrame]:
+    """
+    Figura de comparación a partir de los agregados mensuales.
+
+    Args:
+        df_gastos: DataFrame (mes, anio, total_incluido_resumen, total_con_todas).
+        df_presupuesto: DataFrame (mes, anio, presupuesto_mensual).
+    """
+    # Gastos alineados con los 12 meses de la ventana (0 si faltan)
+    columnas_gastos = ["total_incluido_resumen", "total_con_todas"]
+    df = _sum_by_month(df_gastos, columnas_gastos, last_12_months)
+
+    # Presupuestos alineados con la ventana; forward-fill (propagar el
+    # último presupuesto conocido) y 0 antes del primero
+    if df_presupuesto.empty:
+        presupuesto = np.zeros(len(last_12_months))
+    else:
+        presupuesto = (df_presupuesto.astype({"presupuesto_mensual": float})
+                       .groupby(["mes", "anio"])["presupuesto_mensual"].last()
+                       .reindex(_window_index(last_12_months))
+                       .ffill().fillna(0.0).to_numpy())
+
+    total_resumen = df["total_incluido_resumen"].to_numpy()
+    total_todas = df["total_con_todas"].to_numpy()
+
+    # Calcular métricas (operaciones acumuladas de NumPy sobre la ventana)
+    saldo_mensual = presupuesto - total_todas
+    tiene_gastos = total_todas > 0
+    gasto_acumulado_resumen = np.cumsum(total_resumen)
+    num_meses_con_gastos = np.cumsum(tiene_gastos)
+
+    # Gasto medio acumulado (solo gastos incluidos en resumen, sin alquiler)
+    gasto_medio_acumulado = np.divide(
+        gasto_acumulado_resumen, num_meses_con_gastos,
+        out=np.zeros(len(last_12_months)), where=num_meses_con_gastos > 0)
+
+    df = pd.DataFrame({
+        "mes": [mes for mes, _ in last_12_months],
+        "anio": [anio_ for _, anio_ in last_12_months],
+        "total_incluido_resumen": total_resumen,
+        "total_con_todas": total_todas,
+        "presupuesto_mensual": presupuesto,
+        "excede_presupuesto": total_todas > presupuesto,
+        "saldo_mensual": saldo_mensual,
+        "saldo_acumulado": np.cumsum(saldo_mensual),
+        "tiene_gastos": tiene_gastos,
+        "gasto_acumulado_resumen": gasto_acumulado_resumen,
+        "num_meses_con_gastos": num_meses_con_gastos,
+        "gasto_medio_acumulado": gasto_medio_acumulado,
+        "mes_formateado": _window_labels(last_12_months),
+    })
 
     # Crear gráfico
     fig = go.Figure()
@@ -362,7 +429,7 @@ def generate_comparison_chart(anio: int = None, mes: str = None) -> Dict[str, An
     ))
 
     # Línea de saldo presupuestario acumulado - solo para meses con gastos
-    df_con_gastos = df[df["tiene_gastos"]].copy()
+    df_con_gastos = df[tiene_gastos]
     fig.add_trace(go.Scatter(
         x=df_con_gastos["mes_formateado"],
         y=df_con_gastos["saldo_acumulado"],
@@ -397,7 +464,306 @@ def generate_comparison_chart(anio: int = None, mes: str = None) -> Dict[str, An
         barmode="relative"
     )
 
+    return fig, df
+
+
+@cached_chart('comparacion')
+@timed('charts')
+def generate_comparison_chart(anio: int = None, mes: str = None) -> Dict[str, Any]:
+    """
+    Generar gráfico de comparación de presupuesto (HTML embebible + DataFrame).
+
+    Args:
+        anio: Año a visualizar. Si se proporciona, muestra 12 meses de ese año.
+        mes: Mes de referencia (usado junto con anio).
+             Si no se proporcionan, muestra últimos 12 meses desde hoy.
+
+    Returns:
+        Diccionario con ``chart`` (HTML) y ``df_comparacion`` (DataFrame).
+    """
+    fig, df = build_comparison_figure(anio, mes)
     return {
         "chart": to_plot_html(fig),
         "df_comparacion": df
     }
+
+
+def load_report_data(mes: str, anio: int,
+                     anio_graficas: int = None, mes_graficas: str = None) -> Dict[str, Any]:
+    """
+    Carga de una vez todos los datos que necesitan los gráficos de /report.
+
+    Una sola consulta (gastos agrupados de la ventana y presupuestos, con
+    ``UNION ALL``) en lugar de una por gráfico y por categoría: el coste no
+    depende del nº de categorías.
+
+    Args:
+        mes: Mes de la torta (debe caer dentro de la ventana).
+        anio: Año de la torta.
+        anio_graficas: Año completo a mostrar en las gráficas de evolución.
+        mes_graficas: Mes de referencia (junto con anio_graficas). Sin ellos,
+            la ventana son los últimos 12 meses desde hoy.
+
+    Returns:
+        Diccionario con ``meses`` (ventana), ``mes``, ``anio``, ``anio_graficas``,
+        ``gastos`` (DataFrame por mes × categoría × descripción) y
+        ``presupuestos`` (DataFrame mes, anio, presupuesto_mensual).
+    """
+    last_12_months = get_last_12_months(mes_graficas, anio_graficas)
+
+    with cursor_context() as (_, cursor):
+        cursor.execute(*q_report_window(last_12_months))
+        filas = cursor.fetchall()
+
+    datos_gastos = [fila for fila in filas if fila["tipo"] == "gasto"]
+    datos_presupuesto = [{"mes": fila["mes"], "anio": fila["anio"],
+                          "presupuesto_mensual": fila["total"]}
+                         for fila in filas if fila["tipo"] == "presupuesto"]
+    gastos = pd.DataFrame(datos_gastos, columns=[
+        "periodo", "anio", "mes", "categoria", "descripcion",
+        "incluir_en_resumen", "total"])
+    gastos["total"] = gastos["total"].astype(float)
+    gastos["incluir_en_resumen"] = gastos["incluir_en_resumen"].astype(bool)
+
+    return {
+        "meses": last_12_months,
+        "mes": mes,
+        "anio": anio,
+        "anio_graficas": anio_graficas,
+        "gastos": gastos,
+        "presupuestos": pd.DataFrame(datos_presupuesto, columns=[
+            "mes", "anio", "presupuesto_mensual"]),
+    }
+
+
+def _report_figure_tasks(data: Dict[str, Any],
+                         categorias: List[str]) -> List[Tuple[Tuple[str, ...], Callable[[], Any]]]:
+    """
+    Parte los datos del reporte y devuelve una tarea independiente por figura.
+
+    El reparto (groupby) se hace aquí, una vez; cada tarea solo construye su
+    figura, sin tocar la BD ni el contexto de Flask, así que puede ejecutarse
+    en otro hilo.
+
+    Returns:
+        Lista de (clave, tarea): claves ``('pie',)``, ``('categoria', nombre)``
+        y ``('comparacion',)``, en el orden en que se muestran.
+    """
+    gastos = data["gastos"]
+    last_12_months = data["meses"]
+    anio_graficas = data["anio_graficas"]
+
+    # Torta: gastos del mes seleccionado por categoría
+    del_mes = gastos[(gastos["mes"] == data["mes"]) & (gastos["anio"] == data["anio"])]
+    por_categoria_mes = del_mes.groupby("categoria", sort=True)["total"].sum()
+    filas_pie = [{"categoria": categoria, "total": total}
+                 for categoria, total in por_categoria_mes.items()]
+    tareas = [(("pie",), functools.partial(_pie_figure, filas_pie, data["mes"]))]
+
+    # Gráficas de categoría: el DataFrame ya partido por categoría
+    vacio = gastos.iloc[0:0]
+    por_categoria = dict(tuple(gastos.groupby("categoria", sort=False)))
+    for categoria in categorias:
+        df_categoria = por_categoria.get(categoria, vacio)
+        if categoria == 'Gasolina':
+            df_gas = df_categoria.groupby(["mes", "anio"], as_index=False, sort=False)["total"].sum()
+            tarea = functools.partial(_gas_figure, df_gas, last_12_months, anio_graficas)
+        else:
+            tarea = functools.partial(
+                _category_figure, categoria,
+                df_categoria[["anio", "mes", "categoria", "descripcion", "total"]],
+                last_12_months, anio_graficas)
+        tareas.append((("categoria", categoria), tarea))
+
+    # Comparación: agregados mensuales (incluidos en resumen / todos)
+    mensual = gastos.assign(
+        total_incluido_resumen=gastos["total"].where(gastos["incluir_en_resumen"], 0.0))
+    mensual = mensual.groupby(["periodo", "mes", "anio"], as_index=False, sort=True).agg(
+        total_incluido_resumen=("total_incluido_resumen", "sum"),
+        total_con_todas=("total", "sum"))
+    tareas.append((("comparacion",), functools.partial(
+        _comparison_figure,
+        mensual[["mes", "anio", "total_incluido_resumen", "total_con_todas"]],
+        data["presupuestos"].copy(), last_12_months, anio_graficas)))
+
+    return tareas
+
+
+def _collect_report(resultados: Dict[Tuple[str, ...], Any]) -> Dict[str, Any]:
+    """Agrupa los resultados por clave en el formato de ``build_report_figures``."""
+    return {
+        "pie": resultados[("pie",)],
+        "categorias": {clave[1]: valor for clave, valor in resultados.items()
+                       if clave[0] == "categoria"},
+        "comparacion": resultados[("comparacion",)],
+    }
+
+
+def build_report_figures(data: Dict[str, Any], categorias: List[str]) -> Dict[str, Any]:
+    """
+    Construye todas las figuras del reporte a partir de ``load_report_data``.
+
+    Args:
+        data: Resultado de ``load_report_data``.
+        categorias: Categorías (en orden) que llevan gráfica de evolución.
+
+    Returns:
+        Diccionario con ``pie`` (figura o None), ``categorias`` ({nombre: figura})
+        y ``comparacion`` ((figura, DataFrame)).
+    """
+    return _collect_report({clave: tarea()
+                            for clave, tarea in _report_figure_tasks(data, categorias)})
+
+
+def _render_report_task(clave: Tuple[str, ...], tarea: Callable[[], Any]) -> Any:
+    """Construye una figura del reporte y la convierte a HTML embebible."""
+    if clave[0] == "comparacion":
+        fig, df = tarea()
+        return {"chart": to_plot_html(fig), "df_comparacion": df}
+    fig = tarea()
+    return to_plot_html(fig) if fig is not None else None
+
+
+def _chart_placeholder(clave: Tuple[str, ...]) -> Any:
+    """Sustituto de un gráfico que falló o tardó demasiado."""
+    html = CHART_PLACEHOLDER_HTML
+    if clave[0] == "comparacion":
+        return {"chart": html, "df_comparacion": None}
+    return html
+
+
+def _get_chart_executor(workers: int) -> ThreadPoolExecutor:
+    """Pool de hilos compartido del proceso (se crea en el primer uso, tras el fork)."""
+    global _chart_executor
+    if _chart_executor is None:
+        with _chart_executor_lock:
+            if _chart_executor is None:
+                _chart_executor = ThreadPoolExecutor(
+                    max_workers=max(1, workers), thread_name_prefix="charts")
+    return _chart_executor
+
+
+def _render_report_parallel(tareas, workers: int, timeout: float) -> Tuple[Dict, bool]:
+    """
+    Genera las figuras del reporte en el pool de hilos.
+
+    Cada gráfico tiene ``timeout`` segundos desde que un hilo empieza a
+    generarlo (no desde que se encola); si falla o no termina a tiempo se
+    sustituye por un placeholder. Los que siguen en cola esperan como mucho
+    lo que tardarían si todos los anteriores agotaran su timeout
+    (``timeout`` por cada tanda de ``workers`` gráficos).
+
+    Returns:
+        (resultados por clave, completo): ``completo`` es False si algún gráfico
+        se sustituyó por el placeholder.
+    """
+    executor = _get_chart_executor(workers)
+    inicios: Dict[Tuple[str, ...], float] = {}
+
+    def ejecutar(clave, tarea):
+        inicios[clave] = time.monotonic()
+        return _render_report_task(clave, tarea)
+
+    enviado = time.monotonic()
+    pendientes = {clave: executor.submit(ejecutar, clave, tarea) for clave, tarea in tareas}
+    orden = list(pendientes)
+    tandas = -(-len(pendientes) // max(1, workers))
+    limite_cola = enviado + timeout * tandas
+    resultados = {}
+    completo = True
+    while pendientes:
+        ahora = time.monotonic()
+        for clave, futuro in list(pendientes.items()):
+            if futuro.done():
+                del pendientes[clave]
+                try:
+                    resultados[clave] = futuro.result()
+                except Exception as e:
+                    logger.error(f"Error generando el gráfico {clave}: {e}")
+                    resultados[clave] = _chart_placeholder(clave)
+                    completo = False
+                continue
+            inicio = inicios.get(clave)
+            vencido = ahora >= inicio + timeout if inicio is not None else ahora >= limite_cola
+            if vencido:
+                del pendientes[clave]
+                futuro.cancel()
+                if inicio is None:
+                    logger.warning(f"Gráfico {clave} sin empezar tras {timeout * tandas:.0f}s en cola; se omite")
+                else:
+                    logger.warning(f"Gráfico {clave} sin terminar tras {timeout}s; se omite")
+                resultados[clave] = _chart_placeholder(clave)
+                completo = False
+        if pendientes:
+            limites = [inicios[c] + timeout if c in inicios else limite_cola for c in pendientes]
+            wait(pendientes.values(), timeout=max(0.0, min(limites) - time.monotonic()),
+                 return_when=FIRST_COMPLETED)
+    return {clave: resultados[clave] for clave in orden}, completo
+
+
+@cached_chart('reporte')
+@timed('charts')
+def generate_report_charts(mes: str, anio: int, categorias: List[str],
+                           anio_graficas: int = None,
+                           mes_graficas: str = None) -> Dict[str, Any]:
+    """
+    Genera el HTML de todos los gráficos de /report con una sola carga de datos.
+
+    Con ``REPORT_PARALLEL_CHARTS`` las figuras se construyen a la vez en un
+    pool de ``REPORT_CHART_WORKERS`` hilos, con ``REPORT_CHART_TIMEOUT``
+    segundos por gráfico; un gráfico que falla o no termina se sustituye por
+    un aviso en lugar de romper la página (y ese resultado no se cachea).
+
+    Args:
+        mes, anio: Mes de la torta.
+        categorias: Categorías que llevan gráfica de evolución.
+        anio_graficas, mes_graficas: Año completo a mostrar (ver ``load_report_data``).
+
+    Returns:
+        Diccionario con ``pie`` (HTML o None), ``categorias`` ({nombre: HTML})
+        y ``comparacion`` (mismo formato que ``generate_comparison_chart``).
+    """
+    data = load_report_data(mes, anio, anio_graficas, mes_graficas)
+    tareas = _report_figure_tasks(data, categorias)
+
+    config = current_app.config if has_app_context() else {}
+    if not config.get('REPORT_PARALLEL_CHARTS', False):
+        return _collect_report({clave: _render_report_task(clave, tarea)
+                                for clave, tarea in tareas})
+
+    resultados, completo = _render_report_parallel(
+        tareas,
+        workers=config.get('REPORT_CHART_WORKERS', 4),
+        timeout=config.get('REPORT_CHART_TIMEOUT', 10))
+    reporte = _collect_report(resultados)
+    return reporte if completo else uncacheable(reporte)
+
+
+@cached_chart('json')
+@timed('charts')
+def get_chart_json(chart: str, categoria: str = None,
+                   anio: int = None, mes: str = None) -> Optional[str]:
+    """
+    Devuelve la figura de un gráfico del reporte como JSON compacto.
+
+    Args:
+        chart: Tipo de gráfico: ``'pie'``, ``'categoria'`` o ``'comparacion'``.
+        categoria: Nombre de la categoría (solo para ``'categoria'``).
+        anio: Año (obligatorio para ``'pie'``; en el resto activa el modo año completo).
+        mes: Mes (obligatorio para ``'pie'``; en el resto, junto con anio).
+
+    Returns:
+        JSON de la figura, o None si no hay datos que mostrar (torta sin gastos).
+
+    Raises:
+        ValueError: Si el tipo de gráfico no existe.
+    """
+    if chart == 'pie':
+        fig = build_pie_figure(mes, anio)
+    elif chart == 'categoria':
+        fig = build_category_figure(categoria, anio, mes)
+    elif chart == 'comparacion':
+        fig, _ = build_comparison_figure(anio, mes)
+    else:
+        raise ValueError(f"Tipo de gráfico desconocido: {chart}")
+    return to_plot_json(fig) if fig is not None else None
@@ -1,15 +1,18 @@
 """
 Servicio que maneja la lógica de negocio relacionada con los gastos.
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import pymysql
-from app.database import cursor_context
+from app.chart_cache import invalidate as invalidate_charts
+from app.database import cursor_context, streaming_cursor_context
 from app.utils_df import decimal_to_float
 from app.exceptions import DatabaseError, ValidationError
 from app.logging_config import get_logger
 from app.queries import (
     q_gasto_by_id,
     q_list_gastos,
+    q_list_gastos_page,
+    q_count_gastos,
     q_categoria_nombre_by_id,
     q_insert_gasto,
     q_update_gasto,
@@ -62,6 +65,82 @@ def list_gastos(mes: Optional[str] = None,
         return list(cursor.fetchall())
 
 
+def iter_gastos(mes: Optional[str] = None,
+                anio: Optional[int] = None,
+                categoria: Optional[str] = None,
+                chunk_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Recorre los gastos filtrados en bloques, sin cargarlos todos en memoria.
+
+    Usa un cursor sin buffer en el servidor: la memoria ocupada es la de un
+    bloque, independientemente del número de gastos.
+
+    Args:
+        mes: Mes para filtrar los gastos (opcional)
+        anio: Año para filtrar los gastos (opcional)
+        categoria: Categoría para filtrar los gastos (opcional)
+        chunk_size: Filas leídas por cada ``fetchmany``
+
+    Yields:
+        Listas de hasta ``chunk_size`` gastos, en el mismo orden que ``list_gastos``
+    """
+    with streaming_cursor_context() as (_, cursor):
+        query, params = q_list_gastos(mes=mes, anio=anio, categoria=categoria)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def list_gastos_page(page: int = 1,
+                     per_page: int = 20,
+                     mes: Optional[str] = None,
+                     anio: Optional[int] = None,
+                     categoria: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Obtiene una sola página de gastos aplicando filtros opcionales.
+
+    Solo viajan desde MySQL las filas de la página pedida más un COUNT(*)
+    para el total, en lugar de todo el histórico filtrado.
+
+    Args:
+        page: Número de página (empieza en 1; se ajusta al rango válido)
+        per_page: Gastos por página
+        mes: Mes para filtrar los gastos (opcional)
+        anio: Año para filtrar los gastos (opcional)
+        categoria: Categoría para filtrar los gastos (opcional)
+
+    Returns:
+        Diccionario con ``gastos`` (filas de la página), ``total``,
+        ``page`` (ya ajustada) y ``total_pages``
+    """
+    per_page = max(1, int(per_page))
+    filtros = {"mes": mes, "anio": anio, "categoria": categoria}
+
+    with cursor_context() as (_, cursor):
+        cursor.execute(*q_count_gastos(**filtros))
+        result = cursor.fetchone()
+        total = int(result["total"]) if result and result["total"] else 0
+        # Redondeo hacia arriba
+        total_pages = (total + per_page - 1) // per_page
+        page = min(max(1, int(page)), max(1, total_pages))
+
+        gastos: List[Dict[str, Any]] = []
+        if total:
+            cursor.execute(*q_list_gastos_page(
+                per_page, (page - 1) * per_page, **filtros))
+            gastos = list(cursor.fetchall())
+
+    return {
+        "gastos": gastos,
+        "total": total,
+        "page": page,
+        "total_pages": total_pages,
+    }
+
+
 def add_gasto(categoria_id: str, descripcion: str, monto: float, mes: str, anio: int) -> bool:
     """
     Agrega un nuevo gasto.
@@ -101,6 +180,7 @@ def add_gasto(categoria_id: str, descripcion: str, monto: float, mes: str, anio:
                 (categoria, descripcion, float(monto), mes, int(anio))
             )
             conn.commit()
+            invalidate_charts()
             logger.info(f"Gasto agregado exitosamente: {descripcion}")
             return True
 
@@ -150,6 +230,7 @@ def update_gasto(gasto_id: int, categoria_id: str, descripcion: str, monto: floa
             cursor.execute(q_update_gasto(), (categoria,
                            descripcion, float(monto), gasto_id))
             conn.commit()
+            invalidate_charts()
             return cursor.rowcount > 0
 
     except (ValidationError, DatabaseError):
@@ -177,6 +258,7 @@ def delete_gasto(gasto_id: int) -> bool:
         with cursor_context() as (conn, cursor):
             cursor.execute(q_delete_gasto(), (gasto_id,))
             conn.commit()
+            invalidate_charts()
             return cursor.rowcount > 0
     except DatabaseError:
         raise
@@ -1,11 +1,13 @@
 """
 Servicio que maneja la lógica de negocio relacionada con los presupuestos.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 import pymysql
 from app.constants import MESES
+from app.chart_cache import invalidate as invalidate_charts
 from app.database import cursor_context
 from app.exceptions import DatabaseError, ValidationError
+from app.lazy_imports import lazy_import
 from app.utils_df import decimal_to_float
 from app.queries import (
     q_presupuesto_vigente,
@@ -13,9 +15,12 @@ from app.queries import (
     q_presupuesto_exists,
     q_update_presupuesto,
     q_insert_presupuesto,
-    q_sum_gastos_hasta_mes,
+    q_balance_anual,
 )
 
+# numpy solo se importa al calcular el primer balance
+np = lazy_import("numpy")
+
 
 def get_presupuesto_mensual(mes: str, anio: int) -> float:
     """
@@ -30,7 +35,7 @@ def get_presupuesto_mensual(mes: str, anio: int) -> float:
         Monto del presupuesto vigente
     """
     with cursor_context() as (_, cursor):
-        cursor.execute(q_presupuesto_vigente(), (anio, anio, mes))
+        cursor.execute(*q_presupuesto_vigente(mes, anio))
     presupuesto_result = cursor.fetchone()
     return decimal_to_float(presupuesto_result["monto"]) if presupuesto_result else 0.0
 
@@ -83,6 +88,7 @@ def update_presupuesto(mes: str, anio: int, monto: float) -> bool:
                 cursor.execute(q_insert_presupuesto(), (mes, anio, monto))
 
             conn.commit()
+            invalidate_charts()
             return True
 
     except (ValidationError, DatabaseError):
@@ -93,7 +99,75 @@ def update_presupuesto(mes: str, anio: int, monto: float) -> bool:
         raise ValidationError(f"Datos inválidos: {e}") from e
 
 
-def calcular_acumulado(mes: str, anio: int) -> Optional[float]:
+def calcular_balance(rows: Iterable[Dict[str, Any]], anio: int) -> Dict[str, Any]:
+    """
+    Calcula el balance de los 12 meses de un año a partir de las filas de ``q_balance_anual``.
+
+    El presupuesto vigente de cada mes es el último cambio registrado hasta ese
+    mes (o el último del año anterior si aún no hay cambios en el año).
+
+    Args:
+        rows: Filas ``{tipo, anio, mes, total}`` devueltas por ``q_balance_anual``
+        anio: Año del balance
+
+    Returns:
+        Diccionario con arrays de 12 posiciones (índice 0 = Enero):
+        - presupuesto_mensual: presupuesto vigente en cada mes
+        - gastos_mensuales: total gastado en cada mes
+        - gastos_acumulados: gastos acumulados hasta cada mes
+        - acumulado: presupuesto acumulado - gastos acumulados
+    """
+    presupuestos = np.full(12, np.nan)
+    gastos = np.zeros(12)
+    presupuesto_previo = 0.0
+
+    for row in rows:
+        idx = MESES.index(row["mes"])
+        total = decimal_to_float(row["total"])
+        if row["tipo"] == "gasto":
+            gastos[idx] = total
+        elif row["anio"] < anio:
+            presupuesto_previo = total
+        else:
+            presupuestos[idx] = total
+
+    # Forward-fill: propagar el último presupuesto conocido a los meses sin cambios
+    con_cambio = ~np.isnan(presupuestos)
+    ultimo_cambio = np.maximum.accumulate(
+        np.where(con_cambio, np.arange(12), -1))
+    presupuesto_mensual = np.where(
+        ultimo_cambio >= 0,
+        presupuestos[np.maximum(ultimo_cambio, 0)],
+        presupuesto_previo)
+
+    gastos_acumulados = np.cumsum(gastos)
+    return {
+        "anio": anio,
+        "presupuesto_mensual": presupuesto_mensual,
+        "gastos_mensuales": gastos,
+        "gastos_acumulados": gastos_acumulados,
+        "acumulado": np.cumsum(presupuesto_mensual) - gastos_acumulados,
+    }
+
+
+def get_balance_anual(anio: int) -> Dict[str, Any]:
+    """
+    Obtiene el balance de los 12 meses de un año con una sola consulta.
+
+    Args:
+        anio: Año del balance
+
+    Returns:
+        Diccionario con los arrays descritos en ``calcular_balance``
+    """
+    with cursor_context() as (_, cursor):
+        cursor.execute(q_balance_anual(), (anio, anio, anio))
+        rows = cursor.fetchall()
+    return calcular_balance(rows, anio)
+
+
+def calcular_acumulado(mes: str, anio: int,
+                       balance: Optional[Dict[str, Any]] = None) -> Optional[float]:
     """
     Calcula el presupuesto acumulado hasta un mes específico.
     Suma los presupuestos individuales de cada mes del año hasta el mes dado.
@@ -101,6 +175,8 @@ def calcular_acumulado(mes: str, anio: int) -> Optional[float]:
     Args:
         mes: Mes hasta el que se calcula el acumulado
         anio: Año del cálculo
+        balance: Balance anual ya calculado con ``get_balance_anual`` (opcional,
+                 evita volver a consultar la BD)
 
     Returns:
         Monto acumulado del presupuesto (presupuesto total - gastos totales)
@@ -108,37 +184,17 @@ def calcular_acumulado(mes: str, anio: int) -> Optional[float]:
     """
     from datetime import datetime
 
-    meses = MESES
-    mes_index = meses.index(mes)
+    mes_index = MESES.index(mes)
+    if balance is None:
+        balance = get_balance_anual(anio)
 
     # Verificar si el mes consultado es futuro
     fecha_actual = datetime.now()
-    anio_actual = fecha_actual.year
-    mes_actual_index = meses.index(MESES[fecha_actual.month - 1])
-
-    es_mes_futuro = (anio > anio_actual) or (
-        anio == anio_actual and mes_index > mes_actual_index)
-
-    # Si es mes futuro, verificar si hay gastos
-    if es_mes_futuro:
-        with cursor_context() as (_, cursor):
-            cursor.execute(q_sum_gastos_hasta_mes(), (anio, mes))
-            row = cursor.fetchone()
-        if not row or not row["total_gastos"] or row["total_gastos"] == 0:
-            return None  # Mes futuro sin gastos, mostrar '--'
-
-    # Sumar el presupuesto de cada mes hasta el mes consultado
-    presupuesto_total_acumulado = 0.0
-    for i in range(mes_index + 1):
-        mes_iter = meses[i]
-        presupuesto_mes = get_presupuesto_mensual(mes_iter, anio)
-        presupuesto_total_acumulado += presupuesto_mes
+    es_mes_futuro = (anio > fecha_actual.year) or (
+        anio == fecha_actual.year and mes_index > fecha_actual.month - 1)
 
-    with cursor_context() as (_, cursor):
-        # Obtener total de gastos hasta el mes consultado
-        cursor.execute(q_sum_gastos_hasta_mes(), (anio, mes))
-        row = cursor.fetchone()
-    total_val = row["total_gastos"] if row and row["total_gastos"] else 0.0
-    total_gastos_anual = decimal_to_float(total_val)
+    # Mes futuro sin gastos: mostrar '--'
+    if es_mes_futuro and not balance["gastos_acumulados"][mes_index]:
+        return None
 
-    return presupuesto_total_acumulado - total_gastos_anual
+    return float(balance["acumulado"][mes_index])
@@ -0,0 +1,169 @@
+"""
+Log de consultas lentas con captura de ``EXPLAIN``.
+
+Con ``SLOW_QUERY_MS`` > 0, toda consulta de ``cursor_context()`` que tarde
+más que el umbral se registra (WARNING) con:
+
+- el helper de ``app.queries`` que generó el SQL,
+- la forma de los parámetros (tipos, nunca valores),
+- la duración.
+
+Con ``SLOW_QUERY_EXPLAIN`` además se ejecuta ``EXPLAIN FORMAT=JSON`` la
+primera vez que un texto SQL aparece como lento (no en cada ejecución). El
+plan se resume destacando full scans (``access_type: ALL``), filesorts y
+tablas temporales, y se registra completo en DEBUG. Así se puede comprobar
+con datos reales que cada consulta usa el índice que documenta
+``database/INDEXES.md``.
+
+Las consultas se cronometran con ``add_query_listener`` de
+``app.instrumentation``.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import pymysql
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Verbos que admiten EXPLAIN sin efectos (EXPLAIN no ejecuta la sentencia)
+EXPLAINABLE = ("select", "update", "delete")
+# Textos SQL distintos recordados para no repetir EXPLAIN
+MAX_EXPLAINED = 1000
+
+
+def params_shape(params: Any) -> str:
+    """
+    Describe los parámetros de una consulta sin mostrar sus valores.
+
+    Ejemplo:
+        params_shape(['Enero', 2025]) -> "(str, int)"
+        params_shape([(1, 'a'), (2, 'b')]) -> "[2 x (int, str)]"
+    """
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    if isinstance(params, (list, tuple)):
+        if params and all(isinstance(p, (list, tuple, dict)) for p in params):
+            return f"[{len(params)} x {params_shape(params[0])}]"
+        return "(" + ", ".join(type(p).__name__ for p in params) + ")"
+    return type(params).__name__
+
+
+def summarize_plan(plan: Dict[str, Any]) -> List[str]:
+    """
+    Extrae los avisos relevantes de un plan ``EXPLAIN FORMAT=JSON``.
+
+    Returns:
+        Lista de avisos, p.ej. ``["full scan: gastos (1200 filas)", "filesort"]``.
+    """
+    avisos: List[str] = []
+
+    def walk(node: Any):
+        if isinstance(node, dict):
+            table = node.get("table_name")
+            if table and node.get("access_type") == "ALL":
+                rows = node.get("rows_examined_per_scan", "?")
+                avisos.append(f"full scan: {table} ({rows} filas)")
+            if node.get("using_filesort"):
+                avisos.append("filesort")
+            if node.get("using_temporary_table"):
+                avisos.append("temporary table")
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(plan)
+    return list(dict.fromkeys(avisos))
+
+
+class SlowQueryLog:
+    """
+    Listener de consultas que registra las lentas y captura su plan.
+
+    Args:
+        threshold_ms: Umbral en milisegundos.
+        explain: Capturar ``EXPLAIN FORMAT=JSON`` una vez por texto SQL.
+    """
+
+    def __init__(self, threshold_ms: float, explain: bool = False):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self._explained: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str, sql: Any, params: Any, duration: float,
+                 error: Optional[BaseException]) -> None:
+        if duration < self.threshold:
+            return
+        logger.warning(
+            f"slow_query query={name} duration_ms={duration * 1000:.1f} "
+            f"params={params_shape(params)}",
+            extra={"slow_query": {"query": name, "duration_ms": round(duration * 1000, 1),
+                                  "params": params_shape(params)}})
+        if self.explain and error is None and self._first_time(str(sql)):
+            self.capture_explain(name, sql, params)
+
+    def _first_time(self, sql: str) -> bool:
+        with self._lock:
+            if sql in self._explained:
+                return False
+            self._explained[sql] = None
+            while len(self._explained) > MAX_EXPLAINED:
+                self._explained.popitem(last=False)
+            return True
+
+    def capture_explain(self, name: str, sql: Any, params: Any) -> Optional[Dict[str, Any]]:
+        """
+        Ejecuta ``EXPLAIN FORMAT=JSON`` en una conexión aparte y registra el plan.
+
+        Returns:
+            El plan (dict), o None si la sentencia no admite EXPLAIN o falló.
+        """
+        text = str(sql).lstrip()
+        verb = text.split(None, 1)[0].lower() if text else ""
+        if verb not in EXPLAINABLE or params_shape(params).startswith("["):
+            return None  # executemany o sentencias sin plan útil
+
+        from app.database import _connect, _get_db_params
+
+        try:
+            conn = _connect(_get_db_params())
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("EXPLAIN FORMAT=JSON " + text, params)
+                    row = cur.fetchone()
+            finally:
+                conn.close()
+            plan = json.loads(next(iter(row.values())) if isinstance(row, dict) else row[0])
+        except (pymysql.Error, ValueError, TypeError, StopIteration) as e:
+            logger.error(f"No se pudo obtener EXPLAIN de {name}: {e}")
+            return None
+
+        avisos = summarize_plan(plan)
+        cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost", "?")
+        logger.warning(
+            f"slow_query_plan query={name} cost={cost} "
+            f"issues={'; '.join(avisos) if avisos else 'none'}",
+            extra={"slow_query_plan": {"query": name, "cost": cost, "issues": avisos}})
+        logger.debug(f"slow_query_plan query={name} plan={json.dumps(plan)}")
+        return plan
+
+
+def init_slow_query_log(app) -> None:
+    """Registra el log de consultas lentas si ``SLOW_QUERY_MS`` > 0."""
+    threshold = app.config.get("SLOW_QUERY_MS", 0)
+    if not threshold or threshold <= 0:
+        return
+
+    from app.instrumentation import add_query_listener
+
+    app.extensions["slow_query_log"] = listener = SlowQueryLog(
+        threshold, explain=app.config.get("SLOW_QUERY_EXPLAIN", False))
+    add_query_listener(listener)
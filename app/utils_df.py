@@ -5,15 +5,21 @@ Este módulo centraliza lógica repetitiva usada en services (especialmente char
 - Construcción de DataFrames con todos los meses del año
 - Conversión segura Decimal→float
 - Helpers para HTML de Plotly
+
+pandas se importa en el primer uso (``app.lazy_imports``): los servicios que
+solo necesitan ``decimal_to_float`` no lo cargan.
 """
 from __future__ import annotations
 
 from typing import Iterable, List, Optional, Sequence, Union
 
-import pandas as pd
 from decimal import Decimal
 
 from .constants import MESES
+from .instrumentation import timed
+from .lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
 
 
 def get_months() -> List[str]:
@@ -114,6 +120,16 @@ def decimal_to_float(val, default: float = 0.0) -> float:
         return default
 
 
+@timed('plotly')
 def to_plot_html(fig) -> str:
-    """Devuelve el HTML embebible de una figura de Plotly."""
-    return fig.to_html(full_html=False)
+    """Devuelve el HTML embebible de una figura de Plotly (solo div + datos).
+
+    No incluye plotly.js: la página lo carga una vez desde ``plotly_js_url()``.
+    """
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+@timed('plotly')
+def to_plot_json(fig) -> str:
+    """Devuelve la figura como JSON compacto (``data`` + ``layout``) para ``Plotly.newPlot``."""
+    return fig.to_json()
@@ -0,0 +1,106 @@
+"""
+Compara dos ficheros de resultados de ``run_benchmarks`` y detecta regresiones.
+
+Uso:
+    python -m benchmarks.compare benchmarks/baselines/10k.json resultados.json
+    python -m benchmarks.compare base.json nuevo.json --tolerance 0.10 --metric p95_ms
+
+Un benchmark es una regresión si su métrica empeora más que ``tolerance``
+(fracción, 0.20 = 20 %) y además más de ``min_delta_ms`` en valor absoluto
+(evita falsos positivos en casos de pocos ms). Sale con código 1 si hay
+alguna regresión, para poder usarlo en CI.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+DEFAULT_TOLERANCE = 0.20
+DEFAULT_METRIC = "median_ms"
+DEFAULT_MIN_DELTA_MS = 1.0
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Lee un fichero de resultados (JSON de ``run_benchmarks``)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE,
+                    metric: str = DEFAULT_METRIC,
+                    min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """
+    Compara benchmark a benchmark.
+
+    Returns:
+        Una fila por benchmark con ``name``, ``baseline``, ``current``,
+        ``change`` (fracción) y ``status``: ``regression``, ``improvement``,
+        ``ok``, ``new`` (solo en current) o ``missing`` (solo en baseline).
+    """
+    base = baseline.get("results", {})
+    curr = current.get("results", {})
+    rows = []
+    for name in sorted(set(base) | set(curr)):
+        if name not in curr:
+            rows.append({"name": name, "baseline": base[name][metric], "current": None,
+                         "change": None, "status": "missing"})
+            continue
+        if name not in base:
+            rows.append({"name": name, "baseline": None, "current": curr[name][metric],
+                         "change": None, "status": "new"})
+            continue
+
+        antes, ahora = base[name][metric], curr[name][metric]
+        change = (ahora - antes) / antes if antes else 0.0
+        status = "ok"
+        if abs(ahora - antes) >= min_delta_ms:
+            if change > tolerance:
+                status = "regression"
+            elif change < -tolerance:
+                status = "improvement"
+        rows.append({"name": name, "baseline": antes, "current": ahora,
+                     "change": change, "status": status})
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]], metric: str = DEFAULT_METRIC) -> str:
+    """Tabla de texto con el resultado de ``compare_results``."""
+    def fmt(value, pattern):
+        return pattern.format(value) if value is not None else "-"
+
+    width = max([len("benchmark")] + [len(r["name"]) for r in rows])
+    lines = [f"{'benchmark':<{width}}  {'base ' + metric:>16}  {'actual':>10}  {'cambio':>8}  estado"]
+    lines.append("-" * len(lines[0]))
+    for r in rows:
+        lines.append(
+            f"{r['name']:<{width}}  {fmt(r['baseline'], '{:.2f}'):>16}  "
+            f"{fmt(r['current'], '{:.2f}'):>10}  {fmt(r['change'], '{:+.1%}'):>8}  {r['status']}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmarks.")
+    parser.add_argument("baseline", help="Fichero JSON de referencia")
+    parser.add_argument("current", help="Fichero JSON a comparar")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Empeoramiento permitido (fracción, por defecto 0.20)")
+    parser.add_argument("--metric", default=DEFAULT_METRIC,
+                        help="Métrica a comparar (median_ms, p95_ms, min_ms, mean_ms)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Diferencia absoluta mínima para marcar un cambio")
+    args = parser.parse_args(argv)
+
+    rows = compare_results(load_results(args.baseline), load_results(args.current),
+                           args.tolerance, args.metric, args.min_delta_ms)
+    print(format_table(rows, args.metric))
+    regresiones = [r for r in rows if r["status"] == "regression"]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresión(es) por encima del {args.tolerance:.0%}")
+        return 1
+    print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+Prueba de carga HTTP de las rutas principales (sin dependencias externas).
+
+Lanza ``--concurrency`` hilos que piden rutas al azar (según el perfil)
+durante ``--duration`` segundos contra una instancia en marcha o contra un
+gunicorn arrancado por el propio script (``--start-server``). Al terminar
+muestra, por ruta, peticiones/s, latencias p50/p95/p99 y tasa de errores, y
+opcionalmente lo guarda en JSON.
+
+Perfiles:
+- ``read``: ``/``, ``/gastos``, ``/report``, ``/gastos/descargar``, ``/get_gasto/<id>``.
+- ``mixed``: lo anterior más escrituras: alta (``POST /``) y edición
+  (``POST /edit/<id>``) de gastos. ¡Modifica la BD! Los gastos creados llevan
+  la descripción ``loadtest``.
+
+Uso:
+    python -m benchmarks.loadtest --start-server --workers 4 --concurrency 16 --duration 30
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --profile mixed --discover \\
+        --db-name gastos_carga --output loadtest.json
+
+Los IDs de ``/get_gasto`` y ``/edit`` salen de ``--gasto-ids`` / ``--categoria-ids``
+(rangos ``A-B``) o, con ``--discover``, de la BD (``--db-name``).
+Errores: fallos de conexión y respuestas 5xx; los 4xx se cuentan aparte.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.constants import MESES  # noqa: E402
+
+# (nombre, peso) de cada ruta por perfil
+PROFILES: Dict[str, List[Tuple[str, int]]] = {
+    "read": [("/", 30), ("/gastos", 20), ("/report", 15),
+             ("/gastos/descargar", 5), ("/get_gasto/<id>", 30)],
+    "mixed": [("/", 25), ("/gastos", 15), ("/report", 10), ("/gastos/descargar", 5),
+              ("/get_gasto/<id>", 25), ("POST /", 12), ("POST /edit/<id>", 8)],
+}
+
+
+@dataclass
+class Request:
+    """Petición concreta: método, ruta (con IDs ya resueltos) y cuerpo."""
+    method: str
+    path: str
+    data: Optional[Dict[str, str]] = None
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """``"1-500"`` -> ``(1, 500)``; ``"7"`` -> ``(7, 7)``."""
+    desde, _, hasta = value.partition("-")
+    desde, hasta = int(desde), int(hasta or desde)
+    if desde > hasta:
+        raise ValueError(f"Rango inválido: {value}")
+    return desde, hasta
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5 - 1e-9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class RequestFactory:
+    """Elige la siguiente petición según los pesos del perfil."""
+
+    def __init__(self, profile: str, gasto_ids: Tuple[int, int],
+                 categoria_ids: Tuple[int, int], seed: Optional[int] = None):
+        self.routes = [name for name, _ in PROFILES[profile]]
+        self.weights = [weight for _, weight in PROFILES[profile]]
+        self.gasto_ids = gasto_ids
+        self.categoria_ids = categoria_ids
+        self.rng = random.Random(seed)
+
+    def _gasto_form(self) -> Dict[str, str]:
+        hoy = datetime.now()
+        return {
+            "categoria": str(self.rng.randint(*self.categoria_ids)),
+            "descripcion": "loadtest",
+            "monto": f"{self.rng.uniform(1, 200):.2f}",
+            "mes": MESES[hoy.month - 1],
+            "anio": str(hoy.year),
+        }
+
+    def next(self) -> Tuple[str, Request]:
+        """Devuelve (nombre de la ruta para el informe, petición)."""
+        route = self.rng.choices(self.routes, weights=self.weights)[0]
+        gasto_id = str(self.rng.randint(*self.gasto_ids))
+        if route == "POST /":
+            return route, Request("POST", "/", self._gasto_form())
+        if route == "POST /edit/<id>":
+            return route, Request("POST", f"/edit/{gasto_id}", self._gasto_form())
+        return route, Request("GET", route.replace("<id>", gasto_id))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Trata las redirecciones (POST -> 302) como respuesta final."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Recorder:
+    """Acumula (estado, latencia, bytes) por ruta de forma thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[Tuple[int, float, int]]] = defaultdict(list)
+
+    def add(self, route: str, status: int, latency: float, size: int) -> None:
+        with self._lock:
+            self.samples[route].append((status, latency, size))
+
+
+def send(opener, base_url: str, req: Request, timeout: float) -> Tuple[int, int]:
+    """Envía una petición y devuelve (estado, bytes leídos); estado 0 = error de red."""
+    data = urllib.parse.urlencode(req.data).encode() if req.data is not None else None
+    http_req = urllib.request.Request(base_url.rstrip("/") + req.path, data=data, method=req.method)
+    try:
+        with opener.open(http_req, timeout=timeout) as response:
+            return response.status, len(response.read())
+    except urllib.error.HTTPError as e:
+        body = e.read() if e.fp is not None else b""
+        return e.code, len(body)
+    except (urllib.error.URLError, OSError):
+        return 0, 0
+
+
+def run_load(base_url: str, factory_builder: Callable[[int], RequestFactory],
+             concurrency: int, duration: float, timeout: float = 30.0) -> Tuple[Recorder, float]:
+    """
+    Lanza ``concurrency`` hilos durante ``duration`` segundos.
+
+    Returns:
+        (muestras, segundos reales de la prueba).
+    """
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    opener = urllib.request.build_opener(_NoRedirect)
+
+    def worker(n: int):
+        factory = factory_builder(n)
+        while time.perf_counter() < deadline:
+            route, req = factory.next()
+            started = time.perf_counter()
+            status, size = send(opener, base_url, req, timeout)
+            recorder.add(route, status, time.perf_counter() - started, size)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder, time.perf_counter() - started
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, float]]:
+    """Resumen por ruta (y ``TOTAL``): rps, percentiles en ms, errores."""
+    def stats(samples):
+        latencias = sorted(s[1] * 1000 for s in samples)
+        errores = sum(1 for s in samples if s[0] == 0 or s[0] >= 500)
+        return {
+            "requests": len(samples),
+            "rps": round(len(samples) / max(elapsed, 1e-9), 2),
+            "p50_ms": round(percentile(latencias, 50), 2),
+            "p95_ms": round(percentile(latencias, 95), 2),
+            "p99_ms": round(percentile(latencias, 99), 2),
+            "max_ms": round(latencias[-1], 2) if latencias else 0.0,
+            "errors": errores,
+            "error_rate": round(errores / len(samples), 4) if samples else 0.0,
+            "client_errors": sum(1 for s in samples if 400 <= s[0] < 500),
+            "bytes": sum(s[2] for s in samples),
+        }
+
+    resumen = {route: stats(samples) for route, samples in sorted(recorder.samples.items())}
+    todas = [s for samples in recorder.samples.values() for s in samples]
+    resumen["TOTAL"] = stats(todas)
+    return resumen
+
+
+def format_table(resumen: Dict[str, Dict[str, float]]) -> str:
+    """Tabla de texto con el resultado de ``summarize``."""
+    width = max(len("ruta"), *(len(r) for r in resumen))
+    header = (f"{'ruta':<{width}}  {'peticiones':>10}  {'rps':>8}  {'p50 ms':>8}  "
+              f"{'p95 ms':>8}  {'p99 ms':>8}  {'errores':>8}  {'4xx':>5}")
+    lines = [header, "-" * len(header)]
+    for route, s in resumen.items():
+        lines.append(
+            f"{route:<{width}}  {s['requests']:>10}  {s['rps']:>8.1f}  {s['p50_ms']:>8.1f}  "
+            f"{s['p95_ms']:>8.1f}  {s['p99_ms']:>8.1f}  {s['error_rate']:>8.2%}  {s['client_errors']:>5}")
+    return "\n".join(lines)
+
+
+def discover_ids(db_name: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Rangos de IDs existentes de gastos y categorías en la BD."""
+    import pymysql
+    from app.config import DefaultConfig
+
+    conn = pymysql.connect(host=DefaultConfig.DB_HOST, user=DefaultConfig.DB_USER,
+                           password=DefaultConfig.DB_PASSWORD, port=DefaultConfig.DB_PORT,
+                           database=db_name)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MIN(id), MAX(id) FROM gastos")
+            gastos = cur.fetchone()
+            cur.execute("SELECT MIN(id), MAX(id) FROM categorias")
+            categorias = cur.fetchone()
+    finally:
+        conn.close()
+    if gastos[0] is None or categorias[0] is None:
+        raise SystemExit(f"❌ {db_name} no tiene gastos o categorías; carga datos antes "
+                         "(scripts/load_synthetic_data.py)")
+    return (gastos[0], gastos[1]), (categorias[0], categorias[1])
+
+
+def start_server(bind: str, workers: int, config: str = "production") -> subprocess.Popen:
+    """Arranca gunicorn con ``gunicorn.conf.py`` y espera a que responda."""
+    cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+           "--bind", bind, "--workers", str(workers), f"app:create_app('{config}')"]
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    url = f"http://{bind}/"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ gunicorn terminó al arrancar (código {proc.returncode})")
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return proc
+        except urllib.error.HTTPError:
+            return proc  # Responde (aunque sea con error): está arriba
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit("❌ gunicorn no respondió en 60s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP de las rutas principales.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL base del servidor")
+    parser.add_argument("--start-server", action="store_true",
+                        help="Arrancar gunicorn en la dirección de --url y pararlo al final")
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn (--start-server)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="read")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultáneos")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos de prueba")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición")
+    parser.add_argument("--gasto-ids", default="1-100", help="Rango de IDs de gasto (A-B)")
+    parser.add_argument("--categoria-ids", default="1-4", help="Rango de IDs de categoría (A-B)")
+    parser.add_argument("--discover", action="store_true",
+                        help="Leer los rangos de IDs de la BD (--db-name)")
+    parser.add_argument("--db-name", help="BD para --discover (por defecto DB_NAME)")
+    parser.add_argument("--seed", type=int, help="Semilla de la secuencia de peticiones")
+    parser.add_argument("--output", help="Guardar el resumen en este JSON")
+    args = parser.parse_args(argv)
+
+    gasto_ids, categoria_ids = parse_range(args.gasto_ids), parse_range(args.categoria_ids)
+    if args.discover:
+        from app.config import DefaultConfig
+        gasto_ids, categoria_ids = discover_ids(args.db_name or DefaultConfig.DB_NAME)
+
+    if args.profile == "mixed":
+        print("⚠️  Perfil mixed: se crearán y editarán gastos en la BD del servidor")
+
+    server = None
+    if args.start_server:
+        server = start_server(urllib.parse.urlparse(args.url).netloc, args.workers)
+    try:
+        print(f"🚀 {args.concurrency} clientes durante {args.duration:.0f}s contra {args.url} "
+              f"(perfil {args.profile})")
+        recorder, elapsed = run_load(
+            args.url,
+            lambda n: RequestFactory(args.profile, gasto_ids, categoria_ids,
+                                     None if args.seed is None else args.seed + n),
+            args.concurrency, args.duration, args.timeout)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    resumen = summarize(recorder, elapsed)
+    print("\n" + format_table(resumen))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {"created": datetime.now().isoformat(timespec="seconds"), "url": args.url,
+                         "profile": args.profile, "concurrency": args.concurrency,
+                         "duration_s": round(elapsed, 2)},
+                "routes": resumen,
+            }, f, indent=2)
+        print(f"\n💾 Resumen guardado en {args.output}")
+    return 1 if resumen["TOTAL"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Suite de benchmarks de servicios, generadores de gráficos y rutas.
+
+Siembra una BD de benchmark con datos sintéticos (``benchmarks.synthetic``)
+y cronometra:
+
+- ``gastos_service``: ``list_gastos`` (todo y un mes), ``list_gastos_page``
+- ``presupuesto_service``: ``calcular_acumulado``, ``get_balance_anual``
+- ``charts_service``: cada generador (``generate_*`` y ``get_chart_json``)
+- Rutas principales con el cliente de pruebas de Flask
+
+La caché de gráficos se desactiva para medir siempre la generación completa.
+
+Uso:
+    python -m benchmarks.run_benchmarks --size 10k --seed-db
+    python -m benchmarks.run_benchmarks --size 10k --output benchmarks/baselines/10k.json
+    python -m benchmarks.run_benchmarks --size 10k --compare benchmarks/baselines/10k.json
+
+La BD (``--db-name``, por defecto ``gastos_bench``) nunca puede ser la de
+``DB_NAME``: ``--seed-db`` borra y recrea sus tablas.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import pymysql
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from app.config import DefaultConfig  # noqa: E402
+from benchmarks import compare  # noqa: E402
+from benchmarks.synthetic import SIZES, SyntheticSpec, seed_database  # noqa: E402
+
+DEFAULT_DB_NAME = "gastos_bench"
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+def time_call(func: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """
+    Ejecuta ``func`` ``warmup + repeat`` veces y resume las ``repeat`` medidas.
+
+    Returns:
+        ``runs``, ``min_ms``, ``median_ms``, ``mean_ms``, ``p95_ms``, ``max_ms``.
+    """
+    for _ in range(warmup):
+        func()
+    tiempos = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        tiempos.append((time.perf_counter() - started) * 1000)
+    tiempos.sort()
+    p95 = tiempos[min(len(tiempos) - 1, int(round(0.95 * (len(tiempos) - 1))))]
+    return {
+        "runs": repeat,
+        "min_ms": round(tiempos[0], 3),
+        "median_ms": round(statistics.median(tiempos), 3),
+        "mean_ms": round(statistics.fmean(tiempos), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(tiempos[-1], 3),
+    }
+
+
+def _db_params(db_name: str) -> Dict[str, Any]:
+    return {
+        "host": DefaultConfig.DB_HOST,
+        "user": DefaultConfig.DB_USER,
+        "password": DefaultConfig.DB_PASSWORD,
+        "port": DefaultConfig.DB_PORT,
+        "database": db_name,
+    }
+
+
+def prepare_database(db_name: str, spec: SyntheticSpec, batch_size: int = 5000) -> Dict[str, int]:
+    """Recrea las tablas de la BD de benchmark y la siembra con ``spec``."""
+    if db_name == DefaultConfig.DB_NAME:
+        raise SystemExit(f"❌ Negado: {db_name} es la BD de la aplicación (DB_NAME)")
+
+    params = _db_params(db_name)
+    server = pymysql.connect(**{k: v for k, v in params.items() if k != "database"})
+    try:
+        with server.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}` "
+                        "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    finally:
+        server.close()
+
+    conn = pymysql.connect(**params)
+    try:
+        with conn.cursor() as cur:
+            for tabla in ("gastos", "presupuesto", "categorias"):
+                cur.execute(f"DROP TABLE IF EXISTS {tabla}")
+        started = time.perf_counter()
+        counts = seed_database(conn, spec, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+    print(f"🌱 {counts['gastos']:,} gastos sembrados en {elapsed:.1f}s "
+          f"({counts['gastos'] / max(elapsed, 1e-9):,.0f} filas/s)")
+    return counts
+
+
+def build_app(db_name: str):
+    """App de testing apuntando a la BD de benchmark, sin caché de gráficos."""
+    app = create_app('testing')
+    app.config.update({
+        "DB_NAME": db_name,
+        "CHART_CACHE_ENABLED": False,
+        "SERVER_TIMING_ENABLED": False,
+    })
+    return app
+
+
+def build_cases(app, spec: SyntheticSpec) -> List[Case]:
+    """Lista de (nombre, función) a cronometrar; se ejecutan en el contexto de ``app``."""
+    from app.database import cursor_context
+    from app.services import charts_service, gastos_service, presupuesto_service
+
+    mes, anio = spec.hasta
+    with cursor_context() as (_, cur):
+        cur.execute("SELECT MIN(id) AS id FROM gastos")
+        gasto_id = (cur.fetchone() or {}).get("id") or 1
+    client = app.test_client()
+
+    def route(path: str, **config) -> Callable[[], Any]:
+        def call():
+            previous = {k: app.config.get(k) for k in config}
+            app.config.update(config)
+            try:
+                response = client.get(path)
+                response.get_data()  # Consumir respuestas en streaming
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{path} devolvió {response.status_code}")
+            finally:
+                app.config.update(previous)
+        return call
+
+    return [
+        ("gastos.list_gastos[todos]", lambda: gastos_service.list_gastos()),
+        ("gastos.list_gastos[mes]", lambda: gastos_service.list_gastos(mes=mes, anio=anio)),
+        ("gastos.list_gastos_page", lambda: gastos_service.list_gastos_page(page=1)),
+        ("presupuesto.get_balance_anual", lambda: presupuesto_service.get_balance_anual(anio)),
+        ("presupuesto.calcular_acumulado", lambda: presupuesto_service.calcular_acumulado(mes, anio)),
+        ("charts.generate_pie_chart", lambda: charts_service.generate_pie_chart(mes, anio)),
+        ("charts.generate_gas_chart", lambda: charts_service.generate_gas_chart()),
+        ("charts.generate_category_chart", lambda: charts_service.generate_category_chart("Compra")),
+        ("charts.generate_comparison_chart", lambda: charts_service.generate_comparison_chart()),
+        ("charts.generate_report_charts", lambda: charts_service.generate_report_charts(
+            mes, anio, ["Compra", "Gasolina", "Facturas"])),
+        ("charts.get_chart_json[pie]", lambda: charts_service.get_chart_json("pie", mes=mes, anio=anio)),
+        ("charts.get_chart_json[comparacion]", lambda: charts_service.get_chart_json("comparacion")),
+        ("route:/", route("/")),
+        ("route:/gastos", route("/gastos")),
+        ("route:/gastos/descargar", route("/gastos/descargar")),
+        ("route:/get_gasto", route(f"/get_gasto/{gasto_id}")),
+        ("route:/report[lazy]", route("/report", REPORT_LAZY_CHARTS=True)),
+        ("route:/report[inline]", route("/report", REPORT_LAZY_CHARTS=False)),
+        ("route:/api/charts/pie", route(f"/api/charts/pie?mes={mes}&anio={anio}")),
+    ]
+
+
+def run(app, cases: List[Case], repeat: int, warmup: int, only: str = "") -> Dict[str, Dict[str, float]]:
+    """Ejecuta los casos (filtrados por subcadena ``only``) e imprime cada resultado."""
+    results = {}
+    with app.app_context():
+        for name, func in cases:
+            if only and only not in name:
+                continue
+            results[name] = stats = time_call(func, repeat=repeat, warmup=warmup)
+            print(f"  {name:<36} median {stats['median_ms']:>9.2f} ms   p95 {stats['p95_ms']:>9.2f} ms")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de servicios, gráficos y rutas.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k",
+                        help="Volumen de gastos sintéticos (10k, 100k, 1m)")
+    parser.add_argument("--gastos", type=int, help="Número exacto de gastos (sustituye a --size)")
+    parser.add_argument("--anios", type=int, default=5, help="Años de histórico")
+    parser.add_argument("--categorias", type=int, default=12, help="Número de categorías")
+    parser.add_argument("--descripciones", type=int, default=20, help="Descripciones por categoría")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos")
+    parser.add_argument("--db-name", default=DEFAULT_DB_NAME, help="BD de benchmark")
+    parser.add_argument("--seed-db", action="store_true",
+                        help="Recrear y sembrar la BD antes de medir")
+    parser.add_argument("--repeat", type=int, default=5, help="Mediciones por caso")
+    parser.add_argument("--warmup", type=int, default=1, help="Ejecuciones previas sin medir")
+    parser.add_argument("--only", default="", help="Solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--output", help="Guardar resultados en este JSON (p.ej. una baseline)")
+    parser.add_argument("--compare", help="Comparar con esta baseline al terminar")
+    parser.add_argument("--tolerance", type=float, default=compare.DEFAULT_TOLERANCE,
+                        help="Empeoramiento permitido al comparar (fracción)")
+    args = parser.parse_args(argv)
+
+    spec = SyntheticSpec(gastos=args.gastos or SIZES[args.size], anios=args.anios,
+                         categorias=args.categorias, descripciones=args.descripciones,
+                         seed=args.seed)
+    if args.seed_db:
+        prepare_database(args.db_name, spec)
+
+    app = build_app(args.db_name)
+    with app.app_context():
+        cases = build_cases(app, spec)
+    print(f"\n⏱️  Benchmarks sobre {args.db_name} ({spec.gastos:,} gastos)")
+    results = run(app, cases, args.repeat, args.warmup, args.only)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "spec": {"gastos": spec.gastos, "anios": spec.anios, "categorias": spec.categorias,
+                     "descripciones": spec.descripciones, "seed": spec.seed,
+                     "hasta": list(spec.hasta)},
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+    if args.compare:
+        rows = compare.compare_results(compare.load_results(args.compare), report,
+                                       tolerance=args.tolerance)
+        print("\n" + compare.format_table(rows))
+        if any(r["status"] == "regression" for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
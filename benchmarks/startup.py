@@ -0,0 +1,150 @@
+"""
+Benchmark de arranque: importar ``app``, ``create_app()`` y memoria.
+
+Cada medición se hace en un proceso Python nuevo (la caché de módulos de un
+proceso ya caliente falsearía el resultado) y mide:
+
+- ``startup.import_app``: ``from app import create_app``.
+- ``startup.create_app``: la llamada a ``create_app(config)``.
+- ``startup.total``: ambas.
+- ``startup.first_chart_imports``: importar pandas + Plotly + numpy, es
+  decir, lo que se paga en el primer gráfico desde que se cargan en diferido.
+
+También registra la memoria residente máxima (RSS) tras ``create_app`` y
+qué dependencias pesadas quedaron cargadas al arrancar (debería ser ninguna).
+
+Uso:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --output benchmarks/baselines/startup.json
+    python -m benchmarks.startup --compare benchmarks/baselines/startup.json
+
+El JSON tiene el mismo formato que ``run_benchmarks`` (``results``), así que
+``benchmarks.compare`` sirve para detectar regresiones.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import compare  # noqa: E402
+
+HEAVY_MODULES = ("pandas", "numpy", "plotly", "plotly.graph_objects", "dateutil")
+
+# Se ejecuta en un proceso nuevo; imprime una línea JSON con las medidas
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app(sys.argv[1])
+t2 = time.perf_counter()
+heavy = [m for m in sys.argv[2].split(",") if m in sys.modules]
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+except ImportError:  # Windows
+    rss_mb = None
+t3 = time.perf_counter()
+import numpy, pandas, plotly.graph_objects
+t4 = time.perf_counter()
+print(json.dumps({"import_app": (t1 - t0) * 1000, "create_app": (t2 - t1) * 1000,
+                  "first_chart_imports": (t4 - t3) * 1000, "rss_mb": rss_mb, "heavy": heavy}))
+"""
+
+
+def measure_once(config: str = "testing") -> Dict[str, object]:
+    """Arranca un proceso nuevo y devuelve sus medidas."""
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, config, ",".join(HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Resumen con las mismas claves que ``run_benchmarks.time_call``."""
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    return {
+        "runs": len(values),
+        "min_ms": round(values[0], 3),
+        "median_ms": round(statistics.median(values), 3),
+        "mean_ms": round(statistics.fmean(values), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def run(runs: int, config: str = "testing") -> Dict[str, object]:
+    """Mide ``runs`` arranques (más uno de calentamiento de la caché de bytecode)."""
+    measure_once(config)
+    muestras = [measure_once(config) for _ in range(runs)]
+    results = {
+        f"startup.{key}": summarize([m[key] for m in muestras])
+        for key in ("import_app", "create_app", "first_chart_imports")
+    }
+    results["startup.total"] = summarize([m["import_app"] + m["create_app"] for m in muestras])
+    rss = [m["rss_mb"] for m in muestras if m["rss_mb"] is not None]
+    return {
+        "results": results,
+        "memory": {"rss_mb_median": round(statistics.median(rss), 1) if rss else None},
+        "heavy_modules_loaded": sorted({h for m in muestras for h in m["heavy"]}),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la app.")
+    parser.add_argument("--runs", type=int, default=5, help="Procesos a medir")
+    parser.add_argument("--config", default="testing",
+                        help="Configuración de create_app (testing no toca la BD)")
+    parser.add_argument("--output", help="Guardar resultados en este JSON")
+    parser.add_argument("--compare", help="Comparar con esta baseline al terminar")
+    parser.add_argument("--tolerance", type=float, default=compare.DEFAULT_TOLERANCE,
+                        help="Empeoramiento permitido al comparar (fracción)")
+    args = parser.parse_args(argv)
+
+    datos = run(args.runs, args.config)
+    print(f"\n⏱️  Arranque ({args.runs} procesos, config {args.config})")
+    for name, stats in datos["results"].items():
+        print(f"  {name:<30} median {stats['median_ms']:>9.2f} ms   p95 {stats['p95_ms']:>9.2f} ms")
+    if datos["memory"]["rss_mb_median"] is not None:
+        print(f"  {'RSS tras create_app':<30} {datos['memory']['rss_mb_median']:>9.1f} MB")
+    if datos["heavy_modules_loaded"]:
+        print(f"⚠️  Dependencias pesadas cargadas al arrancar: {', '.join(datos['heavy_modules_loaded'])}")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": args.config,
+            "runs": args.runs,
+        },
+        **datos,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+    if args.compare:
+        rows = compare.compare_results(compare.load_results(args.compare), report,
+                                       tolerance=args.tolerance)
+        print("\n" + compare.format_table(rows))
+        if any(r["status"] == "regression" for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
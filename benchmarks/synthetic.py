@@ -0,0 +1,255 @@
+"""
+Generador de datos sintéticos para benchmarks y pruebas de carga.
+
+Produce categorías, gastos e histórico de presupuestos realistas a partir de
+una semilla (mismo ``seed`` = mismos datos):
+
+- Las categorías siguen una distribución tipo Zipf (pocas muy frecuentes,
+  muchas raras) y cada una tiene su rango de importes (log-normal).
+- Los gastos se reparten por todos los meses de la ventana de ``anios``
+  años que termina en el mes actual, para que los gráficos de "últimos 12
+  meses" tengan datos.
+- Cada gasto usa una categoría generada: se respeta la FK
+  ``gastos.categoria -> categorias.nombre``.
+
+Los gastos se generan como iterador para no tener 1M de filas en memoria.
+"""
+import itertools
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.constants import MESES, SQL_PERIODO_EXPR
+
+# Tamaños predefinidos (--size)
+SIZES: Dict[str, int] = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+CATEGORIAS_BASE = [
+    "Compra", "Facturas", "Gasolina", "Restaurantes", "Ocio", "Transporte",
+    "Salud", "Ropa", "Hogar", "Suscripciones", "Regalos", "Viajes",
+    "Mascotas", "Educación", "Alquiler",
+]
+
+DESCRIPCIONES_BASE = {
+    "Compra": ["Mercadona", "Lidl", "Carrefour", "Dia", "Alcampo", "Eroski"],
+    "Facturas": ["Luz", "Agua", "Gas", "Internet", "Móvil", "Seguro hogar"],
+    "Gasolina": ["Repsol", "Cepsa", "BP", "Shell", "Galp"],
+    "Restaurantes": ["Cena", "Comida", "Café", "Menú del día", "Pizzería"],
+    "Alquiler": ["Piso"],
+}
+
+# Importe típico (mediana, en euros) por categoría; el resto usa 40 €
+IMPORTE_TIPICO = {
+    "Compra": 45.0, "Facturas": 60.0, "Gasolina": 55.0, "Restaurantes": 30.0,
+    "Ocio": 25.0, "Transporte": 15.0, "Salud": 40.0, "Ropa": 50.0,
+    "Hogar": 70.0, "Suscripciones": 12.0, "Regalos": 35.0, "Viajes": 250.0,
+    "Mascotas": 30.0, "Educación": 80.0, "Alquiler": 850.0,
+}
+
+# Tope de DECIMAL(10, 2)
+MAX_MONTO = 99_999_999.99
+
+# Esquema completo (init_db.py + migraciones 001-004) para BD de benchmark
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS categorias (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(50) NOT NULL UNIQUE,
+        mostrar_en_graficas BOOLEAN NOT NULL DEFAULT TRUE,
+        incluir_en_resumen BOOLEAN NOT NULL DEFAULT TRUE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS gastos (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        categoria VARCHAR(50) NOT NULL,
+        descripcion TEXT,
+        monto DECIMAL(10,2) NOT NULL,
+        mes VARCHAR(20) NOT NULL,
+        anio INT NOT NULL,
+        periodo INT AS ({SQL_PERIODO_EXPR}) STORED,
+        CONSTRAINT gastos_ibfk_1
+            FOREIGN KEY (categoria) REFERENCES categorias(nombre)
+            ON UPDATE CASCADE
+            ON DELETE RESTRICT,
+        INDEX idx_mes_anio (mes, anio),
+        INDEX idx_anio_mes (anio, mes),
+        INDEX idx_anio (anio),
+        INDEX idx_categoria_anio_mes (categoria, anio, mes),
+        INDEX idx_gastos_periodo (periodo),
+        INDEX idx_gastos_categoria_periodo (categoria, periodo)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS presupuesto (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        mes VARCHAR(20) NOT NULL,
+        anio INT NOT NULL,
+        monto DECIMAL(10,2) NOT NULL,
+        fecha_cambio DATETIME NOT NULL,
+        periodo INT AS ({SQL_PERIODO_EXPR}) STORED,
+        INDEX idx_presupuesto_mes_anio (mes, anio),
+        INDEX idx_presupuesto_anio_mes (anio, mes),
+        INDEX idx_presupuesto_periodo (periodo)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+]
+
+
+@dataclass
+class SyntheticSpec:
+    """
+    Parámetros del conjunto de datos sintético.
+
+    Args:
+        gastos: Número total de gastos.
+        anios: Años de histórico (terminando en el mes de ``hasta``).
+        categorias: Número de categorías.
+        descripciones: Descripciones distintas por categoría.
+        seed: Semilla del generador.
+        hasta: (mes, anio) del último mes con datos (por defecto, el actual).
+    """
+    gastos: int = 10_000
+    anios: int = 5
+    categorias: int = 12
+    descripciones: int = 20
+    seed: int = 42
+    hasta: Optional[Tuple[str, int]] = None
+
+    def __post_init__(self):
+        if self.gastos < 0 or self.anios < 1 or self.categorias < 1 or self.descripciones < 1:
+            raise ValueError("gastos >= 0; anios, categorias y descripciones >= 1")
+        if self.hasta is None:
+            hoy = datetime.now()
+            self.hasta = (MESES[hoy.month - 1], hoy.year)
+
+    def meses(self) -> List[Tuple[str, int]]:
+        """Meses (mes, anio) de la ventana, en orden cronológico."""
+        mes_fin, anio_fin = self.hasta
+        fin = anio_fin * 12 + MESES.index(mes_fin)
+        return [(MESES[n % 12], n // 12) for n in range(fin - self.anios * 12 + 1, fin + 1)]
+
+
+def category_names(spec: SyntheticSpec) -> List[str]:
+    """Nombres de las categorías (las comunes primero, luego ``Categoría N``)."""
+    nombres = CATEGORIAS_BASE[:spec.categorias]
+    nombres += [f"Categoría {n}" for n in range(len(nombres) + 1, spec.categorias + 1)]
+    return nombres
+
+
+def generate_categorias(spec: SyntheticSpec) -> List[Dict[str, object]]:
+    """
+    Genera las categorías con sus flags.
+
+    ``Alquiler`` queda fuera del resumen (como en el uso real) y una de cada
+    cinco categorías no se muestra en los gráficos.
+    """
+    return [
+        {
+            "nombre": nombre,
+            "mostrar_en_graficas": i % 5 != 4,
+            "incluir_en_resumen": nombre != "Alquiler",
+        }
+        for i, nombre in enumerate(category_names(spec))
+    ]
+
+
+def _descripciones(categoria: str, n: int) -> List[str]:
+    base = DESCRIPCIONES_BASE.get(categoria, [])[:n]
+    return base + [f"{categoria} {i}" for i in range(len(base) + 1, n + 1)]
+
+
+def generate_gastos(spec: SyntheticSpec) -> Iterator[Tuple[str, str, float, str, int]]:
+    """
+    Genera los gastos como tuplas ``(categoria, descripcion, monto, mes, anio)``.
+
+    El orden es el de columnas de ``INSERT INTO gastos (categoria,
+    descripcion, monto, mes, anio)``.
+    """
+    rng = random.Random(spec.seed)
+    nombres = category_names(spec)
+    # Zipf: la categoría i tiene peso 1 / (i + 1)
+    acumulados = list(itertools.accumulate(1.0 / (i + 1) for i in range(len(nombres))))
+    descripciones = {c: _descripciones(c, spec.descripciones) for c in nombres}
+    meses = spec.meses()
+
+    for _ in range(spec.gastos):
+        categoria = rng.choices(nombres, cum_weights=acumulados)[0]
+        mes, anio = meses[rng.randrange(len(meses))]
+        tipico = IMPORTE_TIPICO.get(categoria, 40.0)
+        monto = min(round(rng.lognormvariate(0, 0.6) * tipico, 2), MAX_MONTO)
+        yield categoria, rng.choice(descripciones[categoria]), max(monto, 0.01), mes, anio
+
+
+def generate_presupuestos(spec: SyntheticSpec) -> List[Tuple[str, int, float, datetime]]:
+    """
+    Genera el histórico de presupuestos: ``(mes, anio, monto, fecha_cambio)``.
+
+    Un cambio de presupuesto cada 1-6 meses, con el primero al inicio de la
+    ventana para que todos los meses tengan presupuesto vigente.
+    """
+    rng = random.Random(spec.seed + 1)
+    filas = []
+    monto = 1500.0
+    siguiente = 0
+    for i, (mes, anio) in enumerate(spec.meses()):
+        if i == siguiente:
+            monto = round(monto * rng.uniform(0.95, 1.1), 2)
+            filas.append((mes, anio, monto, datetime(anio, MESES.index(mes) + 1, 1)))
+            siguiente += rng.randint(1, 6)
+    return filas
+
+
+def batched(rows, size: int):
+    """Agrupa un iterable en listas de ``size`` elementos."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_schema(cursor) -> None:
+    """Crea las tablas (si no existen) en la BD seleccionada."""
+    for statement in SCHEMA_STATEMENTS:
+        cursor.execute(statement)
+
+
+def seed_database(conn, spec: SyntheticSpec, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Inserta el conjunto sintético en la BD de ``conn`` (tablas vacías).
+
+    Usa ``executemany``, que pymysql convierte en INSERTs de varias filas.
+    Las categorías van primero para cumplir la FK.
+
+    Returns:
+        Filas insertadas por tabla.
+    """
+    with conn.cursor() as cur:
+        create_schema(cur)
+        cur.executemany(
+            "INSERT INTO categorias (nombre, mostrar_en_graficas, incluir_en_resumen) "
+            "VALUES (%s, %s, %s)",
+            [(c["nombre"], c["mostrar_en_graficas"], c["incluir_en_resumen"])
+             for c in generate_categorias(spec)])
+        presupuestos = generate_presupuestos(spec)
+        cur.executemany(
+            "INSERT INTO presupuesto (mes, anio, monto, fecha_cambio) VALUES (%s, %s, %s, %s)",
+            presupuestos)
+        total = 0
+        for batch in batched(generate_gastos(spec), batch_size):
+            cur.executemany(
+                "INSERT INTO gastos (categoria, descripcion, monto, mes, anio) "
+                "VALUES (%s, %s, %s, %s, %s)", batch)
+            conn.commit()
+            total += len(batch)
+    conn.commit()
+    return {"categorias": spec.categorias, "presupuesto": len(presupuestos), "gastos": total}
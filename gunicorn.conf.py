@@ -0,0 +1,39 @@
+"""
+Configuración de gunicorn.
+
+Uso:
+    gunicorn -c gunicorn.conf.py "app:create_app('production')"
+
+Con ``preload_app`` (``GUNICORN_PRELOAD``, activo por defecto) la app se
+crea una vez en el master antes de crear los workers: la verificación de la
+BD (``ensure_database_exists``) y las importaciones se hacen una sola vez y
+los workers las heredan con el fork. El pool de conexiones y el escritor de
+logs se reinician en cada worker tras el fork.
+
+Con ``METRICS_MULTIPROC_DIR`` las métricas de /metrics se agregan entre
+workers (ver app/metrics.py): el directorio se vacía al arrancar el master
+y los ficheros de cada worker muerto se marcan para que no cuenten.
+"""
+import glob
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+def on_starting(server):
+    """Limpia métricas de una ejecución anterior antes de crear los workers."""
+    multiproc_dir = os.getenv("METRICS_MULTIPROC_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+
+
+def child_exit(server, worker):
+    """Descarta los gauges del worker que ha terminado."""
+    from app.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -1,15 +1,390 @@
 """
 Script para restaurar un backup de la base de datos.
+
+El volcado (mysqldump, ``.sql`` o ``.sql.gz``) se lee en streaming por
+bloques y un tokenizador SQL lo parte en sentencias respetando cadenas,
+identificadores entre comillas invertidas, comentarios y ``DELIMITER``: un
+``;`` dentro de un dato no corta la sentencia y la memoria no depende del
+tamaño del volcado, solo de la sentencia más larga (los INSERT extendidos de
+mysqldump rondan 1 MB).
+
+Las sentencias se ejecutan en transacciones de ``--batch-size`` sentencias
+o ``--batch-mb`` MB, con ``FOREIGN_KEY_CHECKS`` y ``UNIQUE_CHECKS``
+desactivados en la sesión mientras dura la carga. Cada pocos segundos se
+muestra el avance (bytes del fichero leídos; comprimidos si es .gz), el
+ritmo y el tiempo estimado restante.
+
+La BD destino es ``--db-name`` (por defecto ``DB_NAME``). Las sentencias
+``USE`` y ``CREATE DATABASE`` del volcado se ignoran para no escribir en
+otra BD.
+
+Uso:
+    python restore_backup.py scripts/backups/daily/economia_db_daily_2025-10-30_08-33-30.sql.gz
+    python restore_backup.py backup.sql --db-name economia_db_copia --create-database
+    python restore_backup.py            # Backup diario más reciente
 """
-import pymysql
+import argparse
+import codecs
+import glob
 import gzip
-import sys
+import io
 import os
+import re
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pymysql
+
+from app.chart_cache import bump_stamp, default_stamp_file
 from app.config import DefaultConfig
 
+BACKUPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'backups', 'daily')
+GZIP_MAGIC = b'\x1f\x8b'
+CHUNK_SIZE = 1024 * 1024              # Caracteres leídos por bloque
+ENCODING_SAMPLE = 1024 * 1024         # Bytes para detectar la codificación
+DEFAULT_BATCH_SIZE = 200              # Sentencias por transacción
+DEFAULT_BATCH_MB = 16                 # MB de SQL por transacción
+MAX_ERRORS_SHOWN = 5
+
+# Sentencias del volcado que cambiarían la BD destino
+_SKIPPED = re.compile(r'(?:USE\s|CREATE\s+(?:DATABASE|SCHEMA)\b)', re.IGNORECASE)
+# Sentencia formada solo por comentarios /* */ normales (no /*! condicionales)
+_COMMENT_ONLY = re.compile(r'(?:\s*/\*(?!!).*?\*/)*\s*', re.DOTALL)
+
+
+# ==========================
+# Tokenizador
+# ==========================
+
+class SqlStatementSplitter:
+    """
+    Parte texto SQL en sentencias; se alimenta por bloques.
+
+    ``feed(texto)`` devuelve las sentencias completas encontradas y
+    ``close()`` la última (aunque no lleve delimitador). Un bloque puede
+    cortar por cualquier sitio: lo que aún no se puede decidir (una cadena
+    sin cerrar, un ``-`` final...) espera al siguiente bloque.
+
+    Se descartan los comentarios ``-- `` y ``#``; los ``/* */`` se conservan
+    porque mysqldump usa ``/*!40101 ... */`` como sentencias condicionales.
+    Admite ``DELIMITER`` (volcados con triggers o rutinas).
+    """
+
+    def __init__(self, delimiter: str = ';'):
+        self._buf = ''
+        self._pos = 0          # Siguiente carácter por examinar
+        self._seg = 0          # Inicio del trozo pendiente de la sentencia actual
+        self._parts: List[str] = []  # Trozos ya cerrados de la sentencia (sin comentarios)
+        self._at_start = True  # Sentencia actual vacía hasta ahora
+        self._set_delimiter(delimiter)
+
+    def _set_delimiter(self, delimiter: str) -> None:
+        self.delimiter = delimiter
+        especiales = '\'"`#/-' + delimiter[0]
+        # Tramo sin nada que decidir: texto normal, cadenas completas y
+        # '-' o '/' que no abren comentario (números negativos, divisiones)
+        operadores = r'|-(?=[^-])|/(?=[^*])' if delimiter[0] not in '-/' else ''
+        self._run = re.compile(
+            '(?:[^' + re.escape(especiales) + ']+'
+            r"|'[^'\\]*(?:\\.[^'\\]*)*'"
+            r'|"[^"\\]*(?:\\.[^"\\]*)*"'
+            r'|`[^`]*`' + operadores + ')*',
+            re.DOTALL)
+
+    def feed(self, text: str) -> List[str]:
+        if self._seg:
+            self._buf = self._buf[self._seg:]
+            self._pos -= self._seg
+            self._seg = 0
+        self._buf += text
+        return list(self._scan(final=False))
+
+    def close(self) -> List[str]:
+        statements = list(self._scan(final=True))
+        last = self._take(len(self._buf))
+        if last:
+            statements.append(last)
+        self._buf, self._pos, self._seg, self._at_start = '', 0, 0, True
+        return statements
+
+    def _take(self, end: int) -> Optional[str]:
+        """Cierra la sentencia actual en ``end``; None si solo eran comentarios."""
+        statement = (''.join(self._parts) + self._buf[self._seg:end]).strip()
+        self._parts = []
+        if not statement or _COMMENT_ONLY.fullmatch(statement):
+            return None
+        return statement
+
+    def _skip_line_comment(self, start: int, final: bool) -> bool:
+        """Salta un comentario hasta fin de línea; False si hay que esperar más texto."""
+        eol = self._buf.find('\n', start)
+        if eol == -1:
+            if not final:
+                return False
+            eol = len(self._buf)
+        self._parts.append(self._buf[self._seg:start])
+        self._pos = self._seg = eol
+        return True
+
+    def _is_line_comment(self, i: int) -> Optional[bool]:
+        """True/False si en ``i`` empieza un comentario de línea; None si falta texto."""
+        buf = self._buf
+        if buf[i] == '#':
+            return True
+        if buf[i] != '-':
+            return False
+        if i + 2 >= len(buf):
+            return None
+        # MySQL exige espacio (o control) tras "--"
+        return buf[i + 1] == '-' and buf[i + 2] in ' \t\r\n'
+
+    def _scan(self, final: bool) -> Iterator[str]:
+        buf = self._buf
+        n = len(buf)
+        while self._pos < n:
+            if self._at_start:
+                # Espacios y comentarios iniciales; luego, posible DELIMITER
+                i = self._pos
+                while i < n and buf[i].isspace():
+                    i += 1
+                self._pos = self._seg = i
+                if i == n:
+                    return
+                comentario = self._is_line_comment(i)
+                if comentario is None and not final:
+                    return
+                if comentario:
+                    if not self._skip_line_comment(i, final):
+                        return
+                    continue
+                cabecera = buf[i:i + 10]
+                if len(cabecera) < 10 and not final and 'DELIMITER '.startswith(cabecera.upper()):
+                    return
+                if cabecera[:9].upper() == 'DELIMITER' and cabecera[9:10].isspace():
+                    eol = buf.find('\n', i)
+                    if eol == -1 and not final:
+                        return
+                    eol = n if eol == -1 else eol
+                    palabras = buf[i:eol].split()
+                    if len(palabras) > 1:
+                        self._set_delimiter(palabras[1])
+                    self._pos = self._seg = eol
+                    continue
+                self._at_start = False
+
+            i = self._run.match(buf, self._pos).end()
+            if i >= n:
+                self._pos = n
+                return
+            c = buf[i]
+            d = self.delimiter
+            if c == d[0] and buf.startswith(d, i):
+                statement = self._take(i)
+                self._pos = self._seg = i + len(d)
+                self._at_start = True
+                if statement:
+                    yield statement
+            elif c == d[0] and not final and n - i < len(d) and d.startswith(buf[i:]):
+                self._pos = i
+                return
+            elif c in '\'"`':
+                # Cadena sin cerrar: esperar al siguiente bloque
+                self._pos = n if final else i
+                return
+            elif c in '-#':
+                comentario = self._is_line_comment(i)
+                if comentario is None and not final:
+                    self._pos = i
+                    return
+                if comentario:
+                    if not self._skip_line_comment(i, final):
+                        self._pos = i
+                        return
+                else:
+                    self._pos = i + 1
+            elif c == '/':
+                if i + 1 >= n and not final:
+                    self._pos = i
+                    return
+                if buf.startswith('/*', i):
+                    fin = buf.find('*/', i + 2)
+                    if fin == -1:
+                        self._pos = n if final else i
+                        if not final:
+                            return
+                    else:
+                        self._pos = fin + 2
+                else:
+                    self._pos = i + 1
+            else:
+                self._pos = i + 1
+
+
+def iter_statements(stream, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Sentencias de un fichero de texto, leyéndolo por bloques."""
+    splitter = SqlStatementSplitter()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+
+# ==========================
+# Lectura del volcado
+# ==========================
+
+def detect_encoding(sample: bytes) -> str:
+    """utf-8 si la muestra es UTF-8 válido; si no, latin-1 (acepta cualquier byte)."""
+    try:
+        # final=False: la muestra puede cortar un carácter multibyte
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def open_dump(path: str, encoding: Optional[str] = None) -> Tuple[io.TextIOWrapper, object, str]:
+    """
+    Abre un volcado, comprimido con gzip o no.
+
+    Returns:
+        (texto, fichero en disco para medir el avance con ``tell()``, codificación).
+    """
+    raw = open(path, 'rb')
+    try:
+        binary = gzip.GzipFile(fileobj=raw) if raw.read(2) == GZIP_MAGIC else raw
+        raw.seek(0)
+        if encoding is None:
+            encoding = detect_encoding(binary.read(ENCODING_SAMPLE))
+            binary.seek(0)
+        # newline='': no traducir \r\n dentro de los datos
+        return io.TextIOWrapper(binary, encoding=encoding, newline=''), raw, encoding
+    except Exception:
+        raw.close()
+        raise
+
+
+# ==========================
+# Ejecución
+# ==========================
+
+def _format_bytes(n: float) -> str:
+    for unidad in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unidad == 'GB':
+            return f"{n:.0f} {unidad}" if unidad == 'B' else f"{n:.1f} {unidad}"
+        n /= 1024
 
-def restore_backup(backup_file):
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+class Progress:
+    """Avance de la restauración: porcentaje del fichero, ritmo y tiempo restante."""
+
+    def __init__(self, total_bytes: int, every: float = 2.0):
+        self.total_bytes = total_bytes
+        self.every = every
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def line(self, read_bytes: int, statements: int) -> str:
+        elapsed = max(self.elapsed(), 1e-9)
+        ritmo = read_bytes / elapsed
+        fraccion = read_bytes / self.total_bytes if self.total_bytes else 1.0
+        eta = (self.total_bytes - read_bytes) / ritmo if ritmo else 0
+        return (f"  {fraccion:>6.1%}  {_format_bytes(read_bytes)} / {_format_bytes(self.total_bytes)}"
+                f"  |  {statements:,} sentencias ({statements / elapsed:,.0f}/s)"
+                f"  |  {_format_bytes(ritmo)}/s  |  ETA {_format_duration(eta)}")
+
+    def update(self, read_bytes: int, statements: int) -> None:
+        now = time.perf_counter()
+        if now - self._last >= self.every:
+            self._last = now
+            print(self.line(read_bytes, statements), flush=True)
+
+
+def restore_statements(conn, statements: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                       batch_bytes: int = DEFAULT_BATCH_MB * 1024 * 1024,
+                       on_statement=None, stop_on_error: bool = False) -> Dict[str, int]:
+    """
+    Ejecuta ``statements`` en transacciones de ``batch_size`` sentencias o
+    ``batch_bytes`` bytes de SQL, con las comprobaciones de claves foráneas
+    y unicidad desactivadas en la sesión.
+
+    Los errores se cuentan y se sigue con la siguiente sentencia, salvo con
+    ``stop_on_error`` (deshace el lote en curso y relanza el error).
+
+    Args:
+        on_statement: Llamada tras cada sentencia con el número ejecutadas.
+
+    Returns:
+        Sentencias ejecutadas, con error, ignoradas (``USE``/``CREATE
+        DATABASE``) y commits.
+    """
+    resumen = {'executed': 0, 'errors': 0, 'skipped': 0, 'commits': 0}
+    lote_sentencias = lote_bytes = 0
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("SET SESSION unique_checks = 0")
+        for numero, statement in enumerate(statements, 1):
+            if _SKIPPED.match(statement):
+                resumen['skipped'] += 1
+                if resumen['skipped'] == 1:
+                    print(f"ℹ️  Ignorando sentencias que cambian de BD: {statement[:60]}")
+                continue
+            try:
+                cursor.execute(statement)
+                resumen['executed'] += 1
+            except pymysql.Error as e:
+                resumen['errors'] += 1
+                if stop_on_error:
+                    conn.rollback()
+                    raise
+                if resumen['errors'] <= MAX_ERRORS_SHOWN:
+                    print(f"⚠️  Error en sentencia {numero} ({statement[:60]}...): {e}")
+            lote_sentencias += 1
+            lote_bytes += len(statement)
+            if lote_sentencias >= batch_size or lote_bytes >= batch_bytes:
+                conn.commit()
+                resumen['commits'] += 1
+                lote_sentencias = lote_bytes = 0
+            if on_statement is not None:
+                on_statement(resumen['executed'])
+        conn.commit()
+        resumen['commits'] += 1
+    finally:
+        try:
+            cursor.execute("SET SESSION unique_checks = 1")
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+        finally:
+            cursor.close()
+    return resumen
+
+
+def _invalidate_chart_cache() -> None:
+    """Invalida la caché de gráficos de los workers (contador compartido de chart_cache)."""
+    bump_stamp(DefaultConfig.CHART_CACHE_STAMP_FILE or default_stamp_file())
+
+
+def restore_backup(backup_file, database: Optional[str] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, batch_mb: float = DEFAULT_BATCH_MB,
+                   create_database: bool = False, encoding: Optional[str] = None,
+                   stop_on_error: bool = False) -> bool:
     """Restaura un backup de la base de datos."""
+    database = database or DefaultConfig.DB_NAME
     print(f"🔄 Restaurando backup desde: {backup_file}")
 
     # Verificar que el archivo existe
@@ -23,86 +398,101 @@ def restore_backup(backup_file):
             host=DefaultConfig.DB_HOST,
             user=DefaultConfig.DB_USER,
             password=DefaultConfig.DB_PASSWORD,
-            port=DefaultConfig.DB_PORT
+            port=DefaultConfig.DB_PORT,
+            charset='utf8mb4',
+            autocommit=False,
         )
     except Exception as e:
         print(f"❌ Error conectando a MySQL: {e}")
         return False
 
-    cursor = conn.cursor()
-
-    # Seleccionar la base de datos
-    try:
-        cursor.execute("USE economia_db;")
-        print("✓ Base de datos seleccionada")
-    except Exception as e:
-        print(f"❌ Error seleccionando BD: {e}")
-        return False
-
-    # Leer el archivo comprimido o sin comprimir
     try:
-        print("📖 Leyendo archivo de backup...")
-        # Intentar primero como gzip
+        # Seleccionar la base de datos
+        nombre = database.replace('`', '``')
         try:
-            with gzip.open(backup_file, 'rt', encoding='utf-8') as f:
-                sql_content = f.read()
-            print(
-                f"✓ Archivo gzip leído correctamente ({len(sql_content)} caracteres)")
-        except (gzip.BadGzipFile, OSError):
-            # Si falla, intentar como archivo de texto plano con diferentes encodings
-            print("ℹ️  No es gzip, intentando como texto plano...")
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            for enc in encodings:
-                try:
-                    with open(backup_file, 'r', encoding=enc) as f:
-                        sql_content = f.read()
-                    print(
-                        f"✓ Archivo de texto leído correctamente con {enc} ({len(sql_content)} caracteres)")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                raise ValueError(
-                    "No se pudo decodificar el archivo con ningún encoding")
-    except Exception as e:
-        print(f"❌ Error leyendo archivo: {e}")
-        return False
-
-    # Ejecutar cada comando SQL
-    print("⚙️  Ejecutando comandos SQL...")
-    commands = [cmd.strip() for cmd in sql_content.split(';\n') if cmd.strip()]
-    total = len(commands)
-    print(f"Total de comandos a ejecutar: {total}")
+            with conn.cursor() as cursor:
+                if create_database:
+                    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{nombre}` "
+                                   "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+                cursor.execute(f"USE `{nombre}`")
+            print(f"✓ Base de datos seleccionada: {database}")
+        except pymysql.Error as e:
+            print(f"❌ Error seleccionando BD: {e}")
+            return False
 
-    ejecutados = 0
-    errores = 0
+        try:
+            stream, raw, encoding = open_dump(backup_file, encoding)
+        except (OSError, LookupError) as e:
+            print(f"❌ Error leyendo archivo: {e}")
+            return False
 
-    for i, command in enumerate(commands, 1):
+        total = os.path.getsize(backup_file)
+        print(f"📖 Leyendo {_format_bytes(total)} ({'gzip, ' if raw is not stream.buffer else ''}"
+              f"{encoding}) en lotes de {batch_size} sentencias / {batch_mb:g} MB")
+        progress = Progress(total)
         try:
-            cursor.execute(command)
-            ejecutados += 1
-            if i % 50 == 0:
-                print(
-                    f"  Progreso: {i}/{total} comandos ({ejecutados} ok, {errores} errores)")
+            with stream:
+                resumen = restore_statements(
+                    conn, iter_statements(stream), batch_size=batch_size,
+                    batch_bytes=int(batch_mb * 1024 * 1024),
+                    on_statement=lambda ejecutadas: progress.update(raw.tell(), ejecutadas),
+                    stop_on_error=stop_on_error)
+        except UnicodeDecodeError as e:
+            print(f"❌ El archivo no es {encoding} válido ({e}); prueba con --encoding")
+            return False
+        except (OSError, EOFError) as e:
+            print(f"❌ Error leyendo archivo: {e}")
+            return False
         except pymysql.Error as e:
-            errores += 1
-            if errores <= 5:  # Solo mostrar los primeros 5 errores
-                print(f"⚠️  Error en comando {i}: {e}")
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+            print(f"❌ Restauración detenida: {e}")
+            return False
+    finally:
+        conn.close()
 
-    print(
-        f"\n✅ Restauración completada: {ejecutados} comandos ejecutados, {errores} errores")
+    _invalidate_chart_cache()
+    duracion = progress.elapsed()
+    print(progress.line(total, resumen['executed']))
+    print(f"\n✅ Restauración completada en {_format_duration(duracion)}: "
+          f"{resumen['executed']:,} sentencias ejecutadas, {resumen['errors']} errores, "
+          f"{resumen['commits']} commits")
     return True
 
 
-if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        backup_file = sys.argv[1]
-    else:
-        # Usar el backup más reciente
-        backup_file = 'scripts/backups/daily/economia_db_daily_2025-10-30_08-33-30.sql.gz'
+def latest_backup(directory: str = BACKUPS_DIR) -> Optional[str]:
+    """Backup .sql / .sql.gz más reciente de ``directory``."""
+    candidatos = glob.glob(os.path.join(directory, '*.sql')) + glob.glob(os.path.join(directory, '*.sql.gz'))
+    return max(candidatos, key=os.path.getmtime) if candidatos else None
+
 
-    restore_backup(backup_file)
+def _parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Restaura un backup (.sql o .sql.gz) de la BD.")
+    parser.add_argument("backup_file", nargs="?",
+                        help="Fichero de backup (por defecto, el diario más reciente)")
+    parser.add_argument("--db-name", "--database", dest="db_name", default=DefaultConfig.DB_NAME,
+                        help=f"BD destino (por defecto: {DefaultConfig.DB_NAME})")
+    parser.add_argument("--create-database", action="store_true",
+                        help="Crear la BD destino si no existe")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Sentencias por transacción")
+    parser.add_argument("--batch-mb", type=float, default=DEFAULT_BATCH_MB,
+                        help="MB de SQL por transacción")
+    parser.add_argument("--encoding", help="Codificación del volcado (por defecto, detectarla)")
+    parser.add_argument("--stop-on-error", action="store_true",
+                        help="Detener en el primer error en lugar de continuar")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    backup_file = args.backup_file or latest_backup()
+    if backup_file is None:
+        print(f"❌ No hay backups en {BACKUPS_DIR}")
+        return 1
+    ok = restore_backup(backup_file, database=args.db_name, batch_size=args.batch_size,
+                        batch_mb=args.batch_mb, create_database=args.create_database,
+                        encoding=args.encoding, stop_on_error=args.stop_on_error)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
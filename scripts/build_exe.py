@@ -148,7 +148,11 @@ def build_executable(exe_name='GastosApp', icon_path='static/calc.ico'):
             '--hidden-import', 'cryptography.hazmat.primitives.asymmetric.rsa',
             '--hidden-import', 'cryptography.hazmat.primitives.asymmetric.padding',
             '--hidden-import', 'plotly',
+            '--collect-data', 'plotly',  # plotly.min.js servido por /assets
             '--hidden-import', 'pandas',
+            # Se importan en diferido (app/lazy_imports.py): PyInstaller no los ve
+            '--hidden-import', 'plotly.graph_objects',
+            '--hidden-import', 'numpy',
             '--hidden-import', 'dotenv',
             '--collect-all', 'cryptography',
             '--exclude-module', 'pytest',
@@ -0,0 +1,320 @@
+"""
+Carga masiva de datos sintéticos para pruebas de carga a escala de producción.
+
+Genera categorías, histórico de presupuestos y gastos con el generador de
+``benchmarks/synthetic.py`` (misma semilla = mismos datos) y los inserta en
+bloque, en lugar de un ``add_gasto`` (conexión + commit) por fila:
+
+- ``--method insert`` (por defecto): ``executemany`` de pymysql, que envía
+  INSERTs de varias filas (``--batch-size`` filas por commit).
+- ``--method load-data``: ``LOAD DATA LOCAL INFILE`` desde ficheros TSV
+  temporales de ``--batch-size`` filas (requiere ``local_infile=ON`` en el
+  servidor).
+
+Durante la carga se eliminan los índices secundarios de ``gastos`` y al final
+se recrean en un único ``ALTER TABLE`` (``--keep-indexes`` lo evita). Se
+conserva el índice que usa la FK ``gastos.categoria -> categorias.nombre``,
+que sigue comprobándose: las categorías se insertan antes que los gastos.
+
+Uso:
+    python scripts/load_synthetic_data.py --db-name gastos_carga --size 1m
+    python scripts/load_synthetic_data.py --db-name gastos_carga --gastos 250000 \\
+        --anios 10 --categorias 30 --method load-data --truncate
+
+Seguridad:
+- Requiere confirmación interactiva salvo --force.
+- --truncate vacía las tablas; se niega sobre la BD de la aplicación (DB_NAME).
+- Sobre la BD de la aplicación siempre se conservan los índices y
+  ``unique_checks`` (como con --keep-indexes).
+- El histórico de presupuesto solo se carga si la tabla está vacía (no tiene
+  clave única: repetir la carga lo duplicaría).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pymysql
+
+# Asegurar que se pueda importar `app` y `benchmarks` al ejecutar desde scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.config import DefaultConfig  # noqa: E402
+from benchmarks.synthetic import (  # noqa: E402
+    SIZES, SyntheticSpec, batched, create_schema, generate_categorias,
+    generate_gastos, generate_presupuestos,
+)
+
+GASTOS_COLUMNS = ("categoria", "descripcion", "monto", "mes", "anio")
+INSERT_GASTOS = (f"INSERT INTO gastos ({', '.join(GASTOS_COLUMNS)}) "
+                 "VALUES (%s, %s, %s, %s, %s)")
+
+
+# ==========================
+# Índices secundarios
+# ==========================
+
+def secondary_indexes(cursor, schema: str, table: str = "gastos") -> Dict[str, List[str]]:
+    """Índices secundarios no únicos de ``table``: {nombre: [columnas en orden]}."""
+    cursor.execute(
+        """
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s
+          AND INDEX_NAME <> 'PRIMARY' AND NON_UNIQUE = 1
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """,
+        (schema, table),
+    )
+    indexes: Dict[str, List[str]] = {}
+    for row in cursor.fetchall():
+        indexes.setdefault(row["INDEX_NAME"], []).append(row["COLUMN_NAME"])
+    return indexes
+
+
+def indexes_to_drop(indexes: Dict[str, List[str]], fk_column: str = "categoria") -> Dict[str, List[str]]:
+    """
+    Elige qué índices se pueden eliminar durante la carga.
+
+    InnoDB exige un índice que empiece por la columna de la FK: se conserva el
+    más estrecho de los que cumplen (menos columnas, que cuesta menos mantener).
+    """
+    fk_candidates = sorted((len(cols), name) for name, cols in indexes.items()
+                           if cols and cols[0] == fk_column)
+    keep = fk_candidates[0][1] if fk_candidates else None
+    return {name: cols for name, cols in indexes.items() if name != keep}
+
+
+def drop_indexes(cursor, indexes: Dict[str, List[str]], table: str = "gastos") -> None:
+    """Elimina los índices en un solo ALTER TABLE."""
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} "
+                       + ", ".join(f"DROP INDEX `{name}`" for name in indexes))
+
+
+def rebuild_indexes(cursor, indexes: Dict[str, List[str]], table: str = "gastos") -> None:
+    """Recrea los índices en un solo ALTER TABLE (una pasada sobre la tabla)."""
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(
+            f"ADD INDEX `{name}` ({', '.join(f'`{c}`' for c in cols)})"
+            for name, cols in indexes.items()))
+
+
+# ==========================
+# Carga
+# ==========================
+
+def tsv_line(row: Sequence) -> str:
+    """Fila en el formato por defecto de LOAD DATA (tabulador, escape con ``\\``)."""
+    def field(value):
+        if value is None:
+            return "\\N"
+        return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+    return "\t".join(field(v) for v in row) + "\n"
+
+
+class Progress:
+    """Informe de filas por segundo durante la carga."""
+
+    def __init__(self, total: int, every: float = 2.0):
+        self.total = total
+        self.every = every
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def add(self, rows: int) -> None:
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self._last >= self.every or self.rows >= self.total:
+            self._last = now
+            print(f"   {self.rows:>12,} / {self.total:,} gastos  "
+                  f"({self.rate():,.0f} filas/s)", flush=True)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self) -> float:
+        return self.rows / max(self.elapsed(), 1e-9)
+
+
+def load_gastos_insert(conn, rows: Iterable[Tuple], batch_size: int, progress: Progress) -> None:
+    """Inserta con INSERTs de varias filas, un commit por lote."""
+    with conn.cursor() as cur:
+        for batch in batched(rows, batch_size):
+            cur.executemany(INSERT_GASTOS, batch)
+            conn.commit()
+            progress.add(len(batch))
+
+
+def load_gastos_infile(conn, rows: Iterable[Tuple], batch_size: int, progress: Progress) -> None:
+    """Carga con LOAD DATA LOCAL INFILE, un fichero temporal y un commit por lote."""
+    sql = (f"LOAD DATA LOCAL INFILE %s INTO TABLE gastos "
+           f"CHARACTER SET utf8mb4 ({', '.join(GASTOS_COLUMNS)})")
+    with conn.cursor() as cur:
+        for batch in batched(rows, batch_size):
+            fd, path = tempfile.mkstemp(prefix="gastos_", suffix=".tsv")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                    f.writelines(tsv_line(row) for row in batch)
+                cur.execute(sql, (path,))
+                conn.commit()
+            finally:
+                os.remove(path)
+            progress.add(len(batch))
+
+
+def load(params: Dict, spec: SyntheticSpec, method: str = "insert", batch_size: int = 10_000,
+         truncate: bool = False, keep_indexes: bool = False) -> Dict[str, float]:
+    """
+    Carga el conjunto sintético en la BD de ``params``.
+
+    Returns:
+        Resumen: filas por tabla, segundos de carga y de reconstrucción de
+        índices, y filas por segundo.
+    """
+    if params["database"] == DefaultConfig.DB_NAME:
+        keep_indexes = True  # Nunca dejar la BD de la aplicación sin índices ni comprobaciones
+    server = pymysql.connect(**{k: v for k, v in params.items() if k != "database"})
+    try:
+        with server.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS `{params['database']}` "
+                        "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    finally:
+        server.close()
+
+    conn = pymysql.connect(**params, cursorclass=pymysql.cursors.DictCursor,
+                           local_infile=(method == "load-data"), autocommit=False)
+    dropped: Dict[str, List[str]] = {}
+    try:
+        with conn.cursor() as cur:
+            create_schema(cur)
+            if truncate:
+                cur.execute("DELETE FROM gastos")
+                cur.execute("DELETE FROM presupuesto")
+                cur.execute("DELETE FROM categorias")
+            # Las categorías existentes se conservan (INSERT IGNORE)
+            cur.executemany(
+                "INSERT IGNORE INTO categorias (nombre, mostrar_en_graficas, incluir_en_resumen) "
+                "VALUES (%s, %s, %s)",
+                [(c["nombre"], c["mostrar_en_graficas"], c["incluir_en_resumen"])
+                 for c in generate_categorias(spec)])
+            # presupuesto no tiene clave única: solo se carga el histórico si está vacía
+            cur.execute("SELECT COUNT(*) AS n FROM presupuesto")
+            presupuestos = generate_presupuestos(spec) if not cur.fetchone()["n"] else []
+            if presupuestos:
+                cur.executemany(
+                    "INSERT INTO presupuesto (mes, anio, monto, fecha_cambio) VALUES (%s, %s, %s, %s)",
+                    presupuestos)
+            else:
+                print("ℹ️  presupuesto ya tiene datos: no se añade el histórico sintético")
+            conn.commit()
+
+            if not keep_indexes:
+                dropped = indexes_to_drop(secondary_indexes(cur, params["database"]))
+                drop_indexes(cur, dropped)
+                print(f"🔧 Índices eliminados durante la carga: {', '.join(dropped) or '-'}")
+                # Datos generados: no hay duplicados que comprobar
+                cur.execute("SET SESSION unique_checks = 0")
+
+        print(f"📥 Cargando {spec.gastos:,} gastos ({method}, lotes de {batch_size:,})")
+        progress = Progress(spec.gastos)
+        loader = load_gastos_infile if method == "load-data" else load_gastos_insert
+        loader(conn, generate_gastos(spec), batch_size, progress)
+        load_seconds = progress.elapsed()
+    finally:
+        rebuild_started = time.perf_counter()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET SESSION unique_checks = 1")
+                if dropped:
+                    print("🔧 Reconstruyendo índices...")
+                    rebuild_indexes(cur, dropped)
+        finally:
+            conn.close()
+        rebuild_seconds = time.perf_counter() - rebuild_started
+
+    return {
+        "categorias": spec.categorias,
+        "presupuesto": len(presupuestos),
+        "gastos": progress.rows,
+        "load_seconds": round(load_seconds, 2),
+        "rebuild_seconds": round(rebuild_seconds, 2),
+        "rows_per_second": round(progress.rows / max(load_seconds + rebuild_seconds, 1e-9)),
+    }
+
+
+def _parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Carga masiva de datos sintéticos (gastos, categorías, presupuestos).")
+    parser.add_argument("--db-name", required=True, help="BD destino")
+    parser.add_argument("--size", choices=sorted(SIZES), default="100k",
+                        help="Volumen de gastos (10k, 100k, 1m)")
+    parser.add_argument("--gastos", type=int, help="Número exacto de gastos (sustituye a --size)")
+    parser.add_argument("--anios", type=int, default=10, help="Años de histórico")
+    parser.add_argument("--categorias", type=int, default=15, help="Número de categorías")
+    parser.add_argument("--descripciones", type=int, default=30, help="Descripciones por categoría")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos")
+    parser.add_argument("--method", choices=("insert", "load-data"), default="insert",
+                        help="INSERT de varias filas o LOAD DATA LOCAL INFILE")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Filas por lote/commit")
+    parser.add_argument("--truncate", action="store_true", help="Vaciar las tablas antes de cargar")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="No eliminar/recrear los índices secundarios")
+    parser.add_argument("--force", action="store_true", help="Omitir confirmación interactiva")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    spec = SyntheticSpec(gastos=args.gastos or SIZES[args.size], anios=args.anios,
+                         categorias=args.categorias, descripciones=args.descripciones,
+                         seed=args.seed)
+
+    if args.truncate and args.db_name == DefaultConfig.DB_NAME:
+        print(f"❌ --truncate sobre la BD de la aplicación ({args.db_name}) no está permitido.")
+        sys.exit(1)
+    if args.db_name == DefaultConfig.DB_NAME and not args.keep_indexes:
+        print(f"ℹ️  BD de la aplicación ({args.db_name}): se conservan los índices (--keep-indexes).")
+        args.keep_indexes = True
+
+    print("\n" + "=" * 70)
+    print("📦 CARGA MASIVA DE DATOS SINTÉTICOS")
+    print("=" * 70)
+    print(f"\nBD destino: {args.db_name}")
+    print(f"Gastos: {spec.gastos:,} | Años: {spec.anios} | Categorías: {spec.categorias} "
+          f"| Semilla: {spec.seed}")
+
+    if not args.force:
+        confirm = input("\n¿Continuar? Escribe 'SI' para confirmar: ").strip()
+        if confirm != "SI":
+            print("❌ Operación cancelada.")
+            sys.exit(0)
+
+    params = {
+        "host": DefaultConfig.DB_HOST,
+        "user": DefaultConfig.DB_USER,
+        "password": DefaultConfig.DB_PASSWORD,
+        "port": DefaultConfig.DB_PORT,
+        "database": args.db_name,
+    }
+    try:
+        resumen = load(params, spec, method=args.method, batch_size=args.batch_size,
+                       truncate=args.truncate, keep_indexes=args.keep_indexes)
+    except pymysql.Error as e:
+        print(f"\n❌ Error de base de datos: {e}")
+        sys.exit(1)
+
+    print(f"\n✅ {resumen['gastos']:,} gastos, {resumen['presupuesto']} presupuestos, "
+          f"{resumen['categorias']} categorías")
+    print(f"   Carga: {resumen['load_seconds']}s | Índices: {resumen['rebuild_seconds']}s "
+          f"| {resumen['rows_per_second']:,} filas/s")
+
+
+if __name__ == "__main__":
+    main()
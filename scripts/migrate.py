@@ -1,71 +1,51 @@
 """
 Runner seguro de migraciones no destructivas para el repositorio público.
 
-Ejecuta scripts de migrations/ en orden secuencial (001_, 002_, ...).
+Ejecuta los scripts de migrations/ en orden secuencial (001_, 002_, ...)
+dentro de este mismo proceso y con una sola conexión (ver app/migrations.py).
+Las migraciones aplicadas quedan registradas en la tabla ``schema_migrations``
+(con checksum y duración) y se saltan en las siguientes ejecuciones.
+
 Flags:
   --dry-run: muestra qué haría sin ejecutar.
   --db-name: selecciona BD objetivo (por defecto: DefaultConfig.DB_NAME).
   --force: omite confirmación interactiva.
+  --status: lista las migraciones aplicadas y pendientes.
+  --lock-wait-timeout: segundos máximos esperando un bloqueo de metadatos.
 
 Seguridad:
 - Solo ejecuta archivos .py que empiecen con XXX_ (número).
 - Requiere confirmación interactiva salvo --force.
 - No hace DROP/TRUNCATE; las migraciones deben ser idempotentes.
 """
-import pymysql
-from app.config import DefaultConfig
 import argparse
-import os
 import sys
 from pathlib import Path
 
-# Ajustar path para importar app.config
+# Ajustar path para importar app
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+import pymysql  # noqa: E402
 
-def discover_migrations(migrations_dir: Path):
-    """Devuelve lista de scripts de migración ordenados por prefijo numérico."""
-    if not migrations_dir.exists():
-        return []
-    files = [
-        f for f in migrations_dir.iterdir()
-        if f.is_file() and f.suffix == ".py" and f.stem[0].isdigit()
-    ]
-    return sorted(files, key=lambda x: x.stem)
+from app.config import DefaultConfig  # noqa: E402
+from app.migrations import applied_migrations, discover_migrations, plan, run_migrations  # noqa: E402
 
+MIGRATIONS_DIR = ROOT / "scripts" / "migrations"
 
-def run_migration_script(script_path: Path, db_params: dict, dry_run: bool):
-    """Ejecuta un script de migración pasándole parámetros de BD como env vars."""
-    if dry_run:
-        print(f"[DRY-RUN] Would execute: {script_path.name}")
-        return
 
-    # Las migraciones se importan dinámicamente y llaman a su main()
-    # o bien se ejecutan como subprocess con env vars.
-    # Aquí usamos subprocess para evitar problemas de importación cíclica.
-    import subprocess
-    env = os.environ.copy()
-    env.update({
-        "DB_HOST": db_params["host"],
-        "DB_USER": db_params["user"],
-        "DB_PASSWORD": db_params["password"],
-        "DB_NAME": db_params["database"],
-        "DB_PORT": str(db_params["port"]),
-    })
-    result = subprocess.run(
-        [sys.executable, str(script_path)],
-        env=env,
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        print(f"❌ Error ejecutando {script_path.name}:")
-        print(result.stderr)
-        sys.exit(1)
-    else:
-        print(result.stdout)
+def print_status(conn, migrations) -> None:
+    """Tabla con el estado de cada migración."""
+    with conn.cursor() as cursor:
+        aplicadas = applied_migrations(cursor)
+    for m in migrations:
+        fila = aplicadas.get(m.version)
+        if fila is None:
+            print(f"  [PENDIENTE] {m.name}")
+        else:
+            aviso = "  ⚠️  checksum distinto" if fila["checksum"] != m.checksum else ""
+            print(f"  [APLICADA]  {m.name}  {fila['applied_at']}  {fila['duration_ms']} ms{aviso}")
 
 
 def main():
@@ -87,52 +67,73 @@ def main():
         action="store_true",
         help="Omitir confirmación interactiva.",
     )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Listar migraciones aplicadas y pendientes y salir.",
+    )
+    parser.add_argument(
+        "--lock-wait-timeout",
+        type=int,
+        default=30,
+        help="Segundos máximos esperando un bloqueo de metadatos (por defecto: 30).",
+    )
     args = parser.parse_args()
 
-    migrations_dir = ROOT / "scripts" / "migrations"
-    scripts = discover_migrations(migrations_dir)
-
-    if not scripts:
-        print("ℹ️  No hay migraciones pendientes en scripts/migrations/.")
+    migrations = discover_migrations(MIGRATIONS_DIR)
+    if not migrations:
+        print("ℹ️  No hay migraciones en scripts/migrations/.")
         return
 
-    print("\n" + "="*70)
-    print("🔄 RUNNER DE MIGRACIONES")
-    print("="*70)
-    print(f"\nBD objetivo: {args.db_name}")
-    print(
-        f"Modo: {'DRY-RUN (sin cambios)' if args.dry_run else 'EJECUCIÓN REAL'}")
-    print(f"\nMigraciones a ejecutar ({len(scripts)}):")
-    for s in scripts:
-        print(f"  - {s.name}")
-
-    if not args.dry_run and not args.force:
-        print("\n⚠️  Esto aplicará cambios no destructivos (CREATE INDEX, etc.).")
-        confirm = input("\n¿Continuar? Escribe 'SI' para confirmar: ").strip()
-        if confirm != "SI":
-            print("❌ Operación cancelada.")
-            sys.exit(0)
-
-    db_params = {
-        "host": DefaultConfig.DB_HOST,
-        "user": DefaultConfig.DB_USER,
-        "password": DefaultConfig.DB_PASSWORD,
-        "database": args.db_name,
-        "port": DefaultConfig.DB_PORT,
-    }
-
-    # Comprobar conectividad
-    if not args.dry_run:
+    try:
+        conn = pymysql.connect(
+            host=DefaultConfig.DB_HOST,
+            user=DefaultConfig.DB_USER,
+            password=DefaultConfig.DB_PASSWORD,
+            database=args.db_name,
+            port=DefaultConfig.DB_PORT,
+            cursorclass=pymysql.cursors.DictCursor,
+            connect_timeout=5,
+        )
+    except pymysql.Error as e:
+        print(f"\n❌ No se puede conectar a la BD: {e}")
+        sys.exit(1)
+
+    try:
+        if args.status:
+            print(f"\nMigraciones en {args.db_name}:")
+            print_status(conn, migrations)
+            return
+
+        with conn.cursor() as cursor:
+            pendientes, _ = plan(cursor, migrations)
+
+        print("\n" + "="*70)
+        print("🔄 RUNNER DE MIGRACIONES")
+        print("="*70)
+        print(f"\nBD objetivo: {args.db_name}")
+        print(
+            f"Modo: {'DRY-RUN (sin cambios)' if args.dry_run else 'EJECUCIÓN REAL'}")
+        print(f"\nMigraciones pendientes ({len(pendientes)} de {len(migrations)}):")
+        for m in pendientes:
+            print(f"  - {m.name}")
+
+        if pendientes and not args.dry_run and not args.force:
+            print("\n⚠️  Esto aplicará cambios no destructivos (CREATE INDEX, etc.).")
+            confirm = input("\n¿Continuar? Escribe 'SI' para confirmar: ").strip()
+            if confirm != "SI":
+                print("❌ Operación cancelada.")
+                sys.exit(0)
+
+        print("\n" + "-"*70)
         try:
-            conn = pymysql.connect(**db_params, connect_timeout=5)
-            conn.close()
+            run_migrations(conn, migrations, dry_run=args.dry_run,
+                           lock_wait_timeout=args.lock_wait_timeout)
         except pymysql.Error as e:
-            print(f"\n❌ No se puede conectar a la BD: {e}")
+            print(f"\n❌ Error aplicando migraciones: {e}")
             sys.exit(1)
-
-    print("\n" + "-"*70)
-    for script in scripts:
-        run_migration_script(script, db_params, args.dry_run)
+    finally:
+        conn.close()
 
     if args.dry_run:
         print("\n✅ DRY-RUN completo (sin cambios aplicados).")
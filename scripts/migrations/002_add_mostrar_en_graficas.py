@@ -7,15 +7,14 @@ se muestran en las gráficas de reportes.
 Por defecto, todas las categorías existentes se marcarán como visibles (TRUE),
 excepto 'Alquiler' que se marca como FALSE por ser un gasto fijo constante.
 """
+from app.migrations import add_column_online
 
 
 def up(cursor):
     """Aplicar migración: añadir columna mostrar_en_graficas."""
-    # Añadir columna con valor por defecto TRUE
-    cursor.execute("""
-        ALTER TABLE categorias
-        ADD COLUMN mostrar_en_graficas BOOLEAN NOT NULL DEFAULT TRUE
-    """)
+    if not add_column_online(cursor, "categorias", "mostrar_en_graficas",
+                             "BOOLEAN NOT NULL DEFAULT TRUE"):
+        return  # Ya aplicada: no volver a tocar 'Alquiler'
 
     # Marcar 'Alquiler' como no visible en gráficas (si existe)
     cursor.execute("""
@@ -23,16 +22,4 @@ def up(cursor):
         SET mostrar_en_graficas = FALSE
         WHERE nombre = 'Alquiler'
     """)
-
-    print("✓ Columna 'mostrar_en_graficas' añadida a tabla categorias")
-    print("✓ Categoría 'Alquiler' marcada como no visible en gráficas")
-
-
-def down(cursor):
-    """Revertir migración: eliminar columna mostrar_en_graficas."""
-    cursor.execute("""
-        ALTER TABLE categorias
-        DROP COLUMN mostrar_en_graficas
-    """)
-
-    print("✓ Columna 'mostrar_en_graficas' eliminada de tabla categorias")
+    print("[UPDATED] Categoria 'Alquiler' marcada como no visible en graficas")
@@ -0,0 +1,40 @@
+"""
+Añade la columna numérica `periodo` (AAAAMM) a `gastos` y `presupuesto`.
+
+El mes se guarda como VARCHAR ('Enero', ...), así que cualquier filtro u
+ordenación cronológica necesitaba `FIELD(mes, ...)`, que no puede usar índices.
+`periodo = anio * 100 + número de mes` convierte esos filtros en rangos
+(`periodo BETWEEN 202501 AND 202512`, `periodo <= 202510`) resolubles con
+un range scan sobre el índice.
+
+La columna es GENERATED ... STORED: MySQL la rellena para las filas existentes
+al añadirla y la mantiene en cada INSERT/UPDATE, sin tocar el código de escritura.
+Añadirla reescribe la tabla (no admite DDL online); los índices sí se crean
+online (ALGORITHM=INPLACE, LOCK=NONE).
+
+Índices:
+- idx_gastos_periodo (periodo)
+- idx_gastos_categoria_periodo (categoria, periodo)
+- idx_presupuesto_periodo (periodo)
+
+Seguro: consulta INFORMATION_SCHEMA antes de crear; no borra ni modifica datos.
+"""
+from app.constants import SQL_PERIODO_EXPR
+from app.migrations import add_column_online, add_index_online
+
+COLUMN_TABLES = ["gastos", "presupuesto"]
+
+INDEX_DEFS = [
+    ("gastos", "idx_gastos_periodo", "periodo"),
+    ("gastos", "idx_gastos_categoria_periodo", "categoria, periodo"),
+    ("presupuesto", "idx_presupuesto_periodo", "periodo"),
+]
+
+
+def up(cursor):
+    """Crear las columnas e índices que falten."""
+    for table in COLUMN_TABLES:
+        add_column_online(cursor, table, "periodo", f"INT AS ({SQL_PERIODO_EXPR}) STORED")
+
+    for table, name, columns in INDEX_DEFS:
+        add_index_online(cursor, table, name, columns)
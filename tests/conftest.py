@@ -3,8 +3,12 @@ Test configuration file
 """
 import os
 import sys
+from contextlib import contextmanager
+
 import pytest
 from app import create_app
+from app import database
+from app.instrumentation import add_query_listener, remove_query_listener
 
 # Añadir el directorio raíz al path para poder importar app
 sys.path.insert(0, os.path.abspath(
@@ -41,6 +45,13 @@ def client(app):  # noqa: F811
     return app.test_client()
 
 
+@pytest.fixture(autouse=True)
+def chart_cache_stamp(tmp_path, monkeypatch):
+    """Contador compartido de la caché de gráficos en un directorio temporal (no en logs/)."""
+    from app import chart_cache
+    monkeypatch.setattr(chart_cache, '_default_stamp', str(tmp_path / chart_cache.STAMP_FILENAME))
+
+
 @pytest.fixture
 def app_context(app):  # noqa: F811
     """
@@ -63,3 +74,69 @@ def app_context(app):  # noqa: F811
 def runner(app):  # noqa: F811
     """Fixture que provee un runner para ejecutar comandos CLI."""
     return app.test_cli_runner()
+
+
+class QueryCounter:
+    """
+    Cuenta las consultas y conexiones que hace el código bajo prueba.
+
+    Las consultas se cuentan con un listener de ``app.instrumentation`` (las
+    que pasan por ``cursor_context()``/``streaming_cursor_context()``) y las
+    conexiones, como llamadas a ``get_connection()`` (del pool o nuevas).
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.connections = 0
+
+    @property
+    def count(self):
+        """Número de consultas registradas."""
+        return len(self.queries)
+
+    def reset(self):
+        """Pone los contadores a cero."""
+        self.queries = []
+        self.connections = 0
+
+    def _on_query(self, name, sql, params, duration, error):
+        self.queries.append(name)
+
+    @contextmanager
+    def budget(self, max_queries, max_connections=None):
+        """
+        Falla si el bloque hace más de ``max_queries`` consultas (o más de
+        ``max_connections`` conexiones).
+
+        Uso:
+            with query_counter.budget(3):
+                client.get('/')
+        """
+        self.reset()
+        yield self
+        assert self.count <= max_queries, (
+            f"{self.count} consultas (máximo {max_queries}): {self.queries}")
+        if max_connections is not None:
+            assert self.connections <= max_connections, (
+                f"{self.connections} conexiones (máximo {max_connections})")
+
+
+@pytest.fixture
+def query_counter(monkeypatch):
+    """
+    Fixture con un ``QueryCounter`` activo durante el test.
+
+    Sirve para fijar un presupuesto de consultas por ruta y detectar
+    regresiones N+1 (consultas por fila o por categoría).
+    """
+    counter = QueryCounter()
+    get_connection = database.get_connection
+
+    def counting_get_connection():
+        counter.connections += 1
+        return get_connection()
+
+    monkeypatch.setattr(database, 'get_connection', counting_get_connection)
+    add_query_listener(counter._on_query)
+    yield counter
+    remove_query_listener(counter._on_query)
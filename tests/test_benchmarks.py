@@ -0,0 +1,136 @@
+"""
+Tests del generador sintético y del comparador de benchmarks (sin BD).
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks import compare
+from benchmarks.run_benchmarks import time_call
+from benchmarks.synthetic import (
+    SyntheticSpec, batched, category_names, generate_categorias,
+    generate_gastos, generate_presupuestos, seed_database, MAX_MONTO,
+)
+from app.constants import MESES
+
+
+class TestSynthetic:
+    """Tests del generador de datos sintéticos."""
+
+    def test_misma_semilla_mismos_datos(self):
+        spec = SyntheticSpec(gastos=500, seed=7, hasta=('Marzo', 2025))
+        assert list(generate_gastos(spec)) == list(generate_gastos(spec))
+        otra = SyntheticSpec(gastos=500, seed=8, hasta=('Marzo', 2025))
+        assert list(generate_gastos(spec)) != list(generate_gastos(otra))
+
+    def test_gastos_respetan_fk_y_ventana(self):
+        spec = SyntheticSpec(gastos=2000, anios=3, categorias=20, hasta=('Marzo', 2025))
+        categorias = {c['nombre'] for c in generate_categorias(spec)}
+        meses = set(spec.meses())
+
+        gastos = list(generate_gastos(spec))
+
+        assert len(gastos) == 2000
+        assert len(categorias) == 20
+        for categoria, descripcion, monto, mes, anio in gastos:
+            assert categoria in categorias
+            assert (mes, anio) in meses
+            assert 0 < monto <= MAX_MONTO
+            assert descripcion
+
+    def test_ventana_de_meses(self):
+        spec = SyntheticSpec(anios=2, hasta=('Marzo', 2025))
+        meses = spec.meses()
+
+        assert len(meses) == 24
+        assert meses[0] == ('Abril', 2023)
+        assert meses[-1] == ('Marzo', 2025)
+
+    def test_presupuesto_vigente_desde_el_primer_mes(self):
+        spec = SyntheticSpec(anios=4, hasta=('Diciembre', 2025))
+        presupuestos = generate_presupuestos(spec)
+
+        assert (presupuestos[0][0], presupuestos[0][1]) == spec.meses()[0]
+        periodos = [p[1] * 100 + MESES.index(p[0]) for p in presupuestos]
+        assert periodos == sorted(set(periodos))
+
+    def test_nombres_de_categoria(self):
+        nombres = category_names(SyntheticSpec(categorias=17))
+        assert nombres[0] == 'Compra'
+        assert nombres[-1] == 'Categoría 17'
+        assert len(set(nombres)) == 17
+
+    def test_spec_invalida(self):
+        with pytest.raises(ValueError):
+            SyntheticSpec(anios=0)
+
+    def test_batched(self):
+        assert [len(b) for b in batched(range(12), 5)] == [5, 5, 2]
+
+    def test_seed_database_inserta_categorias_antes_que_gastos(self):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        spec = SyntheticSpec(gastos=25, categorias=3, hasta=('Marzo', 2025))
+
+        counts = seed_database(conn, spec, batch_size=10)
+
+        tablas = [c.args[0].split()[2] for c in cur.executemany.call_args_list]
+        assert tablas == ['categorias', 'presupuesto', 'gastos', 'gastos', 'gastos']
+        assert counts['gastos'] == 25
+
+
+class TestCompare:
+    """Tests de la detección de regresiones."""
+
+    BASE = {"results": {
+        "a": {"median_ms": 100.0}, "b": {"median_ms": 100.0},
+        "c": {"median_ms": 0.5}, "viejo": {"median_ms": 10.0},
+    }}
+
+    def test_clasifica_cambios(self):
+        actual = {"results": {
+            "a": {"median_ms": 130.0},   # +30 %: regresión
+            "b": {"median_ms": 70.0},    # -30 %: mejora
+            "c": {"median_ms": 0.9},     # +80 % pero < 1 ms: ruido
+            "nuevo": {"median_ms": 5.0},
+        }}
+
+        rows = {r["name"]: r["status"] for r in compare.compare_results(self.BASE, actual)}
+
+        assert rows == {"a": "regression", "b": "improvement", "c": "ok",
+                        "nuevo": "new", "viejo": "missing"}
+
+    def test_tolerancia(self):
+        actual = {"results": {"a": {"median_ms": 115.0}}}
+        assert compare.compare_results(self.BASE, actual, tolerance=0.2)[0]["status"] == "ok"
+        assert compare.compare_results(self.BASE, actual, tolerance=0.1)[0]["status"] == "regression"
+
+    def test_main_sale_con_error_si_hay_regresion(self, tmp_path):
+        import json
+        base = tmp_path / "base.json"
+        actual = tmp_path / "actual.json"
+        base.write_text(json.dumps(self.BASE))
+        actual.write_text(json.dumps({"results": {"a": {"median_ms": 200.0}}}))
+
+        assert compare.main([str(base), str(actual)]) == 1
+        assert compare.main([str(base), str(base)]) == 0
+
+
+def test_time_call():
+    llamadas = []
+    stats = time_call(lambda: llamadas.append(1), repeat=4, warmup=2)
+
+    assert len(llamadas) == 6
+    assert stats["runs"] == 4
+    assert stats["min_ms"] <= stats["median_ms"] <= stats["max_ms"]
+
+
+class TestStartup:
+    """Benchmark de arranque (sin lanzar procesos)."""
+
+    def test_summarize_mismas_claves_que_time_call(self):
+        from benchmarks.startup import summarize
+        stats = summarize([30.0, 10.0, 20.0])
+        assert stats == {'runs': 3, 'min_ms': 10.0, 'median_ms': 20.0, 'mean_ms': 20.0,
+                         'p95_ms': 30.0, 'max_ms': 30.0}
+        assert set(stats) == set(time_call(lambda: None, repeat=1, warmup=0))
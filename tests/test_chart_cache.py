@@ -0,0 +1,151 @@
+"""
+Tests unitarios para la caché de gráficos (app.chart_cache).
+"""
+import os
+import subprocess
+import sys
+from unittest.mock import patch, MagicMock
+from app import chart_cache
+from app.chart_cache import ChartCache, cached_chart, data_version, invalidate
+
+
+class TestChartCache:
+    """Tests de la caché LRU."""
+
+    def test_lru_expulsa_la_menos_usada(self):
+        """Al superar max_entries sale la entrada usada hace más tiempo."""
+        cache = ChartCache(max_entries=2)
+        cache.set('a', 1, 'A')
+        cache.set('b', 1, 'B')
+        cache.get('a', 1)  # 'a' pasa a ser la más reciente
+        cache.set('c', 1, 'C')
+
+        assert cache.get('b', 1) is chart_cache._MISS
+        assert cache.get('a', 1) == 'A'
+        assert cache.get('c', 1) == 'C'
+        assert cache.stats()['size'] == 2
+
+    def test_otra_version_es_fallo(self):
+        """Una entrada de una versión de datos anterior no se sirve."""
+        cache = ChartCache()
+        cache.set('a', 1, 'A')
+
+        assert cache.get('a', 2) is chart_cache._MISS
+        assert cache.stats()['size'] == 0
+
+    def test_ttl(self):
+        """Las entradas caducan tras ttl segundos."""
+        cache = ChartCache(ttl=10)
+        with patch('app.chart_cache.time.monotonic', return_value=100.0):
+            cache.set('a', 1, 'A')
+        with patch('app.chart_cache.time.monotonic', return_value=105.0):
+            assert cache.get('a', 1) == 'A'
+        with patch('app.chart_cache.time.monotonic', return_value=111.0):
+            assert cache.get('a', 1) is chart_cache._MISS
+
+    def test_guarda_none(self):
+        """None (p.ej. torta sin datos) también es un resultado cacheable."""
+        cache = ChartCache()
+        cache.set('a', 1, None)
+
+        assert cache.get('a', 1) is None
+
+
+class TestCachedChart:
+    """Tests del decorador y de la invalidación por escrituras."""
+
+    def _generador(self):
+        generador = MagicMock(side_effect=lambda *a, **k: f"chart{a}{k}")
+        return cached_chart('test')(generador), generador
+
+    def test_sin_contexto_de_app_no_cachea(self):
+        """Fuera de la app siempre se genera de nuevo."""
+        cacheado, generador = self._generador()
+
+        cacheado('Compra')
+        cacheado('Compra')
+
+        assert generador.call_count == 2
+
+    def test_repeticion_no_regenera_y_escritura_invalida(self, app):
+        """La misma petición se sirve de caché hasta que hay una escritura."""
+        app.config['CHART_CACHE_ENABLED'] = True
+        cacheado, generador = self._generador()
+
+        with app.app_context():
+            assert cacheado('Compra', anio=2025) == cacheado('Compra', anio=2025)
+            assert generador.call_count == 1
+
+            cacheado('Facturas', anio=2025)
+            assert generador.call_count == 2
+
+            invalidate()
+            cacheado('Compra', anio=2025)
+            assert generador.call_count == 3
+
+    def test_invalidacion_con_fichero_compartido(self, app, tmp_path):
+        """Cada invalidación suma uno al contador compartido, aunque sean seguidas."""
+        app.config['CHART_CACHE_STAMP_FILE'] = str(tmp_path / 'charts.stamp')
+
+        with app.app_context():
+            antes = data_version()
+            chart_cache._bump_version()
+            chart_cache._bump_version()  # Mismo tic de reloj: sigue contando
+            despues = data_version()
+
+        assert (tmp_path / 'charts.stamp').exists()
+        assert despues[1] == antes[1] + 2
+
+    def test_invalidacion_de_otro_proceso(self, app, tmp_path):
+        """Una escritura en otro proceso invalida lo cacheado en este."""
+        stamp = str(tmp_path / 'charts.stamp')
+        app.config['CHART_CACHE_ENABLED'] = True
+        app.config['CHART_CACHE_STAMP_FILE'] = stamp
+        cacheado, generador = self._generador()
+
+        with app.app_context():
+            cacheado('Compra')
+            cacheado('Compra')
+            assert generador.call_count == 1
+
+            subprocess.run(
+                [sys.executable, '-c',
+                 'import sys; from app.chart_cache import bump_stamp; bump_stamp(sys.argv[1])', stamp],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+
+            cacheado('Compra')
+            assert generador.call_count == 2
+
+    def test_fichero_por_defecto_en_logs(self, tmp_path, monkeypatch):
+        """Sin configurar, todos los workers comparten logs/chart-cache.stamp."""
+        monkeypatch.setattr(chart_cache, '_default_stamp', None)
+        monkeypatch.setattr(chart_cache, 'get_logs_dir', lambda: tmp_path)
+
+        assert chart_cache._stamp_file() == str(tmp_path / chart_cache.STAMP_FILENAME)
+
+    @patch('app.database.get_connection')
+    def test_invalidacion_tras_el_commit_de_la_peticion(self, mock_get_connection, app):
+        """Con unidad de trabajo, la versión sube después del commit real."""
+        from app.database import cursor_context
+
+        conn = MagicMock()
+        mock_get_connection.return_value = conn
+        app.config['DB_REQUEST_SCOPED'] = True
+        versiones = {}
+
+        def view():
+            with cursor_context() as (c, cur):
+                cur.execute("DELETE FROM gastos WHERE id = 1")
+                c.commit()
+            versiones['antes'] = data_version()
+            invalidate()
+            versiones['tras_invalidar'] = data_version()
+            return 'ok'
+
+        app.add_url_rule('/_cache', endpoint='_cache', view_func=view)
+        conn.commit.side_effect = lambda: versiones.setdefault('en_commit', data_version())
+        app.test_client().get('/_cache')
+
+        assert versiones['tras_invalidar'] == versiones['antes']
+        assert versiones['en_commit'] == versiones['antes']
+        assert data_version() != versiones['antes']
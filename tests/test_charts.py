@@ -3,6 +3,7 @@ Tests unitarios esenciales para el módulo de charts_service.
 
 Solo cubre las funciones críticas para prevenir fallos visibles al usuario.
 """
+import time
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
@@ -284,3 +285,327 @@ class TestChartsService:
         assert 'chart' in resultado
         assert '2022' in resultado['chart']
         assert mock_cursor.execute.call_count == 2
+
+
+class TestPlotlyAsset:
+    """Tests de plotly.js servido una sola vez como recurso con huella."""
+
+    def test_to_plot_html_no_incluye_plotlyjs(self):
+        """El HTML de cada gráfico solo lleva div + datos, no el bundle."""
+        import plotly.graph_objects as go
+        from app.utils_df import to_plot_html
+
+        html = to_plot_html(go.Figure(go.Bar(x=['a'], y=[1])))
+
+        assert 'Plotly.newPlot' in html
+        assert len(html) < 100_000  # El bundle de plotly.js pesa varios MB
+
+    def test_asset_con_huella_y_cache_larga(self, client):
+        """La URL con la huella actual se sirve con caché inmutable."""
+        from app.assets import plotly_js
+
+        fingerprint = plotly_js()[1]
+        response = client.get(f'/assets/plotly-{fingerprint}.min.js')
+
+        assert response.status_code == 200
+        assert response.cache_control.max_age == 365 * 24 * 3600
+        assert response.cache_control.immutable
+        response.close()
+
+    def test_asset_con_huella_obsoleta(self, client):
+        """Una huella que no coincide con el contenido actual da 404."""
+        response = client.get('/assets/plotly-000000000000.min.js')
+
+        assert response.status_code == 404
+
+
+class TestChartDataApi:
+    """Tests de los endpoints JSON de gráficos (carga diferida en /report)."""
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_pie_json(self, mock_cursor_context, client):
+        """La torta se sirve como figura JSON (data + layout)."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            {'categoria': 'Compra', 'total': 250.0}]
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        response = client.get('/api/charts/pie?mes=Octubre&anio=2025')
+
+        assert response.status_code == 200
+        figura = response.get_json()
+        assert figura['data'][0]['type'] == 'pie'
+        assert 'Octubre' in figura['layout']['title']['text']
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_pie_sin_datos_204(self, mock_cursor_context, client):
+        """Sin gastos en el mes, la torta responde 204 sin cuerpo."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = []
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        response = client.get('/api/charts/pie?mes=Octubre&anio=2025')
+
+        assert response.status_code == 204
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_categoria_json_anio_completo(self, mock_cursor_context, client):
+        """Con mes y año, la gráfica de categoría muestra el año completo."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            {'anio': 2024, 'mes': 'Enero', 'categoria': 'Facturas',
+                'descripcion': 'Luz', 'total': 80.0}]
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        response = client.get(
+            '/api/charts/categoria?categoria=Facturas&mes=Enero&anio=2024')
+
+        assert response.status_code == 200
+        assert '2024' in response.get_json()['layout']['title']['text']
+
+    def test_parametros_invalidos_400(self, client):
+        """Parámetros incompletos o inválidos devuelven 400."""
+        assert client.get('/api/charts/pie?mes=Octubre').status_code == 400
+        assert client.get('/api/charts/categoria').status_code == 400
+        assert client.get(
+            '/api/charts/comparacion?mes=Foo&anio=2025').status_code == 400
+        assert client.get('/api/charts/otro').status_code == 404
+
+
+class TestReportDataLoader:
+    """Tests del cargador único de datos del reporte."""
+
+    FILAS_VENTANA = [
+        {'periodo': 202501, 'anio': 2025, 'mes': 'Enero', 'categoria': 'Compra',
+            'descripcion': 'Mercadona', 'incluir_en_resumen': 1, 'total': 100.0},
+        {'periodo': 202501, 'anio': 2025, 'mes': 'Enero', 'categoria': 'Alquiler',
+            'descripcion': 'Piso', 'incluir_en_resumen': 0, 'total': 700.0},
+        {'periodo': 202502, 'anio': 2025, 'mes': 'Febrero', 'categoria': 'Compra',
+            'descripcion': 'Lidl', 'incluir_en_resumen': 1, 'total': 50.0},
+        {'periodo': 202502, 'anio': 2025, 'mes': 'Febrero', 'categoria': 'Gasolina',
+            'descripcion': 'Repsol', 'incluir_en_resumen': 1, 'total': 40.0},
+        {'periodo': 202502, 'anio': 2025, 'mes': 'Febrero', 'categoria': 'Gasolina',
+            'descripcion': 'Cepsa', 'incluir_en_resumen': 1, 'total': 20.0},
+    ]
+    PRESUPUESTOS = [{'mes': 'Enero', 'anio': 2025, 'presupuesto_mensual': 900.0}]
+    # Resultado de q_report_window: gastos y presupuestos en una sola consulta
+    FILAS_REPORTE = ([{'tipo': 'gasto', **fila} for fila in FILAS_VENTANA]
+                     + [{'tipo': 'presupuesto', 'periodo': 202501, 'anio': 2025, 'mes': 'Enero',
+                         'categoria': None, 'descripcion': None, 'incluir_en_resumen': None,
+                         'total': 900.0}])
+
+    def _mock_cursor(self, mock_cursor_context, *resultados):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = list(resultados)
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+        return mock_cursor
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_una_consulta_para_todo_el_reporte(self, mock_cursor_context):
+        """El nº de consultas no depende del nº de categorías."""
+        from app.services.charts_service import generate_report_charts
+
+        mock_cursor = self._mock_cursor(
+            mock_cursor_context, self.FILAS_REPORTE)
+
+        charts = generate_report_charts(
+            'Febrero', 2025, ['Compra', 'Gasolina', 'Facturas'],
+            anio_graficas=2025, mes_graficas='Febrero')
+
+        assert mock_cursor.execute.call_count == 1
+        assert charts['pie'] is not None
+        assert set(charts['categorias']) == {'Compra', 'Gasolina', 'Facturas'}
+        assert '2025' in charts['comparacion']['chart']
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_mismas_figuras_que_los_generadores_individuales(self, mock_cursor_context):
+        """Las figuras del cargador coinciden con las de las consultas por gráfico."""
+        from app.services import charts_service
+
+        self._mock_cursor(mock_cursor_context, self.FILAS_REPORTE)
+        data = charts_service.load_report_data('Febrero', 2025, 2025, 'Febrero')
+        figuras = charts_service.build_report_figures(data, ['Compra', 'Gasolina'])
+
+        self._mock_cursor(
+            mock_cursor_context,
+            [{'categoria': 'Compra', 'total': 50.0},
+             {'categoria': 'Gasolina', 'total': 60.0}],
+            [{'anio': 2025, 'mes': 'Enero', 'categoria': 'Compra',
+              'descripcion': 'Mercadona', 'total': 100.0},
+             {'anio': 2025, 'mes': 'Febrero', 'categoria': 'Compra',
+              'descripcion': 'Lidl', 'total': 50.0}],
+            [{'mes': 'Febrero', 'anio': 2025, 'total': 60.0}],
+            [{'mes': 'Enero', 'anio': 2025,
+              'total_incluido_resumen': 100.0, 'total_con_todas': 800.0},
+             {'mes': 'Febrero', 'anio': 2025,
+              'total_incluido_resumen': 110.0, 'total_con_todas': 110.0}],
+            self.PRESUPUESTOS)
+        pie = charts_service.build_pie_figure('Febrero', 2025)
+        compra = charts_service.build_category_figure('Compra', 2025, 'Febrero')
+        gasolina = charts_service.build_category_figure('Gasolina', 2025, 'Febrero')
+        comparacion, _ = charts_service.build_comparison_figure(2025, 'Febrero')
+
+        assert figuras['pie'].to_json() == pie.to_json()
+        assert figuras['categorias']['Compra'].to_json() == compra.to_json()
+        assert figuras['categorias']['Gasolina'].to_json() == gasolina.to_json()
+        assert figuras['comparacion'][0].to_json() == comparacion.to_json()
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_ventana_sin_gastos(self, mock_cursor_context):
+        """Sin gastos en la ventana: torta vacía y el resto de gráficos a cero."""
+        from app.services.charts_service import generate_report_charts
+
+        self._mock_cursor(mock_cursor_context, [])
+
+        charts = generate_report_charts('Enero', 2025, ['Compra'],
+                                        anio_graficas=2025, mes_graficas='Enero')
+
+        assert charts['pie'] is None
+        assert 'Sin datos' in charts['categorias']['Compra']
+        assert charts['comparacion']['chart']
+
+
+class TestParallelReport:
+    """Tests de la generación en paralelo de los gráficos del reporte."""
+
+    def _generar(self, app, mock_cursor_context, **config):
+        from app.services.charts_service import generate_report_charts
+
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [TestReportDataLoader.FILAS_REPORTE]
+        mock_cursor_context.return_value.__enter__.return_value = (None, mock_cursor)
+        app.config.update(config)
+        with app.app_context():
+            return generate_report_charts(
+                'Febrero', 2025, ['Compra', 'Gasolina', 'Facturas'],
+                anio_graficas=2025, mes_graficas='Febrero')
+
+    @patch('app.services.charts_service.cursor_context')
+    def test_paralelo_igual_que_secuencial(self, mock_cursor_context, app):
+        """El modo paralelo produce los mismos gráficos que el secuencial."""
+        secuencial = self._generar(app, mock_cursor_context, REPORT_PARALLEL_CHARTS=False)
+        paralelo = self._generar(app, mock_cursor_context, REPORT_PARALLEL_CHARTS=True,
+                                 REPORT_CHART_WORKERS=3, REPORT_CHART_TIMEOUT=30)
+
+        assert list(paralelo['categorias']) == ['Compra', 'Gasolina', 'Facturas']
+        assert paralelo['pie'].count('"type":"pie"') == secuencial['pie'].count('"type":"pie"')
+        assert paralelo['comparacion']['df_comparacion'].equals(
+            secuencial['comparacion']['df_comparacion'])
+
+    @patch('app.services.charts_service._category_figure')
+    @patch('app.services.charts_service.cursor_context')
+    def test_grafico_fallido_usa_placeholder(self, mock_cursor_context, mock_category, app):
+        """Un gráfico que lanza excepción se sustituye por el aviso y no rompe el resto."""
+        from app.services.charts_service import CHART_PLACEHOLDER_HTML
+
+        mock_category.side_effect = RuntimeError('boom')
+        charts = self._generar(app, mock_cursor_context, REPORT_PARALLEL_CHARTS=True,
+                               REPORT_CHART_TIMEOUT=30)
+
+        assert charts['categorias']['Compra'] == CHART_PLACEHOLDER_HTML
+        assert charts['categorias']['Gasolina'] != CHART_PLACEHOLDER_HTML
+        assert charts['pie'] is not None
+
+    @patch('app.services.charts_service._comparison_figure')
+    @patch('app.services.charts_service.cursor_context')
+    def test_grafico_lento_usa_placeholder(self, mock_cursor_context, mock_comparison, app):
+        """Un gráfico que supera el timeout se sustituye por el aviso."""
+        import threading
+        from app.services.charts_service import CHART_PLACEHOLDER_HTML
+
+        liberar = threading.Event()
+        mock_comparison.side_effect = lambda *a, **k: liberar.wait(5)
+        try:
+            charts = self._generar(app, mock_cursor_context, REPORT_PARALLEL_CHARTS=True,
+                                   REPORT_CHART_TIMEOUT=0.2)
+        finally:
+            liberar.set()
+
+        assert charts['comparacion'] == {'chart': CHART_PLACEHOLDER_HTML, 'df_comparacion': None}
+        assert 'Compra' in charts['categorias']
+
+    def test_timeout_cuenta_desde_que_empieza_cada_grafico(self, monkeypatch):
+        """Con más gráficos que hilos, los encolados no gastan el timeout de los demás."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services import charts_service
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(charts_service, '_chart_executor', executor)
+        monkeypatch.setattr(charts_service, 'to_plot_html', lambda fig: fig)
+
+        def lenta(nombre):
+            return lambda: time.sleep(0.15) or nombre
+        tareas = [(('categoria', c), lenta(c)) for c in ('A', 'B', 'C')]
+        try:
+            resultados, completo = charts_service._render_report_parallel(
+                tareas, workers=1, timeout=0.3)
+        finally:
+            executor.shutdown()
+
+        assert completo is True
+        assert list(resultados.values()) == ['A', 'B', 'C']
+
+    @patch('app.services.charts_service._category_figure')
+    @patch('app.services.charts_service.cursor_context')
+    def test_reporte_degradado_no_se_cachea(self, mock_cursor_context, mock_category, app):
+        """Con la caché activa, un reporte con placeholders se vuelve a generar."""
+        from app.chart_cache import get_chart_cache
+
+        get_chart_cache().clear()
+        mock_category.side_effect = RuntimeError('boom')
+        self._generar(app, mock_cursor_context, REPORT_PARALLEL_CHARTS=True,
+                      REPORT_CHART_TIMEOUT=30, CHART_CACHE_ENABLED=True)
+
+        assert get_chart_cache().stats()['size'] == 0
+
+
+class TestVectorizedBuilders:
+    """Tests de los constructores de figuras vectorizados (pivot + reindex)."""
+
+    def test_categoria_con_muchas_descripciones(self):
+        """Cada descripción es una traza alineada con los 12 meses de la ventana."""
+        import pandas as pd
+        from app.services.charts_service import _category_figure, get_last_12_months
+
+        ventana = get_last_12_months('Enero', 2025)
+        filas = [{'anio': 2025, 'mes': mes, 'categoria': 'Compra',
+                  'descripcion': f'Tienda {d:03d}', 'total': float(d + 1)}
+                 for d in range(300) for mes, _ in ventana[::3]]
+        # Fila fuera de la ventana: no debe sumarse a ningún mes
+        filas.append({'anio': 2024, 'mes': 'Enero', 'categoria': 'Compra',
+                      'descripcion': 'Tienda 000', 'total': 999.0})
+        df = pd.DataFrame(filas)
+
+        fig = _category_figure('Compra', df, ventana, 2025)
+
+        assert len(fig.data) == 300
+        primera = fig.data[0]
+        assert primera.name == 'Tienda 000'
+        assert list(primera.x) == [f"{mes} '25" for mes, _ in ventana]
+        assert list(primera.y) == [1.0, 0.0, 0.0] * 4
+
+    def test_comparacion_media_y_saldo_acumulados(self):
+        """Saldo y gasto medio acumulados calculados sobre la ventana."""
+        import pandas as pd
+        from app.services.charts_service import _comparison_figure, get_last_12_months
+
+        ventana = get_last_12_months('Enero', 2025)
+        gastos = pd.DataFrame([
+            {'mes': 'Enero', 'anio': 2025, 'total_incluido_resumen': 100.0, 'total_con_todas': 900.0},
+            {'mes': 'Marzo', 'anio': 2025, 'total_incluido_resumen': 300.0, 'total_con_todas': 400.0},
+        ])
+        presupuestos = pd.DataFrame([
+            {'mes': 'Febrero', 'anio': 2025, 'presupuesto_mensual': 500.0}])
+
+        _, df = _comparison_figure(gastos, presupuestos, ventana, 2025)
+
+        # Antes del primer presupuesto vale 0; después se propaga
+        assert list(df['presupuesto_mensual'][:4]) == [0.0, 500.0, 500.0, 500.0]
+        assert df['saldo_acumulado'][2] == -900.0 + 500.0 + 100.0
+        # Media de los meses con gastos (Enero y Marzo)
+        assert df['gasto_medio_acumulado'][2] == 200.0
+        assert list(df['excede_presupuesto'][:3]) == [True, False, False]
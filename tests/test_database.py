@@ -0,0 +1,246 @@
+"""
+Tests unitarios para la capa de conexiones (app.database).
+
+Usan conexiones mockeadas, no requieren base de datos.
+"""
+from unittest.mock import patch, MagicMock
+import pymysql
+import pytest
+from app.database import cursor_context, streaming_cursor_context
+
+
+def _register_view(app, view, rule='/_uow'):
+    app.add_url_rule(rule, endpoint=rule, view_func=view)
+
+
+class TestUnitOfWork:
+    """Tests de la unidad de trabajo por petición (DB_REQUEST_SCOPED)."""
+
+    @patch('app.database.get_connection')
+    def test_una_conexion_y_un_commit_por_peticion(self, mock_get_connection, app):
+        """Varios cursor_context() en una petición comparten conexión y commit."""
+        conn = MagicMock()
+        mock_get_connection.return_value = conn
+        app.config['DB_REQUEST_SCOPED'] = True
+
+        def view():
+            with cursor_context() as (c, cur):
+                cur.execute("SELECT 1")
+            with cursor_context() as (c, cur):
+                cur.execute("UPDATE gastos SET monto = 1")
+                c.commit()
+            return 'ok'
+
+        _register_view(app, view)
+        response = app.test_client().get('/_uow')
+
+        assert response.status_code == 200
+        mock_get_connection.assert_called_once()
+        conn.commit.assert_called_once()
+        conn.close.assert_called_once()
+        snapshot_cursor = conn.cursor.return_value.__enter__.return_value
+        snapshot_cursor.execute.assert_called_once_with(
+            "START TRANSACTION WITH CONSISTENT SNAPSHOT")
+
+    @patch('app.database.get_connection')
+    def test_sin_consultas_no_abre_conexion(self, mock_get_connection, app):
+        """La conexión se abre de forma perezosa."""
+        app.config['DB_REQUEST_SCOPED'] = True
+        _register_view(app, lambda: 'ok')
+
+        app.test_client().get('/_uow')
+
+        mock_get_connection.assert_not_called()
+
+    @patch('app.database.get_connection')
+    def test_excepcion_revierte_transaccion(self, mock_get_connection, app):
+        """Una excepción en la vista revierte la transacción de la petición."""
+        conn = MagicMock()
+        mock_get_connection.return_value = conn
+        app.config['DB_REQUEST_SCOPED'] = True
+
+        def view():
+            with cursor_context() as (c, cur):
+                cur.execute("DELETE FROM gastos")
+                c.commit()
+            raise RuntimeError("boom")
+
+        _register_view(app, view)
+        # En modo TESTING Flask propaga la excepción tras ejecutar el teardown
+        with pytest.raises(RuntimeError):
+            app.test_client().get('/_uow')
+
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+        conn.close.assert_called_once()
+
+    @patch('app.database.get_connection')
+    def test_error_sql_capturado_revierte_al_final(self, mock_get_connection, app):
+        """Un error de BD capturado por la vista marca la petición para rollback."""
+        conn = MagicMock()
+        conn.cursor.return_value.execute.side_effect = pymysql.Error("fallo")
+        mock_get_connection.return_value = conn
+        app.config['DB_REQUEST_SCOPED'] = True
+
+        def view():
+            try:
+                with cursor_context() as (_, cur):
+                    cur.execute("INSERT INTO gastos VALUES ()")
+            except Exception:
+                pass
+            return 'ok'
+
+        _register_view(app, view)
+        response = app.test_client().get('/_uow')
+
+        assert response.status_code == 200
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+
+    @patch('app.database.get_connection')
+    def test_desactivado_usa_conexion_por_contexto(self, mock_get_connection, app):
+        """Sin DB_REQUEST_SCOPED cada cursor_context() obtiene su conexión."""
+        app.config['DB_REQUEST_SCOPED'] = False
+
+        def view():
+            with cursor_context():
+                pass
+            with cursor_context():
+                pass
+            return 'ok'
+
+        _register_view(app, view)
+        app.test_client().get('/_uow')
+
+        assert mock_get_connection.call_count == 2
+
+
+class TestStreamingCursor:
+    """Tests del cursor sin buffer para exportaciones (streaming_cursor_context)."""
+
+    @patch('app.database.get_connection')
+    def test_usa_ssdictcursor_y_cierra(self, mock_get_connection):
+        """Entrega un SSDictCursor y cierra cursor y conexión al terminar."""
+        conn = MagicMock()
+        mock_get_connection.return_value = conn
+
+        with streaming_cursor_context() as (_, cur):
+            cur.execute("SELECT 1")
+
+        conn.cursor.assert_called_once_with(pymysql.cursors.SSDictCursor)
+        conn.cursor.return_value.close.assert_called_once()
+        conn.close.assert_called_once()
+
+    @patch('app.database.get_connection')
+    def test_corte_a_medias_no_drena_el_resultado(self, mock_get_connection):
+        """Si el consumidor aborta, la conexión se cierra sin leer el resto."""
+        conn = MagicMock()
+        mock_get_connection.return_value = conn
+
+        with pytest.raises(GeneratorExit):
+            with streaming_cursor_context():
+                raise GeneratorExit()
+
+        # cursor.close() drenaría las filas pendientes de un SSCursor
+        conn.cursor.return_value.close.assert_not_called()
+        conn.close.assert_called_once()
+
+    @patch('app.database.get_connection')
+    def test_no_usa_la_conexion_de_la_peticion(self, mock_get_connection, app):
+        """Con unidad de trabajo activa, el streaming abre su propia conexión."""
+        mock_get_connection.side_effect = [MagicMock(), MagicMock()]
+        app.config['DB_REQUEST_SCOPED'] = True
+
+        def view():
+            with cursor_context() as (shared, _):
+                with streaming_cursor_context() as (conn, _):
+                    assert conn is not shared
+            return 'ok'
+
+        _register_view(app, view, rule='/_stream')
+        response = app.test_client().get('/_stream')
+
+        assert response.status_code == 200
+        assert mock_get_connection.call_count == 2
+
+
+class TestEnsureDatabaseExists:
+    """Arranque con camino rápido por versión de esquema."""
+
+    @pytest.fixture(autouse=True)
+    def _sin_cache(self, monkeypatch):
+        from app import database
+        monkeypatch.setattr(database, '_verified_schemas', set())
+
+    @staticmethod
+    def _conn(version_row=None, fetchall=(), error=None):
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.fetchone.return_value = version_row
+        cursor.fetchall.return_value = list(fetchall)
+        if error is not None:
+            cursor.execute.side_effect = error
+        conn.cursor.return_value = cursor
+        conn.cursor.return_value.__enter__.return_value = cursor
+        return conn, cursor
+
+    @patch('app.database.pymysql.connect')
+    def test_version_al_dia_una_conexion_una_consulta(self, mock_connect):
+        from app.database import SCHEMA_VERSION, ensure_database_exists
+        conn, cursor = self._conn(version_row=(SCHEMA_VERSION,))
+        mock_connect.return_value = conn
+
+        ensure_database_exists()
+        ensure_database_exists()  # Ya verificada en este proceso: ni se conecta
+
+        mock_connect.assert_called_once()
+        cursor.execute.assert_called_once_with("SELECT version FROM schema_version WHERE id = 1")
+
+    @patch('app.database.pymysql.connect')
+    def test_sin_tabla_de_version_verifica_y_registra(self, mock_connect):
+        from app import database
+        sin_tabla = pymysql.err.ProgrammingError(1146, "Table 'schema_version' doesn't exist")
+        rapida, _ = self._conn(error=sin_tabla)
+        servidor, servidor_cur = self._conn(version_row=('gastos_db',))
+        columnas = [(tabla, columna) for tabla, cols in database.SCHEMA_REQUIRED_COLUMNS.items()
+                    for columna in cols]
+        bd, bd_cur = self._conn()
+        bd_cur.fetchall.side_effect = [[('gastos',)], columnas]
+        mock_connect.side_effect = [rapida, servidor, bd]
+
+        database.ensure_database_exists()
+
+        sentencias = [c.args[0] for c in bd_cur.execute.call_args_list]
+        assert any('INSERT INTO schema_version' in s for s in sentencias)
+        bd.commit.assert_called_once()
+        assert len(database._verified_schemas) == 1
+
+    @patch('app.database.pymysql.connect')
+    def test_faltan_columnas_no_registra_version(self, mock_connect, capsys):
+        from app import database
+        rapida, _ = self._conn(version_row=(database.SCHEMA_VERSION - 1,))
+        servidor, _ = self._conn(version_row=('gastos_db',))
+        bd, bd_cur = self._conn()
+        bd_cur.fetchall.side_effect = [[('gastos',)], [('gastos', 'id')]]
+        mock_connect.side_effect = [rapida, servidor, bd]
+
+        database.ensure_database_exists()
+
+        sentencias = [c.args[0] for c in bd_cur.execute.call_args_list]
+        assert not any('schema_version' in s for s in sentencias)
+        assert 'gastos.periodo' in capsys.readouterr().out
+        assert database._verified_schemas == set()
+
+    @patch('app.database.pymysql.connect')
+    def test_bd_inexistente_va_al_camino_completo(self, mock_connect):
+        from app import database
+        servidor, servidor_cur = self._conn(version_row=None)
+        bd, bd_cur = self._conn()
+        bd_cur.fetchall.side_effect = [[('gastos',)], []]
+        mock_connect.side_effect = [pymysql.err.OperationalError(1049, "Unknown database"),
+                                    servidor, bd]
+
+        database.ensure_database_exists()
+
+        creadas = [c.args[0] for c in servidor_cur.execute.call_args_list]
+        assert any(s.startswith('CREATE DATABASE') for s in creadas)
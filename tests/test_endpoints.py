@@ -3,6 +3,7 @@ Tests de integración para los endpoints principales de la aplicación.
 """
 import pytest
 from datetime import datetime
+from app.constants import SQL_PERIODO_EXPR
 from app.database import cursor_context
 
 # Marcar todos los tests de este módulo como integration
@@ -39,7 +40,7 @@ def setup_test_db(app):  # noqa: F811
             """)
 
             # Crear tabla gastos
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS gastos (
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     categoria VARCHAR(50) NOT NULL,
@@ -47,18 +48,22 @@ def setup_test_db(app):  # noqa: F811
                     monto DECIMAL(10, 2) NOT NULL,
                     mes VARCHAR(20) NOT NULL,
                     anio INT NOT NULL,
-                    FOREIGN KEY (categoria) REFERENCES categorias(nombre)
+                    periodo INT AS ({SQL_PERIODO_EXPR}) STORED,
+                    FOREIGN KEY (categoria) REFERENCES categorias(nombre),
+                    INDEX idx_gastos_periodo (periodo)
                 );
             """)
 
             # Crear tabla presupuesto
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS presupuesto (
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     monto DECIMAL(10, 2) NOT NULL,
                     fecha_cambio DATETIME NOT NULL,
                     mes VARCHAR(20) NOT NULL,
-                    anio INT NOT NULL
+                    anio INT NOT NULL,
+                    periodo INT AS ({SQL_PERIODO_EXPR}) STORED,
+                    INDEX idx_presupuesto_periodo (periodo)
                 );
             """)
 
@@ -336,3 +341,46 @@ def test_validacion_datos_invalidos(client, setup_test_db, app_context):  # noqa
     response = client.post('/', data=data_cat_invalida, follow_redirects=True)
     # Debería fallar porque la categoría no existe
     assert response.status_code in [200, 400]
+
+
+# Presupuesto de consultas por ruta: una consulta nueva por fila o por
+# categoría (N+1) hace fallar estos tests
+@pytest.mark.parametrize('path, max_queries', [
+    ('/', 3),
+    ('/gastos', 2),
+    ('/gastos/descargar', 1),
+    ('/get_gasto/1', 1),
+    ('/report', 3),
+])
+def test_presupuesto_consultas(client, setup_test_db, query_counter, path, max_queries):  # noqa: F811
+    """Cada ruta se sirve con un número fijo y acotado de consultas."""
+    with query_counter.budget(max_queries, max_connections=max_queries):
+        response = client.get(path)
+        response.get_data()  # Consumir respuestas en streaming
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('lazy, max_queries', [(True, 3), (False, 4)])
+def test_report_consultas_no_dependen_de_categorias(app, client, setup_test_db, query_counter,
+                                                    lazy, max_queries):  # noqa: F811
+    """
+    /report hace las mismas consultas con 4 categorías que con 24.
+
+    Presupuesto, gastos del mes y categorías; sin lazy, además la carga de
+    todos los gráficos (q_report_window, una consulta).
+    """
+    app.config['REPORT_LAZY_CHARTS'] = lazy
+    with query_counter.budget(max_queries):
+        client.get('/report')
+    consultas_base = query_counter.count
+
+    with app.app_context():
+        with cursor_context() as (conn, cursor):
+            cursor.executemany("INSERT INTO categorias (nombre) VALUES (%s);",
+                               [(f'Extra {n}',) for n in range(20)])
+            conn.commit()
+
+    with query_counter.budget(max_queries):
+        response = client.get('/report')
+    assert response.status_code == 200
+    assert query_counter.count == consultas_base
@@ -0,0 +1,126 @@
+"""
+Tests de la instrumentación por petición (Server-Timing y tiempos de consultas).
+"""
+from unittest.mock import patch, MagicMock
+
+import pytest
+from flask import render_template_string
+
+from app import create_app
+from app import instrumentation
+from app.database import cursor_context
+from app.queries import q_list_gastos, q_list_categorias
+
+
+@pytest.fixture
+def timed_app(monkeypatch):
+    """App de testing con SERVER_TIMING_ENABLED y una ruta que consulta y renderiza."""
+    monkeypatch.setattr('app.config.TestingConfig.SERVER_TIMING_ENABLED', True, raising=False)
+    monkeypatch.setattr(instrumentation, '_timing_enabled', False)
+    app = create_app('testing')
+
+    @app.route('/_timing_demo')
+    def timing_demo():
+        with cursor_context() as (_, cur):
+            cur.execute(*q_list_gastos(mes='Enero'))
+            cur.execute(q_list_categorias())
+        return render_template_string('{{ n }} filas', n=2)
+
+    return app
+
+
+class TestNamedQueries:
+    """Los helpers de app.queries etiquetan el SQL con su nombre."""
+
+    def test_sql_con_params(self):
+        sql, params = q_list_gastos(mes='Enero')
+        assert instrumentation.query_name(sql) == 'q_list_gastos'
+        assert isinstance(sql, str) and 'FROM gastos' in sql
+        assert params == ['Enero']
+
+    def test_sql_sin_params_y_sql_suelto(self):
+        assert instrumentation.query_name(q_list_categorias()) == 'q_list_categorias'
+        assert instrumentation.query_name('  SELECT 1') == 'raw_select'
+
+
+class TestRequestTimings:
+    """Tests del acumulador de tiempos."""
+
+    def test_tiempos_exclusivos(self):
+        """Un tramo anidado no se cuenta también en el tramo padre."""
+        timings = instrumentation.RequestTimings()
+        timings.push('charts')
+        timings.push('db')
+        db = timings.pop()
+        charts = timings.pop()
+
+        assert timings.durations['db'] == pytest.approx(db)
+        assert timings.durations['charts'] == pytest.approx(charts - db)
+
+    def test_cabecera(self):
+        timings = instrumentation.RequestTimings()
+        timings.db_queries = 3
+        header = timings.header()
+
+        assert header.startswith('db;dur=')
+        assert 'desc="3 queries"' in header
+        for metric in ('charts', 'plotly', 'render', 'total'):
+            assert f'{metric};dur=' in header
+
+
+class TestInstrumentedCursor:
+    """Tests del cronometraje de consultas en cursor_context()."""
+
+    def test_desactivado_no_envuelve_el_cursor(self, monkeypatch):
+        monkeypatch.setattr(instrumentation, '_timing_enabled', False)
+        cursor = MagicMock()
+        assert instrumentation.instrument_cursor(cursor) is cursor
+
+    @patch('app.database.get_connection')
+    def test_listener_recibe_nombre_y_duracion(self, mock_get_connection):
+        conn = MagicMock()
+        mock_get_connection.return_value = conn
+        recibidas = []
+
+        def listener(name, sql, params, duration, error):
+            recibidas.append((name, params, duration, error))
+
+        instrumentation.add_query_listener(listener)
+        try:
+            with cursor_context() as (_, cur):
+                cur.execute(*q_list_gastos(mes='Enero'))
+                cur.fetchall()
+        finally:
+            instrumentation.remove_query_listener(listener)
+
+        assert len(recibidas) == 1
+        name, params, duration, error = recibidas[0]
+        assert name == 'q_list_gastos'
+        assert params == ['Enero']
+        assert duration >= 0 and error is None
+        conn.cursor.return_value.fetchall.assert_called_once()
+
+
+class TestServerTiming:
+    """Tests de la cabecera Server-Timing y el log por petición."""
+
+    @patch('app.database.get_connection')
+    def test_cabecera_y_log(self, mock_get_connection, timed_app, caplog):
+        mock_get_connection.return_value = MagicMock()
+
+        with caplog.at_level('INFO', logger='app.instrumentation'):
+            response = timed_app.test_client().get('/_timing_demo')
+
+        assert response.status_code == 200
+        header = response.headers['Server-Timing']
+        assert 'desc="2 queries"' in header
+        assert 'render;dur=' in header and 'total;dur=' in header
+
+        registros = [r for r in caplog.records if 'request_timing' in r.getMessage()]
+        assert len(registros) == 1
+        assert registros[0].timing['db_queries'] == 2
+        assert registros[0].timing['endpoint'] == 'timing_demo'
+
+    def test_desactivado_sin_cabecera(self, client):
+        response = client.get('/assets/plotly-x.min.js')
+        assert 'Server-Timing' not in response.headers
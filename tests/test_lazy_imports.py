@@ -0,0 +1,41 @@
+"""
+Tests de la importación diferida de dependencias pesadas (app/lazy_imports.py).
+"""
+import json
+import os
+import subprocess
+import sys
+
+from app.lazy_imports import LazyModule, lazy_import
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_importa_en_el_primer_acceso():
+    modulo = lazy_import('json')
+    assert not modulo.is_loaded
+    assert 'sin cargar' in repr(modulo)
+
+    assert modulo.dumps([1]) == '[1]'
+    assert modulo.is_loaded
+    assert modulo._load() is json
+
+
+def test_submodulos_y_clases():
+    go = LazyModule('plotly.graph_objects')
+    fig = go.Figure()
+    assert isinstance(fig, go.Figure)
+
+
+def test_create_app_no_carga_dependencias_pesadas():
+    """Importar app y crearla no debe importar pandas, numpy, Plotly ni dateutil."""
+    codigo = (
+        "import json, sys\n"
+        "from app import create_app\n"
+        "create_app('testing')\n"
+        "print(json.dumps([m for m in ('pandas', 'numpy', 'plotly', 'dateutil')"
+        " if m in sys.modules]))\n"
+    )
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(salida.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,121 @@
+"""
+Tests del cargador masivo de datos sintéticos (scripts/load_synthetic_data.py).
+"""
+import importlib.util
+import os
+from unittest.mock import MagicMock, patch
+
+from benchmarks.synthetic import SyntheticSpec
+
+_PATH = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'load_synthetic_data.py')
+_spec = importlib.util.spec_from_file_location('load_synthetic_data', _PATH)
+loader = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(loader)
+
+INDEXES = {
+    'idx_categoria': ['categoria'],
+    'idx_categoria_anio_mes': ['categoria', 'anio', 'mes'],
+    'idx_mes_anio': ['mes', 'anio'],
+    'idx_gastos_periodo': ['periodo'],
+}
+
+
+class TestIndexes:
+    """Tests de la gestión de índices secundarios durante la carga."""
+
+    def test_conserva_el_indice_de_la_fk(self):
+        drop = loader.indexes_to_drop(INDEXES)
+
+        assert 'idx_categoria' not in drop
+        assert set(drop) == {'idx_categoria_anio_mes', 'idx_mes_anio', 'idx_gastos_periodo'}
+
+    def test_sin_indice_de_fk_se_pueden_eliminar_todos(self):
+        assert loader.indexes_to_drop({'idx_mes_anio': ['mes', 'anio']}) == {
+            'idx_mes_anio': ['mes', 'anio']}
+
+    def test_drop_y_rebuild_en_un_solo_alter(self):
+        cur = MagicMock()
+        drop = loader.indexes_to_drop(INDEXES)
+
+        loader.drop_indexes(cur, drop)
+        loader.rebuild_indexes(cur, drop)
+
+        drop_sql, rebuild_sql = [c.args[0] for c in cur.execute.call_args_list]
+        assert drop_sql.startswith('ALTER TABLE gastos DROP INDEX')
+        assert drop_sql.count('DROP INDEX') == 3
+        assert 'ADD INDEX `idx_categoria_anio_mes` (`categoria`, `anio`, `mes`)' in rebuild_sql
+
+
+class TestLoadData:
+    """Tests del formato TSV y de la carga por lotes."""
+
+    def test_tsv_escapa_separadores(self):
+        linea = loader.tsv_line(('Compra', 'a\tb\\c\nd', 12.5, 'Enero', 2025))
+        assert linea == 'Compra\ta\\tb\\\\c\\nd\t12.5\tEnero\t2025\n'
+        assert loader.tsv_line((None,)) == '\\N\n'
+
+    def test_insert_por_lotes_con_commit(self):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        spec = SyntheticSpec(gastos=25, hasta=('Marzo', 2025))
+        progress = loader.Progress(25, every=3600)
+
+        with patch('builtins.print'):
+            loader.load_gastos_insert(conn, loader.generate_gastos(spec), 10, progress)
+
+        assert [len(c.args[1]) for c in cur.executemany.call_args_list] == [10, 10, 5]
+        assert conn.commit.call_count == 3
+        assert progress.rows == 25
+
+    def test_load_data_usa_ficheros_temporales(self):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        leidos = []
+        cur.execute.side_effect = lambda sql, params: leidos.append(open(params[0]).read())
+        spec = SyntheticSpec(gastos=15, hasta=('Marzo', 2025))
+
+        with patch('builtins.print'):
+            loader.load_gastos_infile(conn, loader.generate_gastos(spec), 10,
+                                      loader.Progress(15, every=3600))
+
+        assert 'LOAD DATA LOCAL INFILE' in cur.execute.call_args.args[0]
+        assert [texto.count('\n') for texto in leidos] == [10, 5]
+        assert not os.path.exists(cur.execute.call_args.args[1][0])
+
+
+class TestLoadSafety:
+    """Tests de las protecciones sobre BD con datos."""
+
+    def _load(self, database, presupuestos_existentes=0):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchone.return_value = {'n': presupuestos_existentes}
+        cur.fetchall.return_value = [
+            {'INDEX_NAME': 'idx_mes_anio', 'COLUMN_NAME': 'mes'},
+            {'INDEX_NAME': 'idx_mes_anio', 'COLUMN_NAME': 'anio'},
+        ]
+        spec = SyntheticSpec(gastos=5, hasta=('Marzo', 2025))
+        params = {'host': 'h', 'user': 'u', 'password': 'p', 'port': 3306, 'database': database}
+        with patch.object(loader.pymysql, 'connect', return_value=conn), \
+                patch.object(loader, 'create_schema'), patch('builtins.print'):
+            resumen = loader.load(params, spec)
+        return resumen, [c.args[0] for c in cur.execute.call_args_list], cur
+
+    def test_bd_de_la_aplicacion_conserva_indices(self):
+        _, sql, _ = self._load(loader.DefaultConfig.DB_NAME)
+
+        assert not any('DROP INDEX' in s for s in sql)
+        assert 'SET SESSION unique_checks = 0' not in sql
+
+    def test_otra_bd_elimina_indices(self):
+        _, sql, _ = self._load('gastos_carga')
+
+        assert any('DROP INDEX' in s for s in sql)
+        assert 'SET SESSION unique_checks = 0' in sql
+
+    def test_no_duplica_el_historico_de_presupuesto(self):
+        resumen, _, cur = self._load('gastos_carga', presupuestos_existentes=12)
+
+        insertados = [c.args[0] for c in cur.executemany.call_args_list]
+        assert not any('INSERT INTO presupuesto' in s for s in insertados)
+        assert resumen['presupuesto'] == 0
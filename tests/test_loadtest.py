@@ -0,0 +1,159 @@
+"""
+Tests del generador de carga HTTP (benchmarks.loadtest) contra un servidor local.
+"""
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks import loadtest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Servidor mínimo: 302 en POST, 404 en /get_gasto/0, 500 en /report."""
+
+    def _reply(self, status, body=b"ok", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/report":
+            self._reply(500, b"boom")
+        elif self.path == "/get_gasto/0":
+            self._reply(404, b"{}")
+        else:
+            self._reply(200)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.bodies.append(self.rfile.read(length).decode())
+        self._reply(302, b"", {"Location": "/"})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.bodies = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(httpd):
+    return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+class TestHelpers:
+    """Rangos, percentiles y elección de rutas."""
+
+    def test_parse_range(self):
+        assert loadtest.parse_range("1-500") == (1, 500)
+        assert loadtest.parse_range("7") == (7, 7)
+        with pytest.raises(ValueError):
+            loadtest.parse_range("9-3")
+
+    def test_percentile_rango_mas_cercano(self):
+        valores = list(range(1, 101))
+        assert loadtest.percentile(valores, 50) == 50
+        assert loadtest.percentile(valores, 95) == 95
+        assert loadtest.percentile(valores, 99) == 99
+        assert loadtest.percentile([5.0], 99) == 5.0
+        assert loadtest.percentile([], 50) == 0.0
+
+    def test_read_no_escribe(self):
+        factory = loadtest.RequestFactory("read", (1, 10), (1, 3), seed=1)
+        peticiones = [factory.next()[1] for _ in range(500)]
+        assert all(p.method == "GET" for p in peticiones)
+
+    def test_mixed_respeta_pesos_e_ids(self):
+        factory = loadtest.RequestFactory("mixed", (5, 9), (2, 3), seed=1)
+        muestras = [factory.next() for _ in range(5000)]
+        rutas = Counter(route for route, _ in muestras)
+        assert set(rutas) == {name for name, _ in loadtest.PROFILES["mixed"]}
+        assert rutas["/"] > rutas["POST /edit/<id>"]
+
+        for route, req in muestras:
+            if route == "POST /edit/<id>":
+                assert 5 <= int(req.path.rsplit("/", 1)[1]) <= 9
+                assert 2 <= int(req.data["categoria"]) <= 3
+                assert req.data["descripcion"] == "loadtest"
+            elif route == "/get_gasto/<id>":
+                assert 5 <= int(req.path.rsplit("/", 1)[1]) <= 9
+
+    def test_misma_semilla_misma_secuencia(self):
+        a = loadtest.RequestFactory("mixed", (1, 100), (1, 4), seed=3)
+        b = loadtest.RequestFactory("mixed", (1, 100), (1, 4), seed=3)
+        assert [a.next()[1].path for _ in range(50)] == [b.next()[1].path for _ in range(50)]
+
+
+class TestSummary:
+    """Agregación por ruta y formato."""
+
+    def test_summarize_cuenta_errores_y_4xx(self):
+        recorder = loadtest.Recorder()
+        recorder.add("/", 200, 0.010, 100)
+        recorder.add("/", 500, 0.030, 10)
+        recorder.add("/get_gasto/<id>", 404, 0.002, 2)
+        recorder.add("/get_gasto/<id>", 0, 0.001, 0)
+
+        resumen = loadtest.summarize(recorder, elapsed=2.0)
+
+        assert resumen["/"]["requests"] == 2
+        assert resumen["/"]["rps"] == 1.0
+        assert resumen["/"]["errors"] == 1
+        assert resumen["/"]["p99_ms"] == 30.0
+        assert resumen["/get_gasto/<id>"]["client_errors"] == 1
+        assert resumen["/get_gasto/<id>"]["errors"] == 1
+        assert resumen["TOTAL"]["requests"] == 4
+        assert resumen["TOTAL"]["error_rate"] == 0.5
+        assert resumen["TOTAL"]["bytes"] == 112
+
+        tabla = loadtest.format_table(resumen)
+        assert "/get_gasto/<id>" in tabla and "TOTAL" in tabla
+
+
+class TestRun:
+    """Ejecución real contra un servidor HTTP local."""
+
+    def test_run_load_mixed(self, server):
+        recorder, elapsed = loadtest.run_load(
+            _url(server),
+            lambda n: loadtest.RequestFactory("mixed", (1, 5), (1, 2), seed=n),
+            concurrency=4, duration=0.5)
+
+        resumen = loadtest.summarize(recorder, elapsed)
+        assert resumen["TOTAL"]["requests"] > 0
+        # Las redirecciones de los POST no se siguen y no son errores
+        if "POST /" in resumen:
+            assert resumen["POST /"]["errors"] == 0
+        assert resumen["/report"]["error_rate"] == 1.0
+        assert resumen["/gastos"]["errors"] == 0
+        assert any("descripcion=loadtest" in body for body in server.bodies)
+
+    def test_send_error_de_conexion(self):
+        opener = loadtest.urllib.request.build_opener(loadtest._NoRedirect)
+        status, size = loadtest.send(opener, "http://127.0.0.1:1", loadtest.Request("GET", "/"), 1)
+        assert (status, size) == (0, 0)
+
+    def test_main_guarda_json(self, server, tmp_path, capsys):
+        salida = tmp_path / "carga.json"
+        code = loadtest.main(["--url", _url(server), "--concurrency", "2", "--duration", "0.3",
+                              "--gasto-ids", "0-0", "--seed", "1", "--output", str(salida)])
+
+        datos = json.loads(salida.read_text())
+        assert datos["meta"]["profile"] == "read"
+        assert datos["routes"]["/get_gasto/<id>"]["client_errors"] > 0
+        # /report devuelve 500 en el servidor de prueba
+        assert code == 1
+        assert "TOTAL" in capsys.readouterr().out
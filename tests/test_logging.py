@@ -0,0 +1,147 @@
+"""
+Tests del pipeline de logging asíncrono (app/logging_config.py).
+"""
+import json
+import logging
+import os
+import queue
+import sys
+
+import pytest
+
+from app import create_app
+from app import logging_config
+from app.logging_config import DroppingQueueHandler, JsonFormatter
+
+
+def _record(msg='hola %s', args=('mundo',), **extra):
+    record = logging.makeLogRecord({'name': 'app.test', 'levelno': logging.INFO,
+                                    'levelname': 'INFO', 'msg': msg, 'args': args})
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def app_logger():
+    """Deja ``app.logger`` (compartido entre apps) como estaba tras el test."""
+    logger = logging.getLogger('app')
+    handlers, level = logger.handlers[:], logger.level
+    logger.handlers = []
+    yield logger
+    logging_config.shutdown_logging()
+    for handler in logger.handlers:
+        handler.close()
+    logger.handlers = handlers
+    logger.setLevel(level)
+
+
+@pytest.fixture
+def production_like_app(app_logger, tmp_path, monkeypatch):
+    """App de desarrollo (con fichero de log) que escribe los logs en tmp_path."""
+    monkeypatch.chdir(tmp_path)
+
+    def build(**config):
+        for key, value in config.items():
+            monkeypatch.setattr(f'app.config.DevelopmentConfig.{key}', value, raising=False)
+        return create_app('development')
+    return build
+
+
+class TestJsonFormatter:
+    """Formato de una línea JSON por registro."""
+
+    def test_campos_y_extra(self):
+        line = JsonFormatter().format(_record(timing={'db': 1.5}))
+        data = json.loads(line)
+        assert data['message'] == 'hola mundo'
+        assert data['level'] == 'INFO'
+        assert data['logger'] == 'app.test'
+        assert data['timing'] == {'db': 1.5}
+        assert 'args' not in data and 'msecs' not in data
+
+    def test_excepcion(self):
+        try:
+            raise ValueError('mal')
+        except ValueError:
+            record = _record(exc_info=sys.exc_info())
+        data = json.loads(JsonFormatter().format(record))
+        assert 'ValueError: mal' in data['exc_info']
+
+
+class TestDroppingQueueHandler:
+    """Cola acotada que descarta en lugar de bloquear."""
+
+    def test_descarta_y_cuenta_con_la_cola_llena(self):
+        handler = DroppingQueueHandler(queue.Queue(2))
+        for _ in range(5):
+            handler.handle(_record())
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_prepare_resuelve_mensaje_y_traza(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        try:
+            raise KeyError('x')
+        except KeyError:
+            handler.handle(_record(exc_info=sys.exc_info()))
+        record = handler.queue.get_nowait()
+        assert record.msg == 'hola mundo' and record.args is None
+        assert record.exc_info is None and 'KeyError' in record.exc_text
+        # El formato final (con la traza) lo aplica el handler del escritor
+        assert 'KeyError' in logging.Formatter('%(message)s').format(record)
+
+
+class TestSetupLogging:
+    """Integración con create_app."""
+
+    def test_async_escribe_en_fichero_tras_vaciar(self, production_like_app):
+        app = production_like_app(LOG_FORMAT='json')
+        handlers = app.logger.handlers
+        assert len(handlers) == 1 and isinstance(handlers[0], DroppingQueueHandler)
+
+        app.logger.info('gasto %s', 42, extra={'slow_query': {'query': 'q_x'}})
+        logging_config.shutdown_logging()
+
+        with open(os.path.join('logs', 'gastos.log'), encoding='utf-8') as f:
+            lineas = [json.loads(line) for line in f]
+        registro = next(r for r in lineas if r['message'] == 'gasto 42')
+        assert registro['slow_query'] == {'query': 'q_x'}
+
+    def test_avisa_de_registros_descartados(self, production_like_app):
+        app = production_like_app(LOG_QUEUE_SIZE=1)
+        listener = logging_config._listener
+        listener.stop()  # Sin escritor la cola se llena enseguida
+        for n in range(10):
+            app.logger.warning('mensaje %d', n)
+        assert logging_config.get_dropped_count() >= 9
+
+        listener.start()
+        logging_config.shutdown_logging()
+        with open(os.path.join('logs', 'gastos.log'), encoding='utf-8') as f:
+            contenido = f.read()
+        assert 'registros descartados' in contenido
+
+    def test_sincrono_si_se_desactiva(self, production_like_app):
+        app = production_like_app(LOG_ASYNC=False)
+        tipos = {type(h) for h in app.logger.handlers}
+        assert tipos == {logging.handlers.RotatingFileHandler, logging.StreamHandler}
+        assert logging_config._listener is None
+
+    def test_consola_solo_warning_en_frozen(self, production_like_app, monkeypatch, tmp_path):
+        monkeypatch.setattr(logging_config, 'is_frozen', lambda: True)
+        # En frozen los logs van junto al ejecutable: redirigirlos a tmp_path
+        monkeypatch.setattr(logging_config, '__file__', str(tmp_path / 'app' / 'logging_config.py'))
+        for name in ('werkzeug', 'werkzeug.serving', 'werkzeug.wsgi'):
+            werkzeug_logger = logging.getLogger(name)
+            monkeypatch.setattr(werkzeug_logger, 'handlers', werkzeug_logger.handlers[:])
+            monkeypatch.setattr(werkzeug_logger, 'level', werkzeug_logger.level)
+            monkeypatch.setattr(werkzeug_logger, 'propagate', werkzeug_logger.propagate)
+        production_like_app()
+        consola = [h for h in logging_config._listener.handlers
+                   if type(h) is logging.StreamHandler]
+        assert consola[0].level == logging.WARNING
+        assert logging_config._listener.respect_handler_level
+
+    def test_testing_sigue_siendo_sincrono(self, app_logger):
+        app = create_app('testing')
+        assert not any(isinstance(h, DroppingQueueHandler) for h in app.logger.handlers)
@@ -0,0 +1,111 @@
+"""
+Tests del endpoint /metrics (formato Prometheus).
+"""
+import os
+import subprocess
+import sys
+import textwrap
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app import create_app
+from app import instrumentation, metrics as app_metrics
+from app.database import cursor_context
+from app.queries import q_list_categorias
+
+prometheus_client = pytest.importorskip('prometheus_client')
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def metrics_app(monkeypatch):
+    """App de testing con METRICS_ENABLED y una ruta que hace una consulta."""
+    monkeypatch.setattr('app.config.TestingConfig.METRICS_ENABLED', True, raising=False)
+    app = create_app('testing')
+
+    @app.route('/_metrics_demo')
+    def metrics_demo():
+        with cursor_context() as (_, cur):
+            cur.execute(q_list_categorias())
+        return 'ok'
+
+    yield app
+
+    # Dejar el proceso como estaba: sin listeners ni colectores registrados
+    collected = app_metrics.get_metrics()
+    if collected is not None:
+        instrumentation.remove_query_listener(collected.on_query)
+        instrumentation.remove_span_listener(collected.on_span)
+        for collector in vars(collected).values():
+            prometheus_client.REGISTRY.unregister(collector)
+    app_metrics._metrics = None
+
+
+class TestMetricsEndpoint:
+    """Tests de /metrics en un solo proceso."""
+
+    def test_desactivado_devuelve_404(self, client):
+        assert client.get('/metrics').status_code == 404
+
+    @patch('app.database.get_connection')
+    def test_series_de_peticiones_y_consultas(self, mock_get_connection, metrics_app):
+        mock_get_connection.return_value = MagicMock()
+        client = metrics_app.test_client()
+
+        assert client.get('/_metrics_demo').status_code == 200
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        body = response.get_data(as_text=True)
+        assert ('gastosapp_http_request_duration_seconds_count'
+                '{endpoint="metrics_demo",method="GET"} 1.0') in body
+        assert ('gastosapp_http_requests_total'
+                '{endpoint="metrics_demo",method="GET",status="200"} 1.0') in body
+        assert 'gastosapp_http_response_bytes_total{endpoint="metrics_demo"} 2.0' in body
+        assert ('gastosapp_db_query_duration_seconds_count'
+                '{query="q_list_categorias"} 1.0') in body
+        # /metrics no se mide a sí mismo
+        assert 'endpoint="main.metrics"' not in body
+
+    def test_tiempo_de_graficos(self, metrics_app):
+        from app.utils_df import to_plot_json
+        import plotly.graph_objects as go
+
+        to_plot_json(go.Figure())
+        body = metrics_app.test_client().get('/metrics').get_data(as_text=True)
+
+        assert 'gastosapp_chart_duration_seconds_count{chart="to_plot_json",stage="plotly"}' in body
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requiere fork()')
+def test_agrega_entre_procesos(tmp_path):
+    """Con METRICS_MULTIPROC_DIR, /metrics suma las peticiones de todos los workers."""
+    script = textwrap.dedent(f"""
+        import os
+        from app import create_app
+        from app.config import TestingConfig
+
+        TestingConfig.METRICS_ENABLED = True
+        TestingConfig.METRICS_MULTIPROC_DIR = {str(tmp_path)!r}
+        app = create_app('testing')
+        client = app.test_client()
+
+        pid = os.fork()
+        if pid == 0:
+            client.get('/assets/plotly-no-existe.min.js')
+            os._exit(0)
+        os.waitpid(pid, 0)
+        client.get('/assets/plotly-no-existe.min.js')
+        print(client.get('/metrics').get_data(as_text=True))
+    """)
+    env = dict(os.environ)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert ('gastosapp_http_requests_total'
+            '{endpoint="main.plotly_js_asset",method="GET",status="404"} 2.0') in result.stdout
@@ -0,0 +1,183 @@
+"""Tests del runner de migraciones en proceso (app/migrations.py)."""
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pymysql
+import pytest
+
+from app import migrations
+from app.migrations import (
+    Migration,
+    add_column_online,
+    add_index_online,
+    apply_migration,
+    discover_migrations,
+    file_checksum,
+    run_migrations,
+)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "scripts" / "migrations"
+
+
+def _write(tmp_path, name, body="def up(cursor):\n    cursor.execute('SELECT 1')\n"):
+    path = tmp_path / name
+    path.write_text(body, encoding="utf-8")
+    return path
+
+
+def _conn(cursor):
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return conn
+
+
+class TestDiscover:
+    def test_orden_numerico_e_ignora_otros(self, tmp_path):
+        _write(tmp_path, "010_diez.py")
+        _write(tmp_path, "002_dos.py")
+        _write(tmp_path, "helpers.py")
+        _write(tmp_path, "003.py")
+        encontradas = discover_migrations(tmp_path)
+        assert [m.version for m in encontradas] == [2, 10]
+        assert encontradas[0].checksum == file_checksum(tmp_path / "002_dos.py")
+
+    def test_directorio_inexistente(self, tmp_path):
+        assert discover_migrations(tmp_path / "no") == []
+
+    def test_migraciones_del_repo_definen_up(self):
+        encontradas = discover_migrations(MIGRATIONS_DIR)
+        assert [m.version for m in encontradas] == [1, 2, 3, 4]
+        for migration in encontradas:
+            assert callable(migration.load_up())
+
+    def test_sin_up_falla(self, tmp_path):
+        path = _write(tmp_path, "001_mal.py", "x = 1\n")
+        with pytest.raises(ValueError):
+            Migration(1, "001_mal", path, file_checksum(path)).load_up()
+
+
+class TestRunMigrations:
+    def _cursor(self, ledger_rows):
+        """Cursor cuyo estado de schema_migrations es ``ledger_rows``."""
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = lambda: (
+            {"n": 1 if ledger_rows else 0} if "information_schema.TABLES" in cursor.execute.call_args[0][0]
+            else {"db": "test_db"})
+        cursor.fetchall.return_value = ledger_rows
+        return cursor
+
+    def test_salta_aplicadas_sin_cargarlas(self, tmp_path):
+        path = _write(tmp_path, "001_uno.py")
+        nueva = _write(tmp_path, "002_dos.py")
+        cursor = self._cursor([{"version": 1, "name": "001_uno", "checksum": file_checksum(path),
+                                "applied_at": None, "duration_ms": 5}])
+        logs = []
+        with patch.object(Migration, "load_up", autospec=True,
+                          side_effect=lambda m: MagicMock()) as load_up, \
+                patch.object(migrations, "missing_schema_columns", return_value=[]), \
+                patch.object(migrations, "write_schema_version") as write_version:
+            resultado = run_migrations(_conn(cursor), discover_migrations(tmp_path), log=logs.append)
+
+        assert resultado == {"applied": ["002_dos"], "skipped": ["001_uno"], "changed": []}
+        assert [c.args[0].path for c in load_up.call_args_list] == [nueva]
+        write_version.assert_called_once()
+        assert any("001_uno (ya aplicada)" in linea for linea in logs)
+
+    def test_checksum_distinto_avisa(self, tmp_path):
+        _write(tmp_path, "001_uno.py")
+        cursor = self._cursor([{"version": 1, "name": "001_uno", "checksum": "0" * 64,
+                                "applied_at": None, "duration_ms": 5}])
+        logs = []
+        with patch.object(migrations, "missing_schema_columns", return_value=[]), \
+                patch.object(migrations, "write_schema_version"):
+            resultado = run_migrations(_conn(cursor), discover_migrations(tmp_path), log=logs.append)
+        assert resultado["changed"] == ["001_uno"]
+        assert resultado["applied"] == []
+        assert any("checksum distinto" in linea for linea in logs)
+
+    def test_dry_run_no_ejecuta(self, tmp_path):
+        _write(tmp_path, "001_uno.py")
+        cursor = self._cursor([])
+        with patch.object(Migration, "load_up") as load_up, \
+                patch.object(migrations, "write_schema_version") as write_version:
+            resultado = run_migrations(_conn(cursor), discover_migrations(tmp_path), dry_run=True,
+                                       log=lambda _: None)
+        assert resultado["applied"] == []
+        load_up.assert_not_called()
+        write_version.assert_not_called()
+
+    def test_lock_wait_timeout_de_sesion(self, tmp_path):
+        cursor = self._cursor([])
+        with patch.object(migrations, "missing_schema_columns", return_value=["gastos.periodo"]), \
+                patch.object(migrations, "write_schema_version") as write_version:
+            run_migrations(_conn(cursor), [], lock_wait_timeout=7, log=lambda _: None)
+        cursor.execute.assert_any_call("SET SESSION lock_wait_timeout = %s", (7,))
+        write_version.assert_not_called()  # Faltan columnas: no se marca la versión
+
+
+class TestApplyMigration:
+    def test_registra_checksum_y_duracion(self, tmp_path):
+        path = _write(tmp_path, "003_tres.py")
+        migration = Migration(3, "003_tres", path, file_checksum(path))
+        cursor = MagicMock()
+        conn = _conn(cursor)
+
+        apply_migration(conn, migration)
+
+        insert = [c for c in cursor.execute.call_args_list if "INSERT INTO schema_migrations" in c.args[0]]
+        assert len(insert) == 1
+        version, name, checksum, _, duration_ms = insert[0].args[1]
+        assert (version, name, checksum) == (3, "003_tres", migration.checksum)
+        assert isinstance(duration_ms, int)
+        conn.commit.assert_called_once()
+
+    def test_error_hace_rollback_y_no_registra(self, tmp_path):
+        path = _write(tmp_path, "001_mal.py", "def up(cursor):\n    raise RuntimeError('x')\n")
+        cursor = MagicMock()
+        conn = _conn(cursor)
+        with pytest.raises(RuntimeError):
+            apply_migration(conn, Migration(1, "001_mal", path, file_checksum(path)))
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+        assert not any("schema_migrations" in c.args[0] for c in cursor.execute.call_args_list)
+
+
+class TestOnlineDDL:
+    def test_indice_inplace_sin_bloqueo(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+        assert add_index_online(cursor, "gastos", "idx_x", "categoria, periodo") is True
+        sql = cursor.execute.call_args.args[0]
+        assert sql == "ALTER TABLE gastos ADD INDEX idx_x (categoria, periodo), ALGORITHM=INPLACE, LOCK=NONE"
+
+    def test_indice_existente_no_se_toca(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {"1": 1}
+        assert add_index_online(cursor, "gastos", "idx_x", "categoria") is False
+        assert cursor.execute.call_count == 1  # Solo la consulta a INFORMATION_SCHEMA
+
+    def test_columna_sin_soporte_online_cae_a_alter_normal(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+        no_soportado = pymysql.err.OperationalError(1846, "ALGORITHM=INSTANT is not supported")
+        cursor.execute.side_effect = [None, no_soportado, no_soportado, None]
+
+        assert add_column_online(cursor, "gastos", "periodo", "CHAR(7) AS (x) STORED") is True
+        ddl = [c.args[0] for c in cursor.execute.call_args_list[1:]]
+        assert ddl[0].endswith("ALGORITHM=INSTANT")
+        assert ddl[1].endswith("ALGORITHM=INPLACE, LOCK=NONE")
+        assert ddl[2] == "ALTER TABLE gastos ADD COLUMN periodo CHAR(7) AS (x) STORED"
+
+    def test_otros_errores_se_propagan(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+        cursor.execute.side_effect = [None, pymysql.err.OperationalError(1054, "Unknown column")]
+        with pytest.raises(pymysql.err.OperationalError):
+            add_column_online(cursor, "gastos", "x", "INT")
+
+    def test_migracion_002_idempotente(self):
+        up = next(m for m in discover_migrations(MIGRATIONS_DIR) if m.version == 2).load_up()
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {"1": 1}  # La columna ya existe
+        up(cursor)
+        assert not any("UPDATE" in c.args[0] for c in cursor.execute.call_args_list)
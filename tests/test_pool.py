@@ -0,0 +1,143 @@
+"""
+Tests unitarios para el pool de conexiones.
+
+Usan conexiones falsas, no requieren base de datos.
+"""
+from unittest.mock import MagicMock, patch
+import pytest
+from app.pool import ConnectionPool
+from app.exceptions import DatabaseError
+
+
+def _fake_connect():
+    """Devuelve una función connect que crea conexiones MagicMock y las registra."""
+    created = []
+
+    def connect():
+        conn = MagicMock()
+        created.append(conn)
+        return conn
+
+    return connect, created
+
+
+class TestConnectionPool:
+    """Tests del ciclo checkout/devolución del pool."""
+
+    def test_reutiliza_conexion_devuelta(self):
+        """Una conexión devuelta se reutiliza en el siguiente checkout."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect, max_size=2)
+
+        conn = pool.acquire()
+        conn.close()
+        conn2 = pool.acquire()
+
+        assert len(created) == 1
+        assert conn2.raw is created[0]
+        # Al devolverla se resetea la transacción
+        created[0].rollback.assert_called_once()
+        created[0].close.assert_not_called()
+
+    def test_close_doble_no_devuelve_dos_veces(self):
+        """Cerrar dos veces el wrapper no duplica la conexión en el pool."""
+        connect, _ = _fake_connect()
+        pool = ConnectionPool(connect, max_size=2)
+
+        conn = pool.acquire()
+        conn.close()
+        conn.close()
+
+        assert pool.stats() == {'size': 1, 'idle': 1, 'in_use': 0, 'max_size': 2}
+
+    def test_delegacion_de_atributos(self):
+        """El wrapper delega cursor()/commit() en la conexión real."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect)
+
+        conn = pool.acquire()
+        conn.cursor()
+        conn.commit()
+
+        created[0].cursor.assert_called_once()
+        created[0].commit.assert_called_once()
+        conn.close()
+        with pytest.raises(DatabaseError):
+            conn.cursor()
+
+    def test_pool_agotado_lanza_error(self):
+        """Si todas las conexiones están en uso, espera y falla tras el timeout."""
+        connect, _ = _fake_connect()
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+
+        pool.acquire()
+        with pytest.raises(DatabaseError, match="agotado"):
+            pool.acquire()
+
+    def test_ping_fallido_reemplaza_conexion(self):
+        """Una conexión que no responde al ping se descarta y se abre otra."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect)
+
+        pool.acquire().close()
+        created[0].ping.side_effect = Exception("gone away")
+        conn = pool.acquire()
+
+        assert len(created) == 2
+        assert conn.raw is created[1]
+        created[0].close.assert_called_once()
+
+    def test_rollback_fallido_descarta_conexion(self):
+        """Si el reset al devolver falla, la conexión no vuelve al pool."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect)
+
+        conn = pool.acquire()
+        created[0].rollback.side_effect = Exception("broken")
+        conn.close()
+
+        assert pool.stats()['size'] == 0
+        created[0].close.assert_called_once()
+
+    def test_expulsa_ociosas_respetando_min_size(self):
+        """Las conexiones ociosas caducadas se cierran, salvo las de min_size."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect, min_size=1, max_size=3, idle_timeout=10)
+
+        with patch('app.pool.time.monotonic', return_value=100.0):
+            a, b = pool.acquire(), pool.acquire()
+            a.close()
+            b.close()
+        with patch('app.pool.time.monotonic', return_value=200.0):
+            pool.acquire()
+
+        # Una de las dos ociosas se expulsó; la otra se reutilizó
+        assert len(created) == 2
+        assert sum(c.close.call_count for c in created) == 1
+        assert pool.stats() == {'size': 1, 'idle': 0, 'in_use': 1, 'max_size': 3}
+
+    def test_max_lifetime_recicla_conexion(self):
+        """Una conexión más vieja que max_lifetime se cierra al devolverla."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect, max_lifetime=60)
+
+        with patch('app.pool.time.monotonic', return_value=0.0):
+            conn = pool.acquire()
+        with patch('app.pool.time.monotonic', return_value=61.0):
+            conn.close()
+
+        created[0].close.assert_called_once()
+        assert pool.stats()['size'] == 0
+
+    def test_reset_tras_fork_no_cierra_conexiones_heredadas(self):
+        """Tras un fork, el hijo abandona las conexiones del padre sin cerrarlas."""
+        connect, created = _fake_connect()
+        pool = ConnectionPool(connect)
+        pool.acquire().close()
+
+        with patch('app.pool.os.getpid', return_value=-1):
+            conn = pool.acquire()
+
+        assert len(created) == 2
+        assert conn.raw is created[1]
+        created[0].close.assert_not_called()
@@ -0,0 +1,132 @@
+"""
+Tests del perfilado bajo demanda (app/profiling.py).
+"""
+import cProfile
+import logging
+import pstats
+import time
+
+import pandas as pd
+import pytest
+
+from app import create_app
+from app import profiling
+from app.profiling import SamplingProfiler
+
+
+def _trabajo_pandas(n=20000):
+    df = pd.DataFrame({'a': range(n), 'b': range(n)})
+    return df.groupby(df['a'] % 7)['b'].sum().sum()
+
+
+@pytest.fixture
+def profiled_app(monkeypatch, tmp_path):
+    """App de testing con perfilado; los perfiles se escriben en tmp_path/logs."""
+    monkeypatch.chdir(tmp_path)
+
+    def build(**config):
+        config = {'PROFILING_ENABLED': True, 'PROFILING_TOKEN': 'secreto', **config}
+        for key, value in config.items():
+            monkeypatch.setattr(f'app.config.TestingConfig.{key}', value, raising=False)
+        app = create_app('testing')
+
+        @app.route('/_pesada')
+        def pesada():
+            _trabajo_pandas()
+            time.sleep(0.03)  # Margen para que el muestreador tome varias muestras
+            return 'ok'
+        return app
+    return build
+
+
+def _perfiles(tmp_path, sufijo):
+    return sorted((tmp_path / 'logs').glob(f'profile-*{sufijo}'))
+
+
+class TestInitProfiling:
+    """Activación por token y por muestreo."""
+
+    def test_desactivado_no_perfila(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        response = create_app('testing').test_client().get('/get_gasto/abc')
+        assert 'X-Profile-File' not in response.headers
+
+    def test_sin_token_o_token_erroneo_no_perfila(self, profiled_app, tmp_path):
+        client = profiled_app().test_client()
+        assert 'X-Profile-File' not in client.get('/_pesada').headers
+        assert 'X-Profile-File' not in client.get('/_pesada', headers={'X-Profile': 'otro'}).headers
+        assert _perfiles(tmp_path, '') == []
+
+    def test_cprofile_con_token(self, profiled_app, tmp_path, caplog):
+        client = profiled_app().test_client()
+        with caplog.at_level(logging.INFO, logger='app.profiling'):
+            response = client.get('/_pesada', headers={'X-Profile': 'secreto'})
+
+        assert response.status_code == 200
+        prof, = _perfiles(tmp_path, '.prof')
+        collapsed, = _perfiles(tmp_path, '.collapsed')
+        assert response.headers['X-Profile-File'] == f'{prof.name}, {collapsed.name}'
+        assert 'pesada' in prof.name
+
+        stats = pstats.Stats(str(prof))
+        assert any(func[2] == '_trabajo_pandas' for func in stats.stats)
+
+        registro = next(r for r in caplog.records if hasattr(r, 'profile'))
+        assert registro.profile['mode'] == 'cprofile'
+        assert any('pandas/' in h['function'] for h in registro.profile['hot_functions'])
+
+    def test_sampling_por_peticion(self, profiled_app, tmp_path):
+        client = profiled_app().test_client()
+        response = client.get('/_pesada', headers={'X-Profile': 'secreto', 'X-Profile-Mode': 'sampling'})
+
+        assert _perfiles(tmp_path, '.prof') == []
+        collapsed, = _perfiles(tmp_path, '.collapsed')
+        assert response.headers['X-Profile-File'] == collapsed.name
+        lineas = collapsed.read_text(encoding='utf-8').splitlines()
+        assert lineas and all(linea.rsplit(' ', 1)[1].isdigit() for linea in lineas)
+        assert any('(pesada)' in linea for linea in lineas)
+
+    def test_token_en_la_url_no_se_acepta(self, profiled_app, tmp_path):
+        response = profiled_app().test_client().get('/_pesada?_profile=secreto')
+
+        assert 'X-Profile-File' not in response.headers
+        assert _perfiles(tmp_path, '.collapsed') == []
+
+    def test_tasa_de_muestreo(self, profiled_app, tmp_path):
+        client = profiled_app(PROFILING_TOKEN='', PROFILING_SAMPLE_RATE=1.0,
+                              PROFILING_MODE='sampling').test_client()
+        assert 'X-Profile-File' in client.get('/_pesada').headers
+
+    def test_una_peticion_a_la_vez(self, profiled_app):
+        client = profiled_app().test_client()
+        with profiling._profile_lock:
+            response = client.get('/_pesada', headers={'X-Profile': 'secreto'})
+        assert 'X-Profile-File' not in response.headers
+        assert not profiling._profile_lock.locked()
+
+
+class TestResumen:
+    """Funciones más costosas de los módulos de interés."""
+
+    def test_sampling_profiler_encuentra_la_funcion(self):
+        sampler = SamplingProfiler(interval=0.001)
+        sampler.start()
+        fin = time.perf_counter() + 0.05
+        while time.perf_counter() < fin:
+            _trabajo_pandas(2000)
+        sampler.stop()
+
+        todas = sampler.hot_functions(focus=False, limit=50)
+        assert any('_trabajo_pandas' in h['function'] for h in todas)
+        assert all('pandas/' in h['function'] for h in sampler.hot_functions())
+
+    def test_hot_functions_de_cprofile_filtra_modulos(self):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _trabajo_pandas()
+        profiler.disable()
+
+        hot = profiling._hot_functions_from_stats(pstats.Stats(profiler))
+        assert hot and all('pandas/' in h['function'] for h in hot)
+        acumulados = [h['cumulative_ms'] for h in hot]
+        assert acumulados == sorted(acumulados, reverse=True)
@@ -7,6 +7,8 @@ No requieren conexión a DB (son tests puros de lógica).
 from app.queries import (
     q_gasto_by_id,
     q_list_gastos,
+    q_list_gastos_page,
+    q_count_gastos,
     q_categoria_nombre_by_id,
     q_insert_gasto,
     q_update_gasto,
@@ -29,8 +31,11 @@ from app.queries import (
     q_presupuestos_mensuales_por_anio,
     q_gastos_mensuales_last_n_months,
     q_presupuestos_last_n_months,
+    q_report_window,
     q_historico_categoria_last_n_months,
     q_gasolina_last_n_months,
+    q_balance_anual,
+    periodo,
 )
 
 
@@ -82,6 +87,26 @@ class TestGastosQueries:
         assert "AND g.categoria = %s" in sql
         assert params == ["Octubre", 2025, "Compra"]
 
+    def test_q_list_gastos_page(self):
+        """Verifica query paginada: mismos filtros y LIMIT/OFFSET al final."""
+        sql, params = q_list_gastos_page(20, 40, anio=2025, categoria="Compra")
+
+        assert "AND g.anio = %s" in sql
+        assert "AND g.categoria = %s" in sql
+        assert "ORDER BY g.id DESC" in sql
+        assert "LIMIT %s OFFSET %s" in sql
+        assert params == [2025, "Compra", 20, 40]
+
+    def test_q_count_gastos(self):
+        """Verifica query de recuento sin JOIN ni ORDER BY."""
+        sql, params = q_count_gastos(mes="Octubre")
+
+        assert "SELECT COUNT(*) AS total" in sql
+        assert "JOIN" not in sql
+        assert "ORDER BY" not in sql
+        assert "AND g.mes = %s" in sql
+        assert params == ["Octubre"]
+
     def test_q_categoria_nombre_by_id(self):
         """Verifica query para obtener nombre de categoría."""
         sql = q_categoria_nombre_by_id()
@@ -136,13 +161,15 @@ class TestPresupuestoQueries:
 
     def test_q_presupuesto_vigente(self):
         """Verifica query para presupuesto vigente."""
-        sql = q_presupuesto_vigente()
+        sql, params = q_presupuesto_vigente("Octubre", 2025)
 
         assert "SELECT monto" in sql
         assert "FROM presupuesto" in sql
-        assert "WHERE (anio < %s)" in sql
-        assert "ORDER BY anio DESC" in sql
+        assert "WHERE periodo <= %s" in sql
+        assert "ORDER BY periodo DESC" in sql
         assert "LIMIT 1" in sql
+        assert "FIELD" not in sql  # Rango sargable sobre el índice
+        assert params == (202510,)
 
     def test_q_historial_presupuestos(self):
         """Verifica query para historial de presupuestos."""
@@ -150,7 +177,7 @@ class TestPresupuestoQueries:
 
         assert "SELECT mes, anio, monto" in sql
         assert "FROM presupuesto" in sql
-        assert "ORDER BY anio" in sql
+        assert "ORDER BY periodo" in sql
 
     def test_q_presupuesto_exists(self):
         """Verifica query para verificar existencia de presupuesto."""
@@ -178,12 +205,23 @@ class TestPresupuestoQueries:
 
     def test_q_sum_gastos_hasta_mes(self):
         """Verifica query para suma de gastos hasta mes."""
-        sql = q_sum_gastos_hasta_mes()
+        sql, params = q_sum_gastos_hasta_mes("Marzo", 2025)
 
         assert "SELECT SUM(monto) AS total_gastos" in sql
         assert "FROM gastos" in sql
-        assert "WHERE anio = %s" in sql
-        assert "FIELD" in sql  # Ordenación por meses
+        assert "WHERE periodo BETWEEN %s AND %s" in sql
+        assert params == (202501, 202503)
+
+    def test_q_balance_anual(self):
+        """Verifica query única del balance anual (presupuestos + gastos)."""
+        sql = q_balance_anual()
+
+        assert sql.count("UNION ALL") == 2
+        assert "'presupuesto' AS tipo" in sql
+        assert "'gasto' AS tipo" in sql
+        assert "LIMIT 1" in sql  # Arrastre del año anterior
+        assert "GROUP BY periodo, anio, mes" in sql
+        assert sql.count("%s") == 3
 
 
 class TestCategoriasQueries:
@@ -240,7 +278,8 @@ class TestGraficosQueries:
         assert "SELECT mes, SUM(monto) AS total" in sql
         assert "FROM gastos" in sql
         assert "WHERE categoria = 'Gasolina'" in sql
-        assert "GROUP BY mes" in sql
+        assert "GROUP BY periodo, mes" in sql
+        assert "ORDER BY periodo" in sql
 
     def test_q_historico_categoria_grouped(self):
         """Verifica query para histórico de categoría agrupado."""
@@ -304,109 +343,93 @@ class TestPlaceholdersSeguros:
 
 
 class TestNewSlidingWindowQueries:
-    """Tests para las nuevas queries de ventana deslizante de 12 meses."""
+    """Tests para las queries de ventana deslizante de 12 meses (rango de periodos)."""
+
+    def test_periodo(self):
+        """Verifica la conversión mes/año a periodo AAAAMM."""
+        assert periodo('Enero', 2026) == 202601
+        assert periodo('Diciembre', 2025) == 202512
 
     def test_q_gastos_mensuales_last_n_months_con_3_meses(self):
         """Verifica query de gastos mensuales para múltiples meses."""
-        # Las funciones retornan template SQL, luego se hace replace de PLACEHOLDER
-        query_template = q_gastos_mensuales_last_n_months()
+        months = [('Diciembre', 2025), ('Enero', 2026), ('Febrero', 2026)]
 
-        # Simular lo que hace el código: reemplazar PLACEHOLDER
-        months = [('Enero', 2026), ('Febrero', 2026), ('Marzo', 2026)]
-        placeholders = ','.join(['(%s,%s)'] * len(months))
-        params = [item for month in months for item in month]
-
-        sql = query_template.replace('PLACEHOLDER', placeholders)
+        sql, params = q_gastos_mensuales_last_n_months(months)
 
         # Verificar estructura SQL
         assert "SELECT" in sql
         assert "FROM gastos" in sql
-        assert "WHERE (g.mes, g.anio) IN" in sql  # g. es el alias de la tabla
-        assert "GROUP BY" in sql
-
-        # Verificar placeholders correctos
-        assert "(%s,%s),(%s,%s),(%s,%s)" in sql
+        assert "WHERE g.periodo BETWEEN %s AND %s" in sql  # g. es el alias de la tabla
+        assert "GROUP BY g.periodo" in sql
+        assert "ORDER BY g.periodo" in sql
+        assert " IN (" not in sql
 
-        # Verificar parámetros aplanados
-        assert params == ['Enero', 2026, 'Febrero', 2026, 'Marzo', 2026]
+        # Verificar rango de periodos (cruza el cambio de año)
+        assert params == (202512, 202602)
 
     def test_q_gastos_mensuales_last_n_months_con_1_mes(self):
         """Verifica query con un solo mes."""
-        query_template = q_gastos_mensuales_last_n_months()
+        sql, params = q_gastos_mensuales_last_n_months([('Diciembre', 2025)])
 
-        months = [('Diciembre', 2025)]
-        placeholders = ','.join(['(%s,%s)'] * len(months))
-        params = [item for month in months for item in month]
-
-        sql = query_template.replace('PLACEHOLDER', placeholders)
-
-        assert "(%s,%s)" in sql
-        assert "(%s,%s),(%s,%s)" not in sql
-        assert params == ['Diciembre', 2025]
+        assert sql.count("%s") == 2
+        assert params == (202512, 202512)
 
     def test_q_presupuestos_last_n_months_estructura(self):
         """Verifica query de presupuestos para múltiples meses."""
-        query_template = q_presupuestos_last_n_months()
-
         months = [('Octubre', 2025), ('Noviembre', 2025)]
-        placeholders = ','.join(['(%s,%s)'] * len(months))
-        params = [item for month in months for item in month]
 
-        sql = query_template.replace('PLACEHOLDER', placeholders)
+        sql, params = q_presupuestos_last_n_months(months)
 
         assert "SELECT" in sql
         assert "FROM presupuesto" in sql
-        assert "WHERE (mes, anio) IN" in sql
-        assert "(%s,%s),(%s,%s)" in sql
-        assert params == ['Octubre', 2025, 'Noviembre', 2025]
+        assert "WHERE periodo BETWEEN %s AND %s" in sql
+        assert params == (202510, 202511)
+
+    def test_q_report_window_estructura(self):
+        """Gastos y presupuestos de la ventana en una sola consulta."""
+        months = [('Octubre', 2025), ('Noviembre', 2025)]
+
+        sql, params = q_report_window(months)
+
+        assert "UNION ALL" in sql
+        assert "FROM gastos g" in sql
+        assert "FROM presupuesto" in sql
+        assert sql.count("%s") == 4
+        assert params == (202510, 202511, 202510, 202511)
 
     def test_q_historico_categoria_last_n_months_estructura(self):
         """Verifica query de histórico de categoría para múltiples meses."""
-        query_template = q_historico_categoria_last_n_months()
-
         months = [('Enero', 2026), ('Febrero', 2026)]
-        placeholders = ','.join(['(%s,%s)'] * len(months))
 
-        sql = query_template.replace('PLACEHOLDER', placeholders)
+        sql, params = q_historico_categoria_last_n_months('Compra', months)
 
         assert "SELECT" in sql
         assert "FROM gastos" in sql
-        assert "AND (mes, anio) IN" in sql
-        assert "(%s,%s),(%s,%s)" in sql
-
-        # Para esta query, params incluirían categoría primero
-        # pero el test solo verifica estructura SQL
+        assert "WHERE categoria = %s AND periodo BETWEEN %s AND %s" in sql
+        # La categoría va primero en los parámetros
+        assert params == ('Compra', 202601, 202602)
 
     def test_q_gasolina_last_n_months_estructura(self):
         """Verifica query de gasolina para múltiples meses."""
-        query_template = q_gasolina_last_n_months()
-
         months = [('Enero', 2026), ('Febrero', 2026), ('Marzo', 2026)]
-        placeholders = ','.join(['(%s,%s)'] * len(months))
 
-        sql = query_template.replace('PLACEHOLDER', placeholders)
+        sql, params = q_gasolina_last_n_months(months)
 
         assert "SELECT" in sql
         assert "FROM gastos" in sql
         assert "WHERE categoria = 'Gasolina'" in sql
-        assert "AND (mes, anio) IN" in sql
-        assert "GROUP BY mes, anio" in sql
-        assert "(%s,%s),(%s,%s),(%s,%s)" in sql
-
-    def test_placeholder_replacement_12_meses(self):
-        """Verifica que el patrón PLACEHOLDER se reemplaza correctamente para 12 meses."""
-        query_template = q_gastos_mensuales_last_n_months()
-
-        # Simular 12 meses (último año completo)
-        months = [(f'Mes{i}', 2025) for i in range(1, 13)]
-        placeholders = ','.join(['(%s,%s)'] * len(months))
-        params = [item for month in months for item in month]
+        assert "AND periodo BETWEEN %s AND %s" in sql
+        assert "GROUP BY periodo, mes, anio" in sql
+        assert params == (202601, 202603)
 
-        sql = query_template.replace('PLACEHOLDER', placeholders)
+    def test_rango_12_meses(self):
+        """Verifica que una ventana de 12 meses se traduce en un único rango."""
+        months = [(mes, 2025) for mes in ['Febrero', 'Marzo', 'Abril', 'Mayo',
+                                          'Junio', 'Julio', 'Agosto', 'Septiembre',
+                                          'Octubre', 'Noviembre', 'Diciembre']]
+        months.append(('Enero', 2026))
 
-        # Verificar que hay 12 pares de placeholders
-        placeholder_count = sql.count("(%s,%s)")
-        assert placeholder_count == 12
+        sql, params = q_gastos_mensuales_last_n_months(months)
 
-        # Verificar que params tiene 24 elementos (12 meses x 2 valores)
-        assert len(params) == 24
+        assert sql.count("%s") == 2
+        assert params == (202502, 202601)
@@ -0,0 +1,88 @@
+"""
+Tests del contador de consultas (fixture ``query_counter``) sin BD real.
+
+La conexión se sustituye por una falsa que no devuelve filas: basta para
+comprobar que el contador ve cada consulta y conexión de una petición.
+"""
+from unittest.mock import patch
+
+import pytest
+
+
+class _FakeCursor:
+    rowcount = 0
+    lastrowid = None
+
+    def execute(self, *args):
+        return 0
+
+    def executemany(self, *args):
+        return 0
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def fetchmany(self, *args):
+        return []
+
+    def __iter__(self):
+        return iter([])
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class _FakeConnection:
+    def cursor(self, *args, **kwargs):
+        return _FakeCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(app):
+    app.config['DB_POOL_ENABLED'] = False
+    with patch('app.database._connect', side_effect=lambda params: _FakeConnection()):
+        yield
+
+
+def test_cuenta_consultas_y_conexiones(client, fake_db, query_counter):
+    with query_counter.budget(3, max_connections=3):
+        assert client.get('/').status_code == 200
+
+    assert query_counter.queries == ['q_list_categorias', 'q_list_gastos', 'q_balance_anual']
+    assert query_counter.connections == 3
+
+
+def test_request_scoped_usa_una_conexion(app, client, fake_db, query_counter):
+    app.config['DB_REQUEST_SCOPED'] = True
+    with query_counter.budget(3, max_connections=1):
+        client.get('/report')
+    assert query_counter.connections == 1
+
+
+def test_budget_falla_si_se_excede(client, fake_db, query_counter):
+    with pytest.raises(AssertionError, match=r"consultas \(máximo 1\)"):
+        with query_counter.budget(1):
+            client.get('/')
+
+
+def test_listener_activo_durante_el_test(query_counter):
+    from app import instrumentation
+    assert query_counter._on_query in instrumentation._query_listeners
@@ -0,0 +1,207 @@
+"""
+Tests del motor de restauración de backups (restore_backup.py).
+"""
+import gzip
+import io
+import os
+from unittest.mock import MagicMock, patch
+
+import pymysql
+import pytest
+
+import restore_backup as rb
+
+DUMP = """-- MySQL dump 10.13
+--
+/*!40101 SET NAMES utf8mb4 */;
+/*!40014 SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0 */;
+CREATE DATABASE /*!32312 IF NOT EXISTS*/ `economia_db`;
+USE `economia_db`;
+DROP TABLE IF EXISTS `gastos`;
+# comentario de almohadilla
+CREATE TABLE `gastos` (`id` int NOT NULL, `descripcion` varchar(255)) ENGINE=InnoDB;
+INSERT INTO `gastos` VALUES (1,'pan; leche'),(2,'it''s'),(3,'barra \\\\'),(4,'dice \\'hola\\';'),(-5,"a;b");
+DELIMITER ;;
+/*!50003 CREATE TRIGGER t BEFORE INSERT ON gastos FOR EACH ROW BEGIN SET @a = 1; SET @b = 2; END */;;
+DELIMITER ;
+SELECT 10--2;
+/* comentario normal */;
+SELECT 1"""
+
+
+def split(text, size=None):
+    if size is None:
+        return list(rb.iter_statements(io.StringIO(text)))
+    splitter = rb.SqlStatementSplitter()
+    statements = []
+    for i in range(0, len(text), size):
+        statements += splitter.feed(text[i:i + size])
+    return statements + splitter.close()
+
+
+class TestSplitter:
+    """Tests del tokenizador de sentencias."""
+
+    def test_sentencias_del_volcado(self):
+        statements = split(DUMP)
+
+        assert statements[0] == '/*!40101 SET NAMES utf8mb4 */'
+        assert statements[2].startswith('CREATE DATABASE')
+        assert statements[3] == 'USE `economia_db`'
+        assert statements[6] == ("INSERT INTO `gastos` VALUES (1,'pan; leche'),(2,'it''s'),"
+                                 "(3,'barra \\\\'),(4,'dice \\'hola\\';'),(-5,\"a;b\")")
+        assert statements[7].endswith('SET @a = 1; SET @b = 2; END */')
+        assert statements[8] == 'SELECT 10--2'  # "--" sin espacio no es comentario
+        assert statements[-1] == 'SELECT 1'  # Última sin delimitador
+        assert len(statements) == 10
+
+    def test_descarta_comentarios_de_linea(self):
+        statements = split(DUMP)
+
+        assert not any('MySQL dump' in s or 'almohadilla' in s for s in statements)
+        assert not any('comentario normal' in s for s in statements)
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+    def test_igual_con_cualquier_tamano_de_bloque(self, size):
+        assert split(DUMP, size) == split(DUMP)
+
+    def test_comentario_en_mitad_de_sentencia(self):
+        assert split("SELECT 1 -- uno; dos\n, 2;") == ['SELECT 1 \n, 2']
+
+    def test_cadena_sin_cerrar_al_final(self):
+        assert split("INSERT INTO t VALUES ('abc") == ["INSERT INTO t VALUES ('abc"]
+
+
+class TestOpenDump:
+    """Tests de la apertura de volcados comprimidos y de texto."""
+
+    def test_gzip(self, tmp_path):
+        path = tmp_path / 'backup.sql.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write("INSERT INTO t VALUES ('café');\n")
+
+        stream, raw, encoding = rb.open_dump(str(path))
+        with stream:
+            assert encoding == 'utf-8'
+            assert stream.buffer is not raw
+            assert list(rb.iter_statements(stream)) == ["INSERT INTO t VALUES ('café')"]
+
+    def test_latin1_detectado(self, tmp_path):
+        path = tmp_path / 'backup.sql'
+        path.write_bytes("INSERT INTO t VALUES ('año');\r\n".encode('latin-1'))
+
+        stream, raw, encoding = rb.open_dump(str(path))
+        with stream:
+            assert encoding == 'latin-1'
+            assert stream.buffer is raw
+            assert stream.read() == "INSERT INTO t VALUES ('año');\r\n"
+
+
+class TestRestoreStatements:
+    """Tests de la ejecución por lotes."""
+
+    def _conn(self, fail_on=()):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+
+        def execute(sql):
+            if sql in fail_on:
+                raise pymysql.err.IntegrityError(1062, 'Duplicate entry')
+        cursor.execute.side_effect = execute
+        return conn, cursor
+
+    def test_lotes_y_comprobaciones_desactivadas(self):
+        conn, cursor = self._conn()
+        statements = [f'INSERT INTO t VALUES ({i})' for i in range(5)]
+
+        resumen = rb.restore_statements(conn, statements, batch_size=2)
+
+        ejecutadas = [c.args[0] for c in cursor.execute.call_args_list]
+        assert ejecutadas[:2] == ['SET SESSION foreign_key_checks = 0', 'SET SESSION unique_checks = 0']
+        assert ejecutadas[-2:] == ['SET SESSION unique_checks = 1', 'SET SESSION foreign_key_checks = 1']
+        assert resumen == {'executed': 5, 'errors': 0, 'skipped': 0, 'commits': 3}
+        assert conn.commit.call_count == 3
+
+    def test_lote_por_bytes(self):
+        conn, _ = self._conn()
+        resumen = rb.restore_statements(conn, ['x' * 10] * 4, batch_size=100, batch_bytes=20)
+        assert resumen['commits'] == 3  # 2 lotes llenos + commit final
+
+    def test_ignora_use_y_create_database(self):
+        conn, cursor = self._conn()
+        statements = split(DUMP)
+
+        resumen = rb.restore_statements(conn, statements)
+
+        ejecutadas = [c.args[0] for c in cursor.execute.call_args_list]
+        assert 'USE `economia_db`' not in ejecutadas
+        assert not any(s.startswith('CREATE DATABASE') for s in ejecutadas)
+        assert resumen['skipped'] == 2
+
+    def test_errores_se_cuentan_y_continua(self):
+        conn, _ = self._conn(fail_on={'INSERT 2'})
+        progreso = []
+
+        resumen = rb.restore_statements(conn, ['INSERT 1', 'INSERT 2', 'INSERT 3'],
+                                        on_statement=progreso.append)
+
+        assert resumen['executed'] == 2
+        assert resumen['errors'] == 1
+        assert progreso == [1, 1, 2]
+
+    def test_stop_on_error(self):
+        conn, cursor = self._conn(fail_on={'INSERT 2'})
+
+        with pytest.raises(pymysql.err.IntegrityError):
+            rb.restore_statements(conn, ['INSERT 1', 'INSERT 2', 'INSERT 3'], stop_on_error=True)
+
+        conn.rollback.assert_called_once()
+        cursor.execute.assert_any_call('SET SESSION foreign_key_checks = 1')
+
+
+class TestRestoreBackup:
+    """Tests del flujo completo con la conexión simulada."""
+
+    def test_restaura_en_la_bd_indicada(self, tmp_path):
+        path = tmp_path / 'backup.sql.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(DUMP)
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+
+        with patch.object(rb.pymysql, 'connect', return_value=conn), \
+                patch.object(rb, 'bump_stamp') as bump_stamp:
+            ok = rb.restore_backup(str(path), database='copia', create_database=True)
+
+        assert ok is True
+        bump_stamp.assert_called_once()  # Invalida la caché de gráficos de los workers
+        ddl = [c.args[0] for c in cursor.execute.call_args_list]
+        assert ddl[0].startswith('CREATE DATABASE IF NOT EXISTS `copia`')
+        assert ddl[1] == 'USE `copia`'
+        conn.close.assert_called_once()
+
+    def test_fichero_inexistente(self, tmp_path):
+        with patch.object(rb.pymysql, 'connect') as connect:
+            assert rb.restore_backup(str(tmp_path / 'no.sql')) is False
+        connect.assert_not_called()
+
+
+class TestFormat:
+    def test_eta_y_ritmo(self):
+        progress = rb.Progress(total_bytes=100 * 1024 * 1024)
+        with patch.object(progress, 'elapsed', return_value=10.0):
+            linea = progress.line(25 * 1024 * 1024, 1000)
+
+        assert '25.0%' in linea
+        assert '2.5 MB/s' in linea
+        assert 'ETA 30s' in linea
+        assert '100/s' in linea
+
+    def test_latest_backup(self, tmp_path):
+        assert rb.latest_backup(str(tmp_path)) is None
+        viejo = tmp_path / 'a.sql.gz'
+        nuevo = tmp_path / 'b.sql'
+        viejo.write_bytes(b'')
+        nuevo.write_bytes(b'')
+        os.utime(viejo, (1, 1))
+        assert rb.latest_backup(str(tmp_path)) == str(nuevo)
@@ -84,6 +84,55 @@ class TestGastosService:
         assert 'Octubre' in call_args[0][1]
         assert 2025 in call_args[0][1]
 
+    @patch('app.services.gastos_service.cursor_context')
+    def test_list_gastos_page(self, mock_cursor_context):
+        """Test página de gastos: COUNT + LIMIT/OFFSET, sin traer el histórico."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = {'total': 45}
+        mock_cursor.fetchall.return_value = [{'id': 5}, {'id': 4}]
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        resultado = gastos_service.list_gastos_page(
+            page=3, per_page=20, anio=2025)
+
+        assert resultado == {'gastos': [{'id': 5}, {'id': 4}], 'total': 45,
+                             'page': 3, 'total_pages': 3}
+        # Última llamada: la página, con LIMIT 20 OFFSET 40
+        params = mock_cursor.execute.call_args[0][1]
+        assert params[-2:] == [20, 40]
+
+    @patch('app.services.gastos_service.cursor_context')
+    def test_list_gastos_page_ajusta_pagina_y_vacio(self, mock_cursor_context):
+        """Test que una página fuera de rango se ajusta y sin datos no hay 2ª query."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = {'total': 0}
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        resultado = gastos_service.list_gastos_page(page=7)
+
+        assert resultado['page'] == 1
+        assert resultado['total_pages'] == 0
+        assert resultado['gastos'] == []
+        mock_cursor.execute.assert_called_once()
+
+    @patch('app.services.gastos_service.streaming_cursor_context')
+    def test_iter_gastos_por_bloques(self, mock_streaming_context):
+        """Test que iter_gastos lee con fetchmany hasta agotar el cursor."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchmany.side_effect = [
+            [{'id': 3}, {'id': 2}], [{'id': 1}], []]
+        mock_streaming_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        bloques = list(gastos_service.iter_gastos(anio=2025, chunk_size=2))
+
+        assert bloques == [[{'id': 3}, {'id': 2}], [{'id': 1}]]
+        mock_cursor.fetchmany.assert_called_with(2)
+        assert mock_cursor.execute.call_args[0][1] == [2025]
+        mock_cursor.fetchall.assert_not_called()
+
     @patch('app.services.gastos_service.cursor_context')
     def test_add_gasto_exitoso(self, mock_cursor_context):
         """Test agregar gasto con éxito."""
@@ -93,11 +142,14 @@ class TestGastosService:
         mock_cursor_context.return_value.__enter__.return_value = (
             mock_conn, mock_cursor)
 
-        resultado = gastos_service.add_gasto(
-            '1', 'Test', 100.0, 'Octubre', 2025)
+        with patch('app.services.gastos_service.invalidate_charts') as mock_invalidate:
+            resultado = gastos_service.add_gasto(
+                '1', 'Test', 100.0, 'Octubre', 2025)
 
         assert resultado is True
         mock_conn.commit.assert_called_once()
+        # Los gráficos cacheados dejan de ser válidos tras escribir
+        mock_invalidate.assert_called_once()
         assert mock_cursor.execute.call_count == 2  # lookup + insert
 
     @patch('app.services.gastos_service.cursor_context')
@@ -239,51 +291,77 @@ class TestPresupuestoService:
         mock_conn.commit.assert_called_once()
 
     @patch('app.services.presupuesto_service.cursor_context')
-    @patch('app.services.presupuesto_service.get_presupuesto_mensual')
-    def test_calcular_acumulado(self, mock_get_presupuesto, mock_cursor_context):
+    def test_calcular_acumulado(self, mock_cursor_context):
         """Test calcular presupuesto acumulado con presupuesto fijo."""
-        # Mock presupuesto mensual fijo de 1000.0
-        mock_get_presupuesto.return_value = 1000.0
-
-        # Mock gastos acumulados
+        # Presupuesto fijo de 1000.0 desde Enero y 2500 de gastos repartidos
         mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = {'total_gastos': 2500.0}
+        mock_cursor.fetchall.return_value = [
+            {'tipo': 'presupuesto', 'anio': 2025, 'mes': 'Enero', 'total': 1000.0},
+            {'tipo': 'gasto', 'anio': 2025, 'mes': 'Marzo', 'total': 1000.0},
+            {'tipo': 'gasto', 'anio': 2025, 'mes': 'Octubre', 'total': 1500.0},
+            {'tipo': 'gasto', 'anio': 2025, 'mes': 'Noviembre', 'total': 999.0},
+        ]
         mock_cursor_context.return_value.__enter__.return_value = (
             None, mock_cursor)
 
         # Octubre = mes 10, se suma presupuesto de cada mes (Enero a Octubre)
         resultado = presupuesto_service.calcular_acumulado('Octubre', 2025)
 
-        # Verificar que se llamó 10 veces a get_presupuesto_mensual (una por cada mes)
-        assert mock_get_presupuesto.call_count == 10
+        # Una sola consulta para todo el año
+        mock_cursor.execute.assert_called_once()
 
         # 1000 * 10 = 10000 (presupuesto acumulado) - 2500 (gastos) = 7500
         assert resultado == 7500.0
 
     @patch('app.services.presupuesto_service.cursor_context')
-    @patch('app.services.presupuesto_service.get_presupuesto_mensual')
-    def test_calcular_acumulado_variable(self, mock_get_presupuesto, mock_cursor_context):
+    def test_calcular_acumulado_variable(self, mock_cursor_context):
         """Test calcular presupuesto acumulado con presupuesto variable por mes."""
-        # Mock presupuesto mensual variable
-        # Enero: 1000, Febrero: 1200, Marzo: 1500
-        presupuestos = [1000.0, 1200.0, 1500.0]
-        mock_get_presupuesto.side_effect = presupuestos
-
-        # Mock gastos acumulados
+        # Enero: 1000 (arrastrado del año anterior), Febrero: 1200, Marzo: 1500
         mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = {'total_gastos': 1500.0}
+        mock_cursor.fetchall.return_value = [
+            {'tipo': 'presupuesto', 'anio': 2024, 'mes': 'Noviembre', 'total': 1000.0},
+            {'tipo': 'presupuesto', 'anio': 2025, 'mes': 'Febrero', 'total': 1200.0},
+            {'tipo': 'presupuesto', 'anio': 2025, 'mes': 'Marzo', 'total': 1500.0},
+            {'tipo': 'gasto', 'anio': 2025, 'mes': 'Febrero', 'total': 1500.0},
+        ]
         mock_cursor_context.return_value.__enter__.return_value = (
             None, mock_cursor)
 
         # Marzo = mes 3
         resultado = presupuesto_service.calcular_acumulado('Marzo', 2025)
 
-        # Verificar que se llamó 3 veces
-        assert mock_get_presupuesto.call_count == 3
-
         # 1000 + 1200 + 1500 = 3700 (presupuesto acumulado) - 1500 (gastos) = 2200
         assert resultado == 2200.0
 
+    @patch('app.services.presupuesto_service.cursor_context')
+    def test_calcular_acumulado_mes_futuro_sin_gastos(self, mock_cursor_context):
+        """Test que un mes futuro sin gastos devuelve None."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            {'tipo': 'presupuesto', 'anio': 2099, 'mes': 'Enero', 'total': 1000.0},
+        ]
+        mock_cursor_context.return_value.__enter__.return_value = (
+            None, mock_cursor)
+
+        assert presupuesto_service.calcular_acumulado('Marzo', 2099) is None
+
+    def test_calcular_balance_todos_los_meses(self):
+        """Test que el balance anual calcula los 12 saldos de una vez."""
+        rows = [
+            {'tipo': 'presupuesto', 'anio': 2025, 'mes': 'Abril', 'total': 500.0},
+            {'tipo': 'gasto', 'anio': 2025, 'mes': 'Enero', 'total': 100.0},
+            {'tipo': 'gasto', 'anio': 2025, 'mes': 'Mayo', 'total': 200.0},
+        ]
+
+        balance = presupuesto_service.calcular_balance(rows, 2025)
+
+        # Sin presupuesto previo, Enero-Marzo valen 0
+        assert list(balance['presupuesto_mensual'][:5]) == [0, 0, 0, 500, 500]
+        assert balance['presupuesto_mensual'][-1] == 500
+        assert balance['acumulado'][0] == -100
+        assert balance['acumulado'][4] == 1000 - 300
+        assert balance['gastos_acumulados'][-1] == 300
+
 
 class TestCategoriasService:
     """Tests unitarios para categorias_service."""
@@ -0,0 +1,114 @@
+"""
+Tests del log de consultas lentas (app/slow_query.py).
+"""
+import json
+from unittest.mock import patch, MagicMock
+
+from app.queries import q_list_gastos, q_insert_gasto
+from app.slow_query import SlowQueryLog, params_shape, summarize_plan
+
+PLAN_FULL_SCAN = {
+    "query_block": {
+        "cost_info": {"query_cost": "1250.40"},
+        "ordering_operation": {
+            "using_filesort": True,
+            "nested_loop": [
+                {"table": {"table_name": "g", "access_type": "ALL",
+                           "rows_examined_per_scan": 9800}},
+                {"table": {"table_name": "c", "access_type": "eq_ref",
+                           "key": "PRIMARY"}},
+            ],
+        },
+    }
+}
+
+
+def _mock_explain_connection(mock_connect, plan):
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = {'EXPLAIN': json.dumps(plan)}
+    mock_connect.return_value = conn
+    return cur
+
+
+class TestHelpers:
+    """Tests de la descripción de parámetros y del resumen del plan."""
+
+    def test_params_shape_no_muestra_valores(self):
+        assert params_shape(['Enero', 2025]) == '(str, int)'
+        assert params_shape(None) == '()'
+        assert params_shape([(1, 'a'), (2, 'b')]) == '[2 x (int, str)]'
+        assert 'Enero' not in params_shape({'mes': 'Enero'})
+
+    def test_summarize_plan(self):
+        assert summarize_plan(PLAN_FULL_SCAN) == ['filesort', 'full scan: g (9800 filas)']
+        assert summarize_plan({"query_block": {"table": {"access_type": "range"}}}) == []
+
+
+class TestSlowQueryLog:
+    """Tests del listener de consultas lentas."""
+
+    def test_consulta_rapida_no_se_registra(self, caplog):
+        log = SlowQueryLog(threshold_ms=100)
+        sql, params = q_list_gastos(mes='Enero')
+
+        log('q_list_gastos', sql, params, 0.01, None)
+
+        assert 'slow_query' not in caplog.text
+
+    def test_consulta_lenta_se_registra(self, caplog):
+        log = SlowQueryLog(threshold_ms=100)
+        sql, params = q_list_gastos(mes='Enero')
+
+        with caplog.at_level('WARNING', logger='app.slow_query'):
+            log('q_list_gastos', sql, params, 0.25, None)
+
+        assert 'slow_query query=q_list_gastos duration_ms=250.0 params=(str)' in caplog.text
+        assert 'Enero' not in caplog.text
+
+    @patch('app.database._connect')
+    def test_explain_una_vez_por_sql(self, mock_connect, caplog):
+        cur = _mock_explain_connection(mock_connect, PLAN_FULL_SCAN)
+        log = SlowQueryLog(threshold_ms=100, explain=True)
+        sql, params = q_list_gastos(mes='Enero')
+
+        with caplog.at_level('WARNING', logger='app.slow_query'):
+            log('q_list_gastos', sql, params, 0.3, None)
+            log('q_list_gastos', sql, params, 0.4, None)
+
+        cur.execute.assert_called_once()
+        explain_sql, explain_params = cur.execute.call_args[0]
+        assert explain_sql.startswith('EXPLAIN FORMAT=JSON SELECT')
+        assert explain_params == params
+        assert 'issues=filesort; full scan: g (9800 filas)' in caplog.text
+        assert 'cost=1250.40' in caplog.text
+
+    @patch('app.database._connect')
+    def test_insert_no_se_explica(self, mock_connect):
+        log = SlowQueryLog(threshold_ms=1, explain=True)
+
+        log('q_insert_gasto', q_insert_gasto(), ('Enero', 2025, 'Compra', 'x', 1.0), 0.5, None)
+
+        mock_connect.assert_not_called()
+
+
+class TestIntegracionConCursor:
+    """El log se alimenta de las consultas de cursor_context()."""
+
+    @patch('app.database.get_connection')
+    def test_registrado_desde_la_config(self, mock_get_connection, monkeypatch, caplog):
+        from app import create_app, instrumentation
+        from app.database import cursor_context
+
+        monkeypatch.setattr('app.config.TestingConfig.SLOW_QUERY_MS', 0.0001, raising=False)
+        app = create_app('testing')
+        listener = app.extensions['slow_query_log']
+        mock_get_connection.return_value = MagicMock()
+        try:
+            with caplog.at_level('WARNING', logger='app.slow_query'):
+                with app.app_context(), cursor_context() as (_, cur):
+                    cur.execute(*q_list_gastos(mes='Enero'))
+        finally:
+            instrumentation.remove_query_listener(listener)
+
+        assert 'slow_query query=q_list_gastos' in caplog.text